@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""Runs the benchmark suite and writes its results as JSON
+
+Usage:
+    python3 -m benchmarks [-o results.json] [-b name ...] [size ...]
+
+Each benchmark module is run on the given dataset sizes (1000 and 100000
+objects by default). Results from two commits can be compared with
+python3 -m benchmarks.compare old.json new.json.
+"""
+
+import argparse
+import importlib
+
+from benchmarks.common import print_table, write_json
+
+BENCHMARKS = ("storage", "durability", "codecs", "memory", "reload", "geo",
+              "models")
+
+
+def main():
+    """Parses the command line and runs the selected benchmarks"""
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks")
+    parser.add_argument("sizes", nargs="*", type=int,
+                        default=[1000, 100000])
+    parser.add_argument("-b", "--benchmark", action="append",
+                        choices=BENCHMARKS)
+    parser.add_argument("-o", "--output", default="bench_output.json")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.benchmark or BENCHMARKS:
+        module = importlib.import_module(f"benchmarks.bench_{name}")
+        for r in module.run(args.sizes):
+            print_table([r])
+            results.append(r)
+    write_json(results, args.output)
+
+
+if __name__ == '__main__':
+    main()
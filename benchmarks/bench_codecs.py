@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Module bench_codecs
+
+Measures FileStorage.save() and reload() times and file size per codec.
+
+Usage:
+    python3 -m benchmarks.bench_codecs [number_of_objects ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import print_table, result
+from benchmarks.dataset import make_objects
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import codecs
+
+
+def bench_codec(objects, codec):
+    """Returns the save and reload times in s and the file size"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "file")
+        storage = FileStorage(path, codec=codec)
+        for obj in objects.values():
+            storage.new(obj)
+        start = time.perf_counter()
+        storage.save()
+        save_time = time.perf_counter() - start
+        storage = FileStorage(path, codec=codec)
+        start = time.perf_counter()
+        storage.reload()
+        reload_time = time.perf_counter() - start
+        return save_time, reload_time, os.path.getsize(path)
+
+
+def run(sizes):
+    """Yields the results of every installed codec for each size"""
+    for n in sizes:
+        objects = make_objects(n)
+        for name in codecs:
+            try:
+                save_time, reload_time, size = bench_codec(objects, name)
+            except ImportError:
+                continue
+            yield result("codec.save", n, save_time, codec=name)
+            yield result("codec.reload", n, reload_time, codec=name)
+            yield result("codec.size", n, size, "bytes", codec=name)
+
+
+if __name__ == '__main__':
+    print_table(run([int(n) for n in sys.argv[1:]] or [1000, 100000]))
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Module bench_durability
+
+Measures the latency of FileStorage.save() for each durability mode, when
+rewriting the whole file, in journal mode and in the sharded layout.
+
+Usage:
+    python3 -m benchmarks.bench_durability [number_of_objects ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.common import print_table, result
+from benchmarks.dataset import make_objects
+from models.engine.file_storage import FileStorage
+
+
+LAYOUTS = {
+    "snapshot": {},
+    "journal": {"journal": True},
+    "sharded": {"buckets": 16},
+}
+
+
+def bench_save(objects, layout, durability, saves=20):
+    """Returns the mean latency in ms of saving one updated object"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = FileStorage(os.path.join(tmp_dir, "file.json"),
+                              durability=durability, **LAYOUTS[layout])
+        for obj in objects.values():
+            storage.new(obj)
+        storage.save()
+        storage.compact()
+        updated = list(objects.values())[:saves]
+        start = time.perf_counter()
+        for obj in updated:
+            storage.new(obj)
+            storage.save()
+        elapsed = time.perf_counter() - start
+        storage.sync()
+    return elapsed / len(updated) * 1000
+
+
+def run(sizes):
+    """Yields the save latency of every mode for each dataset size"""
+    for n in sizes:
+        objects = make_objects(n)
+        for layout in LAYOUTS:
+            for durability in FileStorage.DURABILITY_MODES:
+                ms = bench_save(objects, layout, durability)
+                yield result("storage.save.latency", n, ms, "ms",
+                             layout=layout, durability=durability)
+
+
+if __name__ == '__main__':
+    print_table(run([int(n) for n in sys.argv[1:]] or [1000, 100000]))
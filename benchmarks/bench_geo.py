@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""Module bench_geo
+
+Measures the queries of the places near a point through the grid index
+of FileStorage against a scan of every place, for places clustered
+around cities as real listings are.
+
+Usage:
+    python3 -m benchmarks.bench_geo [number_of_places ...]
+"""
+
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.common import measure, print_table, result
+from models.engine.file_storage import FileStorage
+from models.engine.geo import haversine
+from models.place import Place
+
+
+def make_places(n, seed=0):
+    """Returns n places spread around 1000 random cities"""
+    rnd = random.Random(seed)
+    cities = [(rnd.uniform(-60, 70), rnd.uniform(-180, 180))
+              for _ in range(1000)]
+    places = []
+    for i in range(n):
+        lat, lon = rnd.choice(cities)
+        places.append(Place(id=str(i), created_at="2024-01-01T00:00:00",
+                            updated_at="2024-01-01T00:00:00",
+                            latitude=max(-90.0, min(90.0,
+                                                    rnd.gauss(lat, 0.2))),
+                            longitude=(rnd.gauss(lon, 0.2) + 180) % 360
+                            - 180))
+    return places
+
+
+def scan_near(storage, lat, lon, radius_km):
+    """Returns the places within radius_km by scanning every place"""
+    found = []
+    for obj in storage.all(Place).values():
+        distance = haversine(lat, lon, obj.latitude, obj.longitude)
+        if distance <= radius_km:
+            found.append((distance, obj.id, obj))
+    found.sort()
+    return [obj for _, _, obj in found]
+
+
+def scan_nearest(storage, lat, lon, k):
+    """Returns the k nearest places by scanning every place"""
+    found = sorted((haversine(lat, lon, obj.latitude, obj.longitude),
+                    obj.id, obj)
+                   for obj in storage.all(Place).values())
+    return [obj for _, _, obj in found[:k]]
+
+
+def run(sizes):
+    """Yields the time of each query, indexed and scanned, for each size"""
+    for n in sizes:
+        places = make_places(n)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = FileStorage(os.path.join(tmp_dir, "file.json"))
+            for obj in places:
+                storage.new(obj)
+            lat, lon = places[0].latitude, places[0].longitude
+            queries = {
+                "near.10km": (storage.near, scan_near, 10),
+                "near.100km": (storage.near, scan_near, 100),
+                "nearest.10": (storage.nearest, scan_nearest, 10),
+            }
+            for name, (indexed, scan, arg) in queries.items():
+                assert ([o.id for o in indexed(Place, lat, lon, arg)]
+                        == [o.id for o in scan(storage, lat, lon, arg)])
+                yield result(f"storage.{name}", n, measure(
+                    lambda: indexed(Place, lat, lon, arg), 3),
+                    method="index")
+                yield result(f"storage.{name}", n, measure(
+                    lambda: scan(storage, lat, lon, arg), 3), method="scan")
+
+
+if __name__ == '__main__':
+    print_table(run([int(n) for n in sys.argv[1:]] or [1000, 100000]))
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""Module bench_memory
+
+Compares the memory used by the regular and the compact models when the
+same records are loaded.
+
+Usage:
+    python3 -m benchmarks.bench_memory [number_of_objects ...]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from benchmarks.common import print_table, result
+from benchmarks.dataset import make_objects
+from models.base_model import classes
+from models.compact import compact_model
+
+
+def bench_layout(records, compact):
+    """Returns the bytes allocated per object built from the records"""
+    gc.collect()
+    tracemalloc.start()
+    objects = []
+    for record in records:
+        cls = classes[record["__class__"]]
+        objects.append((compact_model(cls) if compact else cls)(**record))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(objects)
+
+
+def run(sizes):
+    """Yields the memory per object of both layouts for each size"""
+    for n in sizes:
+        records = [obj.to_dict() for obj in make_objects(n).values()]
+        for compact in (False, True):
+            yield result("model.memory", n, bench_layout(records, compact),
+                         "bytes/object",
+                         layout="compact" if compact else "regular")
+
+
+if __name__ == '__main__':
+    print_table(run([int(n) for n in sys.argv[1:]] or [1000, 100000]))
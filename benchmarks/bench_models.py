@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Module bench_models
+
+Measures the construction of the objects from their records, through
+the keyword arguments of the classes and through from_dict(), and
+to_dict() with its record built afresh or cached, per object, and the
+memory the objects keep after a to_dict() call or a save().
+
+Usage:
+    python3 -m benchmarks.bench_models [number_of_objects ...]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks.common import measure, print_table, result
+from benchmarks.dataset import make_objects
+from models.base_model import classes, to_record
+from models.engine.file_storage import FileStorage
+
+
+def run(sizes):
+    """Yields the results of every benchmark for each dataset size"""
+    for n in sizes:
+        objects = list(make_objects(n).values())
+        records = [(classes[r["__class__"]], r)
+                   for r in (obj.to_dict() for obj in objects)]
+        yield result("model.init", n, measure(
+            lambda: [cls(**r) for cls, r in records], 3) / n)
+        yield result("model.from_dict", n, measure(
+            lambda: [cls.from_dict(r) for cls, r in records], 3) / n)
+        yield result("model.to_dict", n, measure(
+            lambda: [to_record(obj) for obj in objects], 3) / n,
+            cache="cold")
+        yield result("model.to_dict", n, measure(
+            lambda: [obj.to_dict() for obj in objects], 3) / n,
+            cache="warm")
+        records = [r for _, r in records]
+        yield result("model.retained", n, retained(
+            records, lambda objs: [obj.to_dict() for obj in objs]),
+            "bytes/object", after="to_dict")
+        yield result("model.retained", n, retained(records, save),
+                     "bytes/object", after="save")
+
+
+def retained(records, func):
+    """Returns the bytes per object still allocated after func(objects)"""
+    objects = [classes[r["__class__"]].from_dict(r) for r in records]
+    gc.collect()
+    tracemalloc.start()
+    func(objects)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(objects)
+
+
+def save(objects):
+    """Saves objects to a snapshot file in a temporary directory"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = FileStorage(os.path.join(tmp_dir, "file.json"))
+        for obj in objects:
+            storage.new(obj)
+        storage.save()
+        storage.flush()
+
+
+if __name__ == '__main__':
+    print_table(run([int(n) for n in sys.argv[1:]] or [1000, 100000]))
@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+"""Module bench_reload
+
+Measures FileStorage.reload() parsing the file in this process and with
+worker processes, eagerly and in lazy mode, where the time is mostly
+parsing.
+
+Usage:
+    python3 -m benchmarks.bench_reload [number_of_objects ...]
+"""
+
+import os
+import sys
+import tempfile
+from unittest import mock
+
+from benchmarks.common import measure, print_table, result
+from benchmarks.dataset import make_objects
+from models.engine.file_storage import FileStorage
+
+WORKERS = (1, 2, 4, os.cpu_count() or 1)
+
+
+def run(sizes):
+    """Yields the reload times for each number of workers and size"""
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "file.json")
+            storage = FileStorage(path)
+            for obj in make_objects(n).values():
+                storage.new(obj)
+            storage.save()
+            with mock.patch.object(FileStorage, "parallel_reload_bytes", 0):
+                for lazy in (True, False):
+                    for workers in sorted(set(WORKERS)):
+                        storage = FileStorage(path, lazy=lazy,
+                                              reload_workers=workers)
+                        yield result("storage.reload", n,
+                                     measure(storage.reload, 3),
+                                     workers=workers, lazy=lazy)
+
+
+if __name__ == '__main__':
+    print_table(run([int(n) for n in sys.argv[1:]] or [1000, 100000]))
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Module bench_storage
+
+Measures the hot paths of FileStorage and of the console: reload(),
+save(), BaseModel.to_dict(), the lookup of the reviews of a place
+through its index or a scan, the mean price of the places of each city
+through the columns of stats() or a loop over the places, and the all,
+count, show and update commands.
+
+Usage:
+    python3 -m benchmarks.bench_storage [number_of_objects ...]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from unittest import mock
+
+from benchmarks.common import measure, print_table, result
+from benchmarks.dataset import make_objects
+from models.engine.file_storage import FileStorage
+
+
+def run(sizes):
+    """Yields the results of every benchmark for each dataset size"""
+    for n in sizes:
+        objects = make_objects(n)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            storage = FileStorage(os.path.join(tmp_dir, "file.json"))
+            for obj in objects.values():
+                storage.new(obj)
+            yield result("storage.save", n, measure(storage.save, 3))
+            yield result("storage.reload", n, measure(storage.reload, 3))
+            values = list(storage.all().values())
+            yield result("BaseModel.to_dict", n,
+                         measure(lambda: [obj.to_dict() for obj in values],
+                                 3) / len(values))
+            place_id = next(iter(storage.all("Review").values())).place_id
+            yield result("storage.lookup", n, measure(
+                lambda: storage.lookup("Review", "place_id", place_id), 3))
+            yield result("storage.scan", n, measure(
+                lambda: [obj for obj in storage.all("Review").values()
+                         if obj.place_id == place_id], 3))
+            yield from run_stats(storage, n)
+            yield from run_console(storage, n)
+
+
+def run_stats(storage, n):
+    """Yields the times of the mean price of the places of each city"""
+    def stats():
+        return storage.stats("Place", "price_by_night", by="city_id")
+
+    def loop():
+        prices = {}
+        for obj in storage.all("Place").values():
+            prices.setdefault(obj.city_id, []).append(obj.price_by_night)
+        return {k: sum(v) / len(v) for k, v in prices.items()}
+
+    def cold():
+        storage.new(next(iter(storage.all("Place").values())))
+        return stats()
+
+    yield result("storage.stats", n, measure(cold, 3), columns="built")
+    yield result("storage.stats", n, measure(stats, 3), columns="cached")
+    yield result("storage.stats.loop", n, measure(loop, 3))
+
+
+def run_console(storage, n):
+    """Yields the results of the console commands on storage"""
+    import console
+
+    place = next(iter(storage.all("Place").values()))
+    commands = {
+        "all": "all Place",
+        "count": "count Place",
+        "show": f"show Place {place.id}",
+        "update": f"update Place {place.id} name bench",
+    }
+    with mock.patch("models.storage", storage), \
+            mock.patch.object(console, "storage", storage):
+        cmd = console.HBNBCommand()
+        for name, line in commands.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = measure(lambda: cmd.onecmd(line), 3)
+            yield result(f"console.{name}", n, seconds)
+
+
+if __name__ == '__main__':
+    print_table(run([int(n) for n in sys.argv[1:]] or [1000, 100000]))
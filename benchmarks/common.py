@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""Module common
+
+This module contains the helpers shared by the benchmarks: timing,
+result records and their table and JSON output.
+"""
+
+import json
+import platform
+import subprocess
+import timeit
+
+
+def measure(func, repeat=5, number=1):
+    """Returns the best time in seconds of one call of func"""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def result(benchmark, objects, value, unit="s", **params):
+    """Returns the record of one measurement
+
+    Args:
+        benchmark (str): name of what was measured
+        objects (int): size of the dataset
+        value (float): measured value
+        unit (str): unit of value
+        params: settings the measurement was taken with
+    """
+    return {"benchmark": benchmark, "objects": objects, "params": params,
+            "value": value, "unit": unit}
+
+
+def print_table(results):
+    """Prints the results as a table"""
+    for r in results:
+        params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"{r['benchmark']:<24} {r['objects']:>8} {params:<32} "
+              f"{r['value']:>14.6f} {r['unit']}")
+
+
+def write_json(results, path):
+    """Writes the results with the commit and Python they ran on"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"],
+                                capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    with open(path, 'w') as f:
+        json.dump({"commit": commit, "python": platform.python_version(),
+                   "results": results}, f, indent=2)
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+"""Module compare
+
+Compares two result files written by python3 -m benchmarks.
+
+Usage:
+    python3 -m benchmarks.compare <old.json> <new.json>
+"""
+
+import json
+import sys
+
+
+def load(path):
+    """Returns the results of a file by benchmark, size and params"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return data["commit"], {
+        (r["benchmark"], r["objects"],
+         json.dumps(r["params"], sort_keys=True)): r
+        for r in data["results"]}
+
+
+def main(old_path, new_path):
+    """Prints the ratio new / old of every result found in both files"""
+    old_commit, old = load(old_path)
+    new_commit, new = load(new_path)
+    print(f"{old_commit} -> {new_commit}")
+    for key in sorted(old.keys() & new.keys()):
+        benchmark, objects, params = key
+        before, after = old[key]["value"], new[key]["value"]
+        ratio = after / before if before else float("inf")
+        print(f"{benchmark:<24} {objects:>8} {params:<32} "
+              f"{before:>12.6f} {after:>12.6f} {ratio:>7.2f}x")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(f"Usage: {sys.argv[0]} <old.json> <new.json>")
+    main(sys.argv[1], sys.argv[2])
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Module dataset
+
+This module generates synthetic model objects for the benchmarks
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+def make_objects(n, seed=0):
+    """Returns n objects of every model class, keyed like FileStorage.
+
+    The objects are built through the kwargs path of BaseModel so they
+    are not registered with models.storage.
+
+    Args:
+        n (int): number of objects to generate
+        seed (int): seed of the random generator
+    """
+    rnd = random.Random(seed)
+    start = datetime(2024, 1, 1)
+
+    def base():
+        created = start + timedelta(seconds=rnd.randrange(10 ** 7))
+        return {"id": str(uuid.UUID(int=rnd.getrandbits(128))),
+                "created_at": created.isoformat(),
+                "updated_at": created.isoformat()}
+
+    states = [State(**base(), name=f"state {i}")
+              for i in range(max(1, n // 1000))]
+    cities = [City(**base(), name=f"city {i}",
+                   state_id=rnd.choice(states).id)
+              for i in range(max(1, n // 100))]
+    amenities = [Amenity(**base(), name=f"amenity {i}")
+                 for i in range(max(1, min(50, n // 100)))]
+    objects = states + cities + amenities
+    users = []
+    places = []
+    while len(objects) < n:
+        kind = rnd.random()
+        if kind < 0.2 or not users:
+            obj = User(**base(), email=f"user{len(users)}@mail.com",
+                       password="root", first_name="Betty",
+                       last_name="Bar")
+            users.append(obj)
+        elif kind < 0.5 or not places:
+            obj = Place(**base(), city_id=rnd.choice(cities).id,
+                        user_id=rnd.choice(users).id,
+                        name=f"place {len(places)}",
+                        description="a nice place to stay",
+                        number_rooms=rnd.randint(1, 6),
+                        number_bathrooms=rnd.randint(1, 3),
+                        max_guest=rnd.randint(1, 12),
+                        price_by_night=rnd.randint(20, 500),
+                        latitude=rnd.uniform(-90, 90),
+                        longitude=rnd.uniform(-180, 180),
+                        amenity_ids=[a.id for a in
+                                     rnd.sample(amenities,
+                                                min(3, len(amenities)))])
+            places.append(obj)
+        else:
+            obj = Review(**base(), place_id=rnd.choice(places).id,
+                         user_id=rnd.choice(users).id,
+                         text="great stay, would come back")
+        objects.append(obj)
+    return {f"{obj.__class__.__name__}.{obj.id}": obj
+            for obj in objects[:n]}
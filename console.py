@@ -4,15 +4,24 @@
 This module contains the definition for HBNBCommand Class
 """
 
+import argparse
+import ast
 import cmd
-import importlib
+import contextlib
+import itertools
 import json
 import re
+import sys
+import time
 from models import storage
+from models.base_model import classes, to_record
+from models.engine.bulk import FORMATS, format_of, read_records, write_records
 
 class HBNBCommand(cmd.Cmd):
     """HBNB command console class"""
     prompt = "(hbnb) "
+    failed = False
+    """bool: whether the last command failed without printing a ** error"""
 
     def emptyline(self):
         """
@@ -39,6 +48,7 @@ class HBNBCommand(cmd.Cmd):
                 new_obj.save()
                 print(new_obj.id)
             except Exception as e:
+                self.failed = True
                 print(f"Error creating object: {str(e)}")
 
     def do_show(self, line):
@@ -47,7 +57,7 @@ class HBNBCommand(cmd.Cmd):
         if not key:
             return
 
-        saved_obj = storage.all().get(key)
+        saved_obj = storage.get(*key.split(".", 1))
         if not saved_obj:
             print("** no instance found **")
         else:
@@ -59,24 +69,39 @@ class HBNBCommand(cmd.Cmd):
         if not key:
             return
 
-        saved_obj = storage.all().pop(key, None)
+        saved_obj = storage.get(*key.split(".", 1))
         if saved_obj:
+            storage.delete(saved_obj)
             storage.save()
         else:
             print("** no instance found **")
 
     def do_all(self, line):
-        """Prints string representation of all instances based on the class name."""
-        tokens = line.split()
+        """Prints string representation of all instances based on the class name.
+
+        Usage: all [<class name>] [--limit N] [--offset N] [--ndjson]
+        The instances are written one by one as they are formatted, as a
+        list by default or as one JSON object per line with --ndjson.
+        """
+        options = self.get_all_options(line)
+        if options is None:
+            return
+        tokens, limit, offset, ndjson = options
         if not tokens:
             result = storage.all().values()
         else:
-            obj_cls = self.get_class_from_input(line)
+            obj_cls = self.get_class_from_input(tokens[0])
             if not obj_cls:
                 return
-            result = filter(lambda item: isinstance(item, obj_cls), storage.all().values())
+            result = storage.all(obj_cls).values()
 
-        print([str(item) for item in result])
+        stop = None if limit is None else offset + limit
+        items = itertools.islice(result, offset, stop)
+        if ndjson:
+            for item in items:
+                sys.stdout.write(json.dumps(to_record(item)) + "\n")
+        else:
+            self.write_list(str(item) for item in items)
 
     def do_update(self, line):
         """Updates an instance based on the class name and ID by adding or updating attribute."""
@@ -84,7 +109,7 @@ class HBNBCommand(cmd.Cmd):
         if not key:
             return
 
-        saved_obj = storage.all().get(key)
+        saved_obj = storage.get(*key.split(".", 1))
         if not saved_obj:
             print("** no instance found **")
             return
@@ -102,9 +127,89 @@ class HBNBCommand(cmd.Cmd):
         if not obj_cls:
             return
 
-        result = filter(lambda item: isinstance(item, obj_cls), storage.all().values())
-        print(len(result))
+        print(storage.count(obj_cls))
+
+    def do_import(self, line):
+        """Imports the objects of an NDJSON or CSV file and saves them once.
+
+        Usage: import <file> [<class name>] [--format ndjson|csv]
+        The file is read from stdin when it is -. Its format is picked
+        from its extension when --format is not given: .csv files are CSV
+        and need a class name, other files hold one JSON object per line,
+        as written by export or all --ndjson. With a class name, only the
+        objects of that class are imported. Prints the number of objects
+        imported.
+        """
+        options = self.get_bulk_options(line)
+        if options is None:
+            return
+        path, obj_cls, fmt = options
+        try:
+            with self.open_bulk_file(path, 'r') as f:
+                count = storage.import_objects(
+                    read_records(f, fmt, obj_cls), obj_cls)
+        except (OSError, ValueError) as e:
+            print(f"** {e} **")
+            return
+        print(count)
+
+    def do_export(self, line):
+        """Exports the objects to an NDJSON or CSV file.
+
+        Usage: export <file> [<class name>] [--format ndjson|csv]
+        The objects are written to stdout when the file is -. Its format
+        is picked from its extension when --format is not given: .csv
+        files are CSV and need a class name, other files get one JSON
+        object per line.
+        """
+        options = self.get_bulk_options(line)
+        if options is None:
+            return
+        path, obj_cls, fmt = options
+        try:
+            with self.open_bulk_file(path, 'w') as f:
+                write_records(storage.export_objects(obj_cls), f, fmt,
+                              obj_cls)
+        except (OSError, ValueError) as e:
+            print(f"** {e} **")
+
+    def get_bulk_options(self, line):
+        """Parses the arguments of the import and export commands.
+
+        Returns:
+            tuple: the path of the file, the class (None for every class)
+                and the format, or None if an argument is invalid
+        """
+        tokens = line.split()
+        fmt = None
+        if "--format" in tokens:
+            i = tokens.index("--format")
+            if i + 1 == len(tokens) or tokens[i + 1] not in FORMATS:
+                print(f"** --format needs one of {', '.join(FORMATS)} **")
+                return None
+            fmt = tokens[i + 1]
+            del tokens[i:i + 2]
+        if not tokens:
+            print("** file name missing **")
+            return None
+        obj_cls = None
+        if len(tokens) > 1:
+            obj_cls = self.get_class(tokens[1])
+            if not obj_cls:
+                return None
+        fmt = fmt or format_of(tokens[0])
+        if fmt == "csv" and obj_cls is None:
+            print("** class name missing **")
+            return None
+        return tokens[0], obj_cls, fmt
 
+    @staticmethod
+    def open_bulk_file(path, mode):
+        """Opens a file of the import and export commands, - for stdio"""
+        if path == "-":
+            stream = sys.stdin if mode == 'r' else sys.stdout
+            return contextlib.nullcontext(stream)
+        return open(path, mode, newline="")
 
     def get_obj_key_from_input(self, line):
         """Parses and returns object key from input."""
@@ -137,6 +242,37 @@ class HBNBCommand(cmd.Cmd):
 
         return tokens[1]
 
+    def get_all_options(self, line):
+        """Parses the options of the all command.
+
+        Returns:
+            tuple: the remaining tokens, the limit (None for no limit), the
+                offset and whether --ndjson was given, or None if an option
+                is invalid
+        """
+        tokens = line.split()
+        rest, limit, offset, ndjson = [], None, 0, False
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token == "--ndjson":
+                ndjson = True
+            elif token in ("--limit", "--offset"):
+                i += 1
+                if i == len(tokens) or not tokens[i].isdigit():
+                    print(f"** {token} needs a number **")
+                    return None
+                if token == "--limit":
+                    limit = int(tokens[i])
+                else:
+                    offset = int(tokens[i])
+            elif token.startswith("--"):
+                print(f"** unknown option {token} **")
+                return None
+            else:
+                rest.append(token)
+            i += 1
+        return rest, limit, offset, ndjson
 
     def get_attribute_name_value_pair(self, line):
         """Parses and returns a tuple of attribute name and value."""
@@ -157,30 +293,33 @@ class HBNBCommand(cmd.Cmd):
         return attr_name, attr_val
 
     def get_class(self, name):
-        """Returns a class from models module using its name."""
-        try:
-            module_name = f"models.{name.lower()}"
-            module = importlib.import_module(module_name)
-            return getattr(module, name)
-        except (AttributeError, ImportError):
+        """Returns a registered model class using its name."""
+        obj_cls = classes.get(name)
+        if obj_cls is None:
             print("** class doesn't exist **")
-            return None
+        return obj_cls
 
     def default(self, line):
+        """Runs the <class name>.<function>(<arguments>) commands."""
         if '.' not in line:
             return super().default(line)
 
-        cls_name, func_name, obj_id, args = self.parse_input(line)
+        cls_name, func_name, args, kwargs = self.parse_input(line)
 
-        if cls_name is None:
+        if not cls_name:
             print("** class name missing **")
             return
 
         if func_name is None:
-            print("** incorrect function (all, count, show, destroy, update) **")
+            print("** incorrect function (all, count, show, destroy, "
+                  "update, where, near, nearest, stats, search) **")
+            return
+
+        if args is None:
+            print("** invalid arguments **")
             return
 
-        obj_id = obj_id if obj_id is not None else ""
+        obj_id = args[0] if args else ""
 
         if func_name == "count":
             self.do_count(cls_name)
@@ -191,45 +330,299 @@ class HBNBCommand(cmd.Cmd):
         elif func_name == "destroy":
             self.do_destroy(f"{cls_name} {obj_id}")
         elif func_name == "update":
-            if isinstance(args, str):
-                args = " ".join([obj_id, args])
-                self.do_update(f"{cls_name} {args}")
-            elif isinstance(args, dict):
-                for k, v in args.items():
-                    self.do_update(f"{cls_name} {obj_id} {k} {v}")
+            if len(args) == 2 and isinstance(args[1], dict):
+                with storage.batch():
+                    for k, v in args[1].items():
+                        self.do_update(f"{cls_name} {obj_id} {k} {v}")
+            else:
+                self.do_update(" ".join([cls_name] + [str(a) for a in args]))
+        elif func_name == "where":
+            self.where(cls_name, args, kwargs)
+        elif func_name in ("near", "nearest"):
+            self.near(cls_name, func_name, args)
+        elif func_name == "stats":
+            self.stats(cls_name, args, kwargs)
+        elif func_name == "search":
+            self.search(cls_name, args, kwargs)
+
+    def where(self, cls_name, fields, filters):
+        """Prints the instances of a class matching filters.
+
+        Usage: <class name>.where([<attribute>, ...], <filter>=<value>, ...)
+        A filter is an attribute name, optionally followed by __ne, __lt,
+        __lte, __gt, __gte, __in or __contains, e.g.
+        Place.where(city_id="...", price_by_night__lt=100). When attribute
+        names are given, only the id and these attributes are printed.
+        """
+        obj_cls = self.get_class(cls_name)
+        if not obj_cls:
+            return
+        try:
+            result = storage.where(obj_cls, *map(str, fields), **filters)
+        except ValueError as e:
+            print(f"** {e} **")
+            return
+        if fields:
+            self.write_list(result)
+        else:
+            self.write_list(str(item) for item in result)
+
+    def near(self, cls_name, func_name, args):
+        """Prints the instances of a class near a point, nearest first.
+
+        Usage: <class name>.near(<latitude>, <longitude>, <radius in km>)
+        or <class name>.nearest(<latitude>, <longitude>[, <count>]), e.g.
+        Place.near(48.85, 2.35, 10) or Place.nearest(48.85, 2.35, 5) for
+        the 5 nearest places. nearest prints the nearest one by default.
+        """
+        obj_cls = self.get_class(cls_name)
+        if not obj_cls:
+            return
+        counts = (3,) if func_name == "near" else (2, 3)
+        if (len(args) not in counts
+                or not all(isinstance(a, (int, float))
+                           and not isinstance(a, bool) for a in args)
+                or (func_name == "nearest" and len(args) == 3
+                    and (not isinstance(args[2], int) or args[2] < 1))):
+            print("** invalid arguments **")
+            return
+        try:
+            result = getattr(storage, func_name)(obj_cls, *args)
+        except ValueError as e:
+            print(f"** {e} **")
+            return
+        self.write_list(str(item) for item in result)
+
+    def stats(self, cls_name, args, kwargs):
+        """Prints statistics of a numeric attribute of a class.
+
+        Usage: <class name>.stats(<attribute>[, by=<attribute>]
+        [, percentiles=[<p>, ...]]), e.g. Place.stats(price_by_night) or
+        Place.stats(price_by_night, by=city_id). Attribute names may be
+        given without quotes. Prints the count, sum, min, max, avg and
+        percentiles (50, 90 and 99 by default) of the values that are
+        numbers, on one line per value of the by attribute if given.
+        """
+        obj_cls = self.get_class(cls_name)
+        if not obj_cls:
+            return
+        by = kwargs.pop("by", None)
+        percentiles = kwargs.pop("percentiles", (50, 90, 99))
+        if (len(args) != 1 or not isinstance(args[0], str) or kwargs
+                or not isinstance(by, (str, type(None)))
+                or not isinstance(percentiles, (list, tuple))
+                or not all(isinstance(p, (int, float))
+                           and not isinstance(p, bool) for p in percentiles)):
+            print("** invalid arguments **")
+            return
+        try:
+            result = storage.stats(obj_cls, args[0], by, percentiles)
+        except ValueError as e:
+            print(f"** {e} **")
+            return
+        if by is None:
+            print(result)
+            return
+        for group in sorted(result, key=str):
+            sys.stdout.write(f"{group}: {result[group]}\n")
+
+    def search(self, cls_name, args, kwargs):
+        """Prints the instances of a class best matching words, best first.
+
+        Usage: <class name>.search(<words>[, limit=<count>]), e.g.
+        Review.search("clean quiet", limit=5). Searches the text fields of
+        the class, such as Review.text or Place.name and description, and
+        prints 10 instances by default.
+        """
+        obj_cls = self.get_class(cls_name)
+        if not obj_cls:
+            return
+        limit = kwargs.pop("limit", 10)
+        if (len(args) != 1 or not isinstance(args[0], str) or kwargs
+                or not isinstance(limit, int) or isinstance(limit, bool)
+                or limit < 1):
+            print("** invalid arguments **")
+            return
+        try:
+            result = storage.search(obj_cls, args[0], limit)
+        except ValueError as e:
+            print(f"** {e} **")
+            return
+        self.write_list(str(item) for item in result)
+
+    def do_search(self, line):
+        """Prints the instances of a class best matching words, best first.
 
+        Usage: search <class name> <words>, see <class name>.search()
+        """
+        cls_name, _, words = line.strip().partition(" ")
+        if not cls_name:
+            print("** class name missing **")
+            return
+        self.search(cls_name, [words], {})
+
+    def write_list(self, items):
+        """Writes items to stdout as a printed list, one at a time."""
+        out = sys.stdout
+        out.write("[")
+        for i, item in enumerate(items):
+            if i:
+                out.write(", ")
+            out.write(repr(item))
+        out.write("]\n")
 
     def parse_input(self, input_str):
-        args = input_str.split('.', 1)  # Split only once to handle arguments containing dots
-        if len(args) != 2:
-            return None, None, None, None
+        """Parses a <class name>.<function>(<arguments>) command.
 
-        cls_name, command_str = args
-        valid_commands = ["all", "count", "show", "destroy", "update"]
+        The arguments are Python literals, given by position or keyword;
+        the stats command also takes attribute names without quotes.
 
-        if '(' not in command_str or ')' not in command_str:
+        Returns:
+            tuple: the class name, the function name (None if it is not a
+                known function), the list of positional arguments and the
+                dict of keyword arguments (both None if they are invalid)
+        """
+        cls_name, _, command_str = input_str.partition('.')
+        match = re.fullmatch(r'(\w+)\((.*)\)', command_str.strip())
+        valid_commands = ["all", "count", "show", "destroy", "update",
+                          "where", "near", "nearest", "stats", "search"]
+        if not match or match.group(1) not in valid_commands:
             return cls_name, None, None, None
 
-        func_name, arg_str = command_str.split('(', 1)
-        if func_name not in valid_commands:
-            return cls_name, None, None, None
+        func_name, arg_str = match.groups()
 
-        id_match = re.match(r'^"([\w-]+)"', arg_str)
-        if not id_match:
+        def literal(node):
+            if func_name == "stats" and isinstance(node, ast.Name):
+                return node.id
+            return ast.literal_eval(node)
+
+        try:
+            call = ast.parse(f"f({arg_str})", mode="eval").body
+            args = [literal(arg) for arg in call.args]
+            kwargs = {kw.arg: literal(kw.value)
+                      for kw in call.keywords if kw.arg is not None}
+        except (SyntaxError, ValueError):
             return cls_name, func_name, None, None
+        if len(kwargs) != len(call.keywords):
+            return cls_name, func_name, None, None
+        return cls_name, func_name, args, kwargs
+
+    def run_batch(self, lines, flush_every=0, report=None):
+        """Executes commands without a prompt, saving once at the end.
 
-        obj_id = id_match.group(1)
-        arg_str = arg_str.replace(id_match.group(0), '').strip(')')
+        The commands run inside storage.batch(), so the objects they
+        create, update or destroy are written once when the batch ends, or
+        after every flush_every commands. A command fails if it raises or
+        prints an error message; the others still run.
 
-        if not arg_str:
-            return cls_name, func_name, obj_id, ''
+        Args:
+            lines (iterable): the commands, one per line
+            flush_every (int): number of commands between two saves, 0 to
+                only save at the end
+            report (file): where to write the time and status of each
+                command followed by a summary, if given
 
+        Returns:
+            int: the number of commands that failed
+        """
+        lines = (line.rstrip("\n") for line in lines)
+        count = failed = 0
+        start = time.perf_counter()
+        stop = False
+        while not stop:
+            chunk = list(itertools.islice(lines, flush_every or None))
+            if not chunk:
+                break
+            with storage.batch():
+                for line in chunk:
+                    count += 1
+                    seconds, error, stop = self.run_batch_command(line)
+                    failed += error
+                    if report:
+                        status = "error" if error else "ok"
+                        report.write(f"{count}\t{seconds:.6f}\t{status}\t"
+                                     f"{line}\n")
+                    if stop:
+                        break
+        if report:
+            elapsed = time.perf_counter() - start
+            report.write(f"{count} commands, {failed} failed, "
+                         f"{elapsed:.3f}s, "
+                         f"{count / elapsed if elapsed else 0:.0f} "
+                         "commands/s\n")
+        return failed
+
+    def run_batch_command(self, line):
+        """Executes one command of a batch.
+
+        Its output is written as it is printed, and a command printing a
+        ** error message first is a failure.
+
+        Returns:
+            tuple: the time it took, whether it failed, and whether it
+                asked to exit
+        """
+        output = _OutputHead(sys.stdout)
+        stop, error = False, False
+        self.failed = False
+        start = time.perf_counter()
         try:
-            arg_dict = json.loads(arg_str)
-            return cls_name, func_name, obj_id, arg_dict
-        except json.JSONDecodeError:
-            return cls_name, func_name, obj_id, arg_str
+            with contextlib.redirect_stdout(output):
+                stop = self.onecmd(line)
+        except Exception as e:
+            error = True
+            print(f"** {type(e).__name__}: {e} **", file=sys.stderr)
+        seconds = time.perf_counter() - start
+        error = error or self.failed or output.head == "**"
+        return seconds, error, stop
+
+
+class _OutputHead:
+    """Stream writing through to another one as it is written to
+
+    Attributes:
+        head (str): first two characters written, to tell the ** error
+            messages of the commands of a batch
+    """
+
+    def __init__(self, stream):
+        """Initialize the stream writing to stream"""
+        self.stream = stream
+        self.head = ""
+
+    def write(self, text):
+        """Writes text to the stream, keeping its start in head"""
+        if len(self.head) < 2:
+            self.head += text[:2 - len(self.head)]
+        return self.stream.write(text)
+
+    def __getattr__(self, name):
+        """Returns the other attributes of the stream, such as flush"""
+        return getattr(self.stream, name)
 
 
 if __name__ == '__main__':
-    HBNBCommand().cmdloop()
+    parser = argparse.ArgumentParser(
+        description="HBNB console. Commands are read from FILE or from "
+                    "stdin when it is not a terminal and run as a batch "
+                    "that saves once at the end.")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the commands of FILE, - for stdin")
+    parser.add_argument("--flush-every", metavar="N", type=int, default=0,
+                        help="save after every N commands of a batch")
+    parser.add_argument("--report", action="store_true",
+                        help="print the time of each command of a batch "
+                             "and a summary to stderr")
+    args = parser.parse_args()
+
+    failures = 0
+    if args.batch is None and sys.stdin.isatty():
+        HBNBCommand().cmdloop()
+    elif args.batch in (None, "-"):
+        failures = HBNBCommand().run_batch(
+            sys.stdin, args.flush_every, sys.stderr if args.report else None)
+    else:
+        with open(args.batch, 'r') as f:
+            failures = HBNBCommand().run_batch(
+                f, args.flush_every, sys.stderr if args.report else None)
+    sys.exit(1 if failures else 0)
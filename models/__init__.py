@@ -1,7 +1,39 @@
 #!/usr/bin/python3
-"""Creates a unique FileStorage instance"""
+"""Creates a unique storage instance
+
+The SQLite DBStorage engine is used when HBNB_TYPE_STORAGE is db,
+FileStorage otherwise.
+"""
+
+import os
 
 from models.engine.file_storage import FileStorage
+from models import amenity, city, place, review, state, user  # noqa: F401
+
+if os.getenv("HBNB_COMPACT_MODELS") == "1":
+    from models.compact import use_compact_models
+    use_compact_models()
+
+if os.getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(os.getenv("HBNB_DB_PATH"))
+else:
+    storage = FileStorage(
+        file_path=os.getenv("HBNB_FILE_PATH"),
+        journal=os.getenv("HBNB_FILE_JOURNAL") == "1",
+        lazy=os.getenv("HBNB_FILE_LAZY") == "1",
+        durability=os.getenv("HBNB_FILE_DURABILITY", "none"),
+        group_commit_ms=int(os.getenv("HBNB_FILE_GROUP_COMMIT_MS", "10")),
+        codec=os.getenv("HBNB_FILE_CODEC"),
+        threadsafe=os.getenv("HBNB_FILE_THREADSAFE") == "1",
+        shared=os.getenv("HBNB_FILE_SHARED") == "1",
+        reload_workers=int(os.getenv("HBNB_FILE_RELOAD_WORKERS", "0")),
+        buckets=int(os.getenv("HBNB_FILE_BUCKETS", "0")))
 
-storage = FileStorage()
-storage.reload()
\ No newline at end of file
+# No worker process is started while the package is being imported: a
+# forked worker would wait for its import lock, and a spawned one would
+# import the package, and reload the file, again.
+if isinstance(storage, FileStorage):
+    storage.reload(parallel=False)
+else:
+    storage.reload()
@@ -4,9 +4,10 @@
 This module contains the definition for Amenity Class
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, register_model
 
 
+@register_model
 class Amenity(BaseModel):
     """A class that represents a amenity
 
@@ -9,40 +9,184 @@ from datetime import datetime
 
 import models
 
+classes = {}
+"""dict: registry of the model classes by name, see register_model"""
 
+_MISSING = object()
+
+
+def register_model(cls):
+    """Registers a model class so it can be resolved by its name.
+
+    The storage engines and the console only know the classes present in
+    classes, so every new BaseModel subclass has to be decorated with it.
+    """
+    classes[cls.__name__] = cls
+    return cls
+
+
+def declared_fields(cls):
+    """Returns the attributes a model class declares, with their defaults"""
+    defaults = getattr(cls, "_defaults", None)
+    if defaults is not None:
+        return dict(defaults)
+    fields = {}
+    for klass in reversed(cls.__mro__):
+        for k, v in vars(klass).items():
+            if not (k.startswith("_") or callable(v)
+                    or isinstance(v, classmethod)):
+                fields[k] = v
+    return fields
+
+
+def indexed_fields(cls):
+    """Returns the attributes of a model class the storage engines index.
+
+    These are the names listed in the _indexes attribute of the class, by
+    default the foreign keys it declares: its fields ending with _id.
+    """
+    indexes = getattr(cls, "_indexes", None)
+    if indexes is not None:
+        return tuple(indexes)
+    return tuple(k for k in declared_fields(cls) if k.endswith("_id"))
+
+
+def geo_fields(cls):
+    """Returns the latitude and longitude attributes of a model class.
+
+    These are the two names in the _geo_fields attribute of the class, by
+    default latitude and longitude if it declares both, or None if the
+    objects of the class have no location the storage engines index.
+    """
+    fields = getattr(cls, "_geo_fields", None)
+    if fields is not None:
+        return tuple(fields)
+    declared = declared_fields(cls)
+    if "latitude" in declared and "longitude" in declared:
+        return ("latitude", "longitude")
+    return None
+
+
+def search_fields(cls):
+    """Returns the text attributes of a model class the engines search.
+
+    These are the names listed in the _search_fields attribute of the
+    class; classes without it are not searched.
+    """
+    return tuple(getattr(cls, "_search_fields", ()))
+
+
+def to_record(obj):
+    """Returns the to_dict() record of a model instance, built afresh"""
+    record = {k: (v.isoformat() if isinstance(v, datetime) else v)
+              for k, v in obj.__dict__.items()}
+    record["__class__"] = obj.__class__.__name__
+    return record
+
+
+@register_model
 class BaseModel:
-    """BaseModel Class"""
+    """BaseModel Class
+
+    Attributes:
+        __record (dict): record of the instance returned by to_dict(),
+            kept until an attribute is set or deleted; unset until the
+            first call
+    """
+
+    __slots__ = ("__dict__", "__weakref__", "__record")
 
     def __init__(self, *args, **kwargs):
-        """Initialize BaseModel instance."""
-        self.id = str(uuid.uuid4())
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        """Initialize BaseModel instance.
 
+        Attributes are set through __dict__ so that initializing an
+        instance does not flag it as changed, see __setattr__.
+        """
         if kwargs:
-            for k, v in kwargs.items():
-                if k == "__class__":
-                    continue
-                elif k in ["created_at", "updated_at"]:
-                    setattr(self, k, datetime.fromisoformat(v))
-                else:
-                    setattr(self, k, v)
-        else:
-            models.storage.new(self)
+            self.__load(kwargs)
+            return
+        attrs = self.__dict__
+        attrs["id"] = str(uuid.uuid4())
+        attrs["created_at"] = datetime.now()
+        attrs["updated_at"] = datetime.now()
+        models.storage.new(self)
+
+    @classmethod
+    def from_dict(cls, record):
+        """Returns the instance of a record, as returned by to_dict().
+
+        Same as cls(**record), without the keyword arguments, and the
+        instance is not added to storage even if record is empty. Used
+        by the storage engines to build the objects they read.
+        """
+        obj = cls.__new__(cls)
+        obj.__load(record)
+        return obj
+
+    def __load(self, record):
+        """Sets the attributes of a record, parsing the dates.
+
+        The id and dates missing from record are generated; when both
+        dates are the same string they share a single datetime.
+        """
+        attrs = self.__dict__
+        attrs["id"] = attrs["created_at"] = attrs["updated_at"] = _MISSING
+        attrs.update(record)
+        attrs.pop("__class__", None)
+        if attrs["id"] is _MISSING:
+            attrs["id"] = str(uuid.uuid4())
+        created, updated = attrs["created_at"], attrs["updated_at"]
+        if isinstance(created, str):
+            attrs["created_at"] = datetime.fromisoformat(created)
+        elif created is _MISSING:
+            attrs["created_at"] = datetime.now()
+        if isinstance(updated, str):
+            attrs["updated_at"] = (attrs["created_at"] if updated == created
+                                   else datetime.fromisoformat(updated))
+        elif updated is _MISSING:
+            attrs["updated_at"] = datetime.now()
+
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed in storage."""
+        super().__setattr__(name, value)
+        object.__setattr__(self, "_BaseModel__record", None)
+        models.storage.mark_dirty(self)
+
+    def __delattr__(self, name):
+        """Delete an attribute and flag the instance as changed."""
+        super().__delattr__(name)
+        object.__setattr__(self, "_BaseModel__record", None)
+        models.storage.mark_dirty(self)
 
     def save(self):
-        """Update updated_at with the current datetime."""
-        self.updated_at = datetime.now()
+        """Update updated_at with the current datetime and save.
+
+        updated_at is kept if the instance is known to storage and no
+        attribute was set since it was last saved. It is written anyway,
+        as a list or dict changed in place does not flag it as changed.
+        """
+        if models.storage.is_dirty(self):
+            self.updated_at = datetime.now()
+        models.storage.new(self)
         models.storage.save()
 
     def to_dict(self):
-        """Return dictionary representation of instance."""
-        instance_dict = {
-            k: (v.isoformat() if isinstance(v, datetime) else v)
-            for k, v in self.__dict__.items()
-        }
-        instance_dict["__class__"] = self.__class__.__name__
-        return instance_dict
+        """Return dictionary representation of instance.
+
+        The record is built once and copied by the next calls, until an
+        attribute is set. Attributes changed in place, such as a list
+        appended to, are shared with the record, as with any copy. The
+        cached record costs about as much memory as the instance, so
+        the storage engines build theirs with to_record() instead.
+        """
+        try:
+            record = self.__record
+        except AttributeError:
+            record = None
+        if record is None:
+            record = to_record(self)
+            object.__setattr__(self, "_BaseModel__record", record)
+        return record.copy()
 
     def __str__(self):
         """Return string representation of the instance."""
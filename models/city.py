@@ -4,9 +4,10 @@
 This module contains the definition for City Class
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, register_model
 
 
+@register_model
 class City(BaseModel):
     """A class that represents a city
 
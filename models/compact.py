@@ -0,0 +1,225 @@
+#!/usr/bin/python3
+"""Module compact
+
+This module contains the compact variants of the model classes, which
+keep their attributes in __slots__ instead of a per-instance __dict__.
+They are opted in with use_compact_models(), before storage.reload().
+"""
+
+import sys
+import uuid
+from datetime import datetime
+
+import models
+from models.base_model import (BaseModel, classes, declared_fields,
+                               geo_fields, indexed_fields, search_fields,
+                               to_record)
+
+compact_classes = {}
+"""dict: compact variant of each model class, by name"""
+
+_orders = {}
+"""dict: orders of the attributes of compact instances, shared by them"""
+
+
+class CompactModel:
+    """Base of the compact model classes
+
+    Instances store id, the dates and the declared fields of their class
+    in slots, and the attributes their class does not declare in _extra.
+    A declared field that was never set reads as its class default, and
+    mutable defaults such as Place.amenity_ids are copied on first read
+    instead of being shared; the copy is left out of __dict__ until the
+    field is set, as the class default of a regular model. __dict__ is
+    rebuilt on access from the set attributes, in the order they were
+    set, so to_dict(), __str__ and the codecs behave as for the regular
+    models. Their records are not cached by to_dict(), which would cost
+    the memory the slots save.
+
+    Attributes:
+        _defaults (dict): declared fields of the class with their defaults
+        _fields (tuple): every slot holding an attribute, in order
+        _order (tuple): names of the attributes set after id and the
+            dates, in the order they were set, shared through _orders;
+            None while it is the order of _fields followed by _extra
+    """
+
+    __slots__ = ("id", "created_at", "updated_at", "_extra", "_order")
+    _defaults = {}
+    _fields = ("id", "created_at", "updated_at")
+
+    save = BaseModel.save
+    __str__ = BaseModel.__str__
+
+    def __init__(self, *args, **kwargs):
+        """Initialize a compact instance like BaseModel.__init__.
+
+        Foreign key values (*_id fields) are interned, and updated_at
+        shares the datetime of created_at when both are equal.
+        """
+        if kwargs:
+            self.__load(kwargs)
+            return
+        setter = object.__setattr__
+        setter(self, "_extra", None)
+        setter(self, "_order", None)
+        now = datetime.now()
+        setter(self, "id", str(uuid.uuid4()))
+        setter(self, "created_at", now)
+        setter(self, "updated_at", now)
+        models.storage.new(self)
+
+    @classmethod
+    def from_dict(cls, record):
+        """Returns the instance of a record, see BaseModel.from_dict()"""
+        obj = cls.__new__(cls)
+        obj.__load(record)
+        return obj
+
+    def __load(self, record):
+        """Sets the attributes of a record, see __init__()"""
+        setter = object.__setattr__
+        setter(self, "_extra", None)
+        setter(self, "_order", None)
+        slots = self._fields
+        dates = {}
+        for k, v in record.items():
+            if k == "__class__":
+                continue
+            if k in ("created_at", "updated_at") and isinstance(v, str):
+                if v not in dates:
+                    dates[v] = datetime.fromisoformat(v)
+                v = dates[v]
+            elif k.endswith("_id") and type(v) is str:
+                v = sys.intern(v)
+            if k not in CompactModel._fields:
+                self.__add_name(k)
+            if k in slots:
+                setter(self, k, v)
+            else:
+                self.__extra()[k] = v
+        if "id" not in record:
+            setter(self, "id", str(uuid.uuid4()))
+        for k in ("created_at", "updated_at"):
+            if k not in record:
+                setter(self, k, datetime.now())
+
+    def to_dict(self):
+        """Return dictionary representation of instance."""
+        return to_record(self)
+
+    @property
+    def __dict__(self):
+        """dict: copy of the attributes set on the instance"""
+        attrs = {}
+        extra = self._extra or {}
+        for k in CompactModel._fields + self.__names():
+            if k in extra:
+                attrs[k] = extra[k]
+                continue
+            try:
+                attrs[k] = object.__getattribute__(self, k)
+            except AttributeError:
+                pass
+        return attrs
+
+    def __getattr__(self, name):
+        """Returns undeclared attributes and defaults of unset fields"""
+        if name == "_extra":
+            raise AttributeError(name)
+        if self._extra and name in self._extra:
+            return self._extra[name]
+        if name in self._defaults:
+            value = self._defaults[name]
+            if isinstance(value, (list, dict)):
+                if self._order is None:
+                    self.__set_order(self.__names())
+                value = value.copy()
+                object.__setattr__(self, name, value)
+            return value
+        raise AttributeError(f"'{self.__class__.__name__}' object has no "
+                             f"attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed in storage."""
+        if name not in CompactModel._fields:
+            self.__add_name(name)
+        if name in self._fields:
+            object.__setattr__(self, name, value)
+        else:
+            self.__extra()[name] = value
+        models.storage.mark_dirty(self)
+
+    def __is_set(self, name):
+        """Returns whether the slot name holds a value"""
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return False
+        return True
+
+    def __names(self):
+        """Returns the names of the attributes set after id and the dates"""
+        if self._order is not None:
+            return self._order
+        return (tuple(k for k in self._fields[3:] if self.__is_set(k))
+                + tuple(self._extra or ()))
+
+    def __set_order(self, order):
+        """Sets _order to the copy of order shared by the instances"""
+        object.__setattr__(self, "_order", _orders.setdefault(order, order))
+
+    def __add_name(self, name):
+        """Records that name is set, before it is set, unless it was.
+
+        _order stays None while the fields are set in the order of their
+        slots, before any undeclared attribute.
+        """
+        order = self._order
+        if order is None:
+            if name not in self._fields:
+                return
+            if self.__is_set(name):
+                return
+            after = self._fields[self._fields.index(name) + 1:]
+            if not self._extra and not any(map(self.__is_set, after)):
+                return
+            order = self.__names()
+        elif name in order:
+            return
+        self.__set_order(order + (name,))
+
+    def __extra(self):
+        """Returns the dict of undeclared attributes, creating it"""
+        if self._extra is None:
+            object.__setattr__(self, "_extra", {})
+        return self._extra
+
+
+def compact_model(cls):
+    """Returns the compact variant of a model class, creating it once"""
+    name = cls.__name__
+    if name not in compact_classes:
+        defaults = declared_fields(cls)
+        compact_classes[name] = type(name, (CompactModel,), {
+            "__slots__": tuple(defaults),
+            "__doc__": cls.__doc__,
+            "__module__": cls.__module__,
+            "_defaults": defaults,
+            "_fields": CompactModel._fields + tuple(defaults),
+            "_indexes": indexed_fields(cls),
+            "_geo_fields": geo_fields(cls),
+            "_search_fields": search_fields(cls),
+        })
+    return compact_classes[name]
+
+
+def use_compact_models():
+    """Replaces every registered model class with its compact variant.
+
+    The storage engines and the console resolve classes through the
+    registry, so the objects they build from then on are compact.
+    """
+    for name, cls in list(classes.items()):
+        if not issubclass(cls, CompactModel):
+            classes[name] = compact_model(cls)
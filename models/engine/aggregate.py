@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""Module aggregate
+
+This module contains the columns and the statistics of the stats()
+queries of the storage engines, such as the mean price_by_night of the
+places of each city.
+
+A column holds the values of a field for every object of a class, as
+floats with NaN for the values that are not numbers. It is a numpy array
+when numpy is installed, so the statistics are computed by numpy, and an
+array.array of doubles otherwise.
+"""
+
+import math
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STATS = ("count", "sum", "min", "max", "avg")
+"""tuple: statistics computed for every column, before the percentiles"""
+
+
+def to_number(value):
+    """Returns value as a float, NaN if it is not a number.
+
+    Strings holding numbers, as set by the update command, are numbers.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def numbers(values):
+    """Returns the column of an iterable of values"""
+    values = map(to_number, values)
+    if numpy is not None:
+        return numpy.fromiter(values, dtype=float)
+    return array('d', values)
+
+
+def group_codes(values):
+    """Returns the groups of an iterable of values and the group of each.
+
+    Values that cannot be hashed, such as lists, are grouped by their
+    string.
+
+    Returns:
+        tuple: the list of the distinct values, and the column of the
+            position of each value in that list
+    """
+    groups, codes = {}, array('l')
+    for value in values:
+        try:
+            code = groups.setdefault(value, len(groups))
+        except TypeError:
+            code = groups.setdefault(str(value), len(groups))
+        codes.append(code)
+    if numpy is not None:
+        codes = numpy.frombuffer(codes, dtype=numpy.dtype(codes.typecode))
+    return list(groups), codes
+
+
+def stats(column, percentiles=()):
+    """Returns the statistics of the numbers of a column.
+
+    Args:
+        column: column of the values, see numbers()
+        percentiles (iterable): percentiles to compute, between 0 and 100,
+            each returned as p<percentile>, e.g. p90; they are
+            interpolated between the closest values
+
+    Returns:
+        dict: the count, sum, min, max, avg and percentiles of the numbers,
+            all None but the count when there are none
+
+    Raises:
+        ValueError: if a percentile is not between 0 and 100
+    """
+    percentiles = list(percentiles)
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise ValueError("percentiles are between 0 and 100")
+    names = list(STATS) + [f"p{p:g}" for p in percentiles]
+    if numpy is not None:
+        column = column[~numpy.isnan(column)]
+        if not column.size:
+            return dict(dict.fromkeys(names), count=0)
+        results = [column.size, column.sum(), column.min(), column.max(),
+                   column.mean()]
+        if percentiles:
+            results.extend(numpy.percentile(column, percentiles))
+        return dict(zip(names, [int(results[0])]
+                        + [float(v) for v in results[1:]]))
+    column = sorted(v for v in column if not math.isnan(v))
+    if not column:
+        return dict(dict.fromkeys(names), count=0)
+    total = math.fsum(column)
+    results = [len(column), total, column[0], column[-1],
+               total / len(column)]
+    results.extend(_percentile(column, p) for p in percentiles)
+    return dict(zip(names, results))
+
+
+def grouped_stats(column, groups, codes, percentiles=()):
+    """Returns the statistics of the numbers of each group of a column.
+
+    Args:
+        column: column of the values, see numbers()
+        groups (list): the groups, see group_codes()
+        codes: column of the group of each value, see group_codes()
+        percentiles (iterable): percentiles to compute, see stats()
+
+    Returns:
+        dict: the statistics of each group, see stats()
+    """
+    percentiles = list(percentiles)
+    if numpy is not None:
+        if not len(codes):
+            return {}
+        order = numpy.argsort(codes, kind="stable")
+        codes = codes[order]
+        starts = numpy.flatnonzero(numpy.diff(codes)) + 1
+        parts = numpy.split(column[order], starts)
+        return {groups[code]: stats(part, percentiles) for code, part in
+                zip(codes[numpy.concatenate(([0], starts))], parts)}
+    parts = [array('d') for _ in groups]
+    for code, value in zip(codes, column):
+        parts[code].append(value)
+    return {group: stats(part, percentiles)
+            for group, part in zip(groups, parts)}
+
+
+def _percentile(values, p):
+    """Returns the percentile p of sorted values, interpolated linearly
+
+    This is the default method of numpy.percentile().
+    """
+    rank = (len(values) - 1) * p / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
@@ -0,0 +1,125 @@
+#!/usr/bin/python3
+"""Module async_storage
+
+This module contains an asyncio facade over the storage engines, which
+runs their blocking saves and reloads in an executor.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncStorage:
+    """AsyncStorage Class
+
+    Wraps a storage engine for use from an event loop: save() and reload()
+    are awaited as asave() and areload(), running the encoding and the
+    file I/O in an executor, and the objects can be iterated with
+    async for. The other attributes are those of the engine, e.g.
+    storage.get() or storage.new().
+
+    asave() calls made while a save is running are coalesced into a
+    single save run after it, so a burst of requests costs at most two
+    writes. The engine calls run one at a time on a thread of their own,
+    which the single SQLite connection of DBStorage requires. As the
+    objects are encoded outside the event loop thread, the engine should
+    be a thread-safe FileStorage (HBNB_FILE_THREADSAFE) if the loop keeps
+    changing objects during saves.
+
+    Example:
+        storage = AsyncStorage(models.storage)
+        await storage.areload()
+        async for place in storage.aall(Place):
+            ...
+        await storage.asave()
+
+    Attributes:
+        __storage: the storage engine
+        __executor (concurrent.futures.Executor): executor running the
+            engine calls
+        __next_save (asyncio.Future): save the asave() calls made since
+            the running one started are waiting for
+        __saving (asyncio.Task): task running the saves
+    """
+
+    def __init__(self, storage, executor=None, chunk_size=1000):
+        """Initialize the facade.
+
+        Args:
+            storage: FileStorage or DBStorage instance to wrap
+            executor (concurrent.futures.Executor): executor running the
+                blocking calls, a single thread by default
+            chunk_size (int): number of objects aall() yields between two
+                returns to the event loop
+        """
+        self.__storage = storage
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="AsyncStorage")
+        self.__executor = executor
+        self.__chunk_size = chunk_size
+        self.__next_save = None
+        self.__saving = None
+
+    def __getattr__(self, name):
+        """Returns the attributes of the storage engine"""
+        if name.startswith("_AsyncStorage__"):
+            raise AttributeError(name)
+        return getattr(self.__storage, name)
+
+    async def asave(self):
+        """Saves the objects, coalescing with the other pending calls.
+
+        Returns once a save that started after the call has written the
+        objects, re-raising its error if it failed.
+        """
+        if self.__next_save is None:
+            loop = asyncio.get_running_loop()
+            self.__next_save = loop.create_future()
+            if self.__saving is None or self.__saving.done():
+                self.__saving = loop.create_task(self.__save_loop())
+        await asyncio.shield(self.__next_save)
+
+    async def areload(self):
+        """Reloads the objects from the file in the executor."""
+        await self.__run(self.__storage.reload)
+
+    async def aall(self, cls=None):
+        """Yields the objects, optionally of one class.
+
+        The objects are collected in the executor, which instantiates them
+        in lazy mode, and the loop gets control back after each chunk.
+        """
+        objects = await self.__run(
+            lambda: list(self.__storage.all(cls).values()))
+        for i, obj in enumerate(objects, 1):
+            yield obj
+            if not i % self.__chunk_size:
+                await asyncio.sleep(0)
+
+    def __aiter__(self):
+        """Returns an asynchronous iterator over every object"""
+        return self.aall()
+
+    async def __save_loop(self):
+        """Runs a save for each batch of asave() calls."""
+        while self.__next_save is not None:
+            future, self.__next_save = self.__next_save, None
+            try:
+                await self.__run(self.__save)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+    def __save(self):
+        """Saves the objects and waits for the engine to write them."""
+        self.__storage.save()
+        flush = getattr(self.__storage, "flush", None)
+        if flush is not None:
+            flush()
+
+    def __run(self, func):
+        """Returns a future of func called in the executor"""
+        return asyncio.get_running_loop().run_in_executor(self.__executor,
+                                                          func)
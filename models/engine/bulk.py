@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+"""Module bulk
+
+This module contains the readers and writers of the NDJSON and CSV
+streams of the bulk import and export of the storage engines.
+
+An NDJSON stream holds one to_dict() record per line, of any class. A CSV
+stream holds the objects of a single class: its columns are id,
+created_at, updated_at, the fields the class declares and _extra, which
+holds the other attributes of each object JSON encoded, as in the
+DBStorage tables. Lists and dicts are JSON encoded in their cells.
+"""
+
+import csv
+import json
+import os
+
+from models.base_model import classes, declared_fields
+
+FORMATS = ("ndjson", "csv")
+"""tuple: names of the stream formats"""
+
+_BASE_COLUMNS = ("id", "created_at", "updated_at")
+
+
+def format_of(path):
+    """Returns the format of a file picked from its extension.
+
+    Files ending with .csv are CSV, every other file is NDJSON.
+    """
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "ndjson"
+
+
+def read_records(stream, fmt="ndjson", cls=None):
+    """Yields the records of a stream, one at a time.
+
+    Args:
+        stream (file): text stream to read
+        fmt (str): format of the stream, one of FORMATS
+        cls (type): class of the objects, required for CSV streams
+
+    Raises:
+        ValueError: if the format is unknown, or if a CSV stream is read
+            without a class or a line of an NDJSON stream is not a JSON
+            object
+    """
+    if fmt == "ndjson":
+        return _read_ndjson(stream)
+    if fmt == "csv":
+        if cls is None:
+            raise ValueError("CSV streams need a class name")
+        return _read_csv(stream, cls)
+    raise ValueError(f"unknown format: {fmt}")
+
+
+def write_records(records, stream, fmt="ndjson", cls=None):
+    """Writes records, as returned by to_dict(), to a stream.
+
+    Args:
+        records (iterable): the records to write
+        stream (file): text stream to write to
+        fmt (str): format of the stream, one of FORMATS
+        cls (type): class of the objects, required for CSV streams
+
+    Returns:
+        int: the number of records written
+
+    Raises:
+        ValueError: if the format is unknown, or if a CSV stream is
+            written without a class
+    """
+    if fmt == "ndjson":
+        count = 0
+        for count, record in enumerate(records, 1):
+            stream.write(json.dumps(record) + "\n")
+        return count
+    if fmt == "csv":
+        if cls is None:
+            raise ValueError("CSV streams need a class name")
+        return _write_csv(records, stream, cls)
+    raise ValueError(f"unknown format: {fmt}")
+
+
+def build_objects(records, cls=None):
+    """Yields the objects of records, built by from_dict().
+
+    The class of each record is its __class__ entry, or cls if it has
+    none. When cls is given, the records of other classes are skipped.
+    Records without id or dates get new ones.
+
+    Raises:
+        ValueError: if the class of a record is missing or unknown
+    """
+    name = cls.__name__ if cls is not None else None
+    for record in records:
+        record_name = record.get("__class__", name)
+        if record_name is None:
+            raise ValueError("record without a class name")
+        if name is not None and record_name != name:
+            continue
+        obj_cls = classes.get(record_name)
+        if obj_cls is None:
+            raise ValueError(f"unknown class: {record_name}")
+        yield obj_cls.from_dict(record)
+
+
+def _read_ndjson(stream):
+    """Yields the records of the non-blank lines of an NDJSON stream"""
+    for n, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError(f"line {n} is not a JSON object")
+        yield record
+
+
+def _read_csv(stream, cls):
+    """Yields the records of the rows of a CSV stream of class cls.
+
+    Empty cells are left out so the objects keep the class defaults, and
+    the cells of numeric or JSON encoded fields are decoded after the
+    type of the default of the field. Numeric cells that do not parse as
+    that type, such as strings set by the update command, stay strings.
+    """
+    fields = declared_fields(cls)
+    for row in csv.DictReader(stream):
+        record = {"__class__": cls.__name__}
+        extra = row.pop("_extra", None)
+        if extra:
+            record.update(json.loads(extra))
+        for k, v in row.items():
+            if k is None or v in ("", None):
+                continue
+            default = fields.get(k)
+            if isinstance(default, (list, dict)):
+                v = json.loads(v)
+            elif (isinstance(default, (int, float))
+                    and not isinstance(default, bool)):
+                try:
+                    v = type(default)(v)
+                except ValueError:
+                    pass
+            record[k] = v
+        yield record
+
+
+def _write_csv(records, stream, cls):
+    """Writes records of class cls as CSV rows, returns their number"""
+    fields = declared_fields(cls)
+    columns = list(_BASE_COLUMNS) + [k for k in fields
+                                     if k not in _BASE_COLUMNS]
+    writer = csv.writer(stream)
+    writer.writerow(columns + ["_extra"])
+    count = 0
+    for count, record in enumerate(records, 1):
+        record = dict(record)
+        record.pop("__class__", None)
+        row = []
+        for column in columns:
+            value = record.pop(column, None)
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value)
+            row.append("" if value is None else value)
+        row.append(json.dumps(record) if record else "")
+        writer.writerow(row)
+    return count
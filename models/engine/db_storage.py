@@ -0,0 +1,530 @@
+#!/usr/bin/python3
+"""Module db_storage
+
+This Module contains a definition for DBStorage Class
+"""
+
+import json
+import math
+import sqlite3
+from contextlib import contextmanager
+
+from models.base_model import (classes, declared_fields, geo_fields,
+                               indexed_fields, search_fields, to_record)
+from models.engine.aggregate import (group_codes, grouped_stats, numbers,
+                                     stats)
+from models.engine.bulk import build_objects
+from models.engine.geo import (EARTH_RADIUS_KM, bounding_box, coordinates,
+                               haversine)
+from models.engine.query import (matches, parse_filters, project,
+                                 with_number_strings)
+from models.engine.search import tokenize
+
+
+class DBStorage:
+    """DBStorage Class
+
+    Stores the objects in a SQLite database with one table per model
+    class, keeping the interface of FileStorage. Each save() writes only
+    the rows of the objects added, saved or deleted since the last one.
+
+    Attributes:
+        __db_path (str): path to the SQLite database file
+        __connection (sqlite3.Connection): connection opened by reload()
+        __objects (dict): objects loaded or added, by key, so that every
+            lookup of a key returns the same instance
+        __pending (dict): keys changed since the last write to the
+            database, mapped to the object to upsert or None to delete
+        __unsaved (set): keys changed since the last commit
+        __columns (dict): declared columns of each table by class name,
+            mapping each column to whether its values are JSON encoded
+
+    """
+    __db_path = "hbnb.db"
+
+    def __init__(self, db_path=None):
+        """Initialize the storage engine.
+
+        Args:
+            db_path (str): path to the database file, defaults to hbnb.db
+        """
+        if db_path is not None:
+            self.__db_path = db_path
+        self.__connection = None
+        self.__objects = {}
+        self.__pending = {}
+        self.__unsaved = set()
+        self.__columns = {}
+        self.__batch_depth = 0
+        self.__deferred_save = False
+
+    def all(self, cls=None):
+        """Returns a dictionary of the objects, optionally of one class"""
+        self.__flush()
+        names = list(classes) if cls is None else [self.__class_name(cls)]
+        objects = {}
+        for name in names:
+            for row in self.__select(name):
+                obj = self.__object(name, row)
+                objects[f"{name}.{obj.id}"] = obj
+        return objects
+
+    def count(self, cls=None):
+        """Returns the number of objects, optionally of a single class"""
+        self.__flush()
+        names = list(classes) if cls is None else [self.__class_name(cls)]
+        return sum(self.__execute(f'SELECT COUNT(*) FROM "{name}"')
+                   .fetchone()[0] for name in names)
+
+    def get(self, cls, id):
+        """Returns the object of class cls with the given id, or None"""
+        self.__flush()
+        name = self.__class_name(cls)
+        obj = self.__objects.get(f"{name}.{id}")
+        if obj is None:
+            row = self.__select(name, "WHERE id = ?", (id,)).fetchone()
+            if row is not None:
+                obj = self.__object(name, row)
+        return obj
+
+    def where(self, cls, *fields, **filters):
+        """Returns an iterator over the objects of cls matching filters.
+
+        Equality and in filters on declared columns are run by SQLite,
+        with the index of the column if it has one, and the other filters
+        on the objects of the selected rows, a number also selecting
+        its string. Attributes left at their class default are stored as
+        NULL, so NULL matches the default.
+
+        Args:
+            cls (type or str): class of the objects
+            fields (str): when given, each object is replaced by the
+                dictionary of its id and of these attributes
+            filters: conditions on the attributes, such as city_id="..."
+                or price_by_night__lt=100, see models.engine.query
+
+        Raises:
+            ValueError: if a filter uses an unknown operator
+        """
+        self.__flush()
+        name = self.__class_name(cls)
+        columns = self.__table(name)
+        defaults = declared_fields(self.get_class(name))
+        clauses, params, conditions = [], [], []
+        for attr, op, value in parse_filters(filters):
+            if attr in columns and not columns[attr] and op == "eq":
+                values = with_number_strings([value])
+            elif (attr in columns and not columns[attr] and op == "in"
+                    and isinstance(value, (list, tuple, set))):
+                values = with_number_strings(value)
+            else:
+                conditions.append((attr, op, value))
+                continue
+            clause, values = self.__in_clause(attr, values,
+                                              defaults.get(attr))
+            clauses.append(clause)
+            params.extend(values)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.__select(name, where, params).fetchall()
+        found = (obj for obj in (self.__object(name, row) for row in rows)
+                 if matches(obj, conditions))
+        if fields:
+            return (project(obj, fields) for obj in found)
+        return found
+
+    def lookup(self, cls, field, value):
+        """Returns a dictionary of the objects of cls whose field is value.
+
+        Raises:
+            ValueError: if field is not one of the indexed_fields() of cls
+        """
+        name = self.__class_name(cls)
+        if field not in indexed_fields(self.get_class(name)):
+            raise ValueError(f"{name}.{field} is not indexed")
+        return {f"{name}.{obj.id}": obj
+                for obj in self.where(name, **{field: value})}
+
+    def near(self, cls, lat, lon, radius_km):
+        """Returns the objects of cls within radius_km of a point.
+
+        SQLite selects the rows inside the bounding box of the circle and
+        the distance of their objects is then checked, see
+        FileStorage.near().
+
+        Returns:
+            list: the objects, nearest first
+
+        Raises:
+            ValueError: if cls has no geo_fields()
+        """
+        self.__flush()
+        return [obj for _, obj in
+                self.__near(self.__class_name(cls), lat, lon, radius_km)]
+
+    def nearest(self, cls, lat, lon, k=1):
+        """Returns the k objects of cls nearest to a point, nearest first.
+
+        The search radius doubles from 50 km until it holds k objects.
+
+        Raises:
+            ValueError: if cls has no geo_fields()
+        """
+        self.__flush()
+        name = self.__class_name(cls)
+        radius = 50
+        while radius < math.pi * EARTH_RADIUS_KM:
+            found = self.__near(name, lat, lon, radius)
+            if len(found) >= k:
+                return [obj for _, obj in found[:k]]
+            radius *= 2
+        return [obj for _, obj in
+                self.__near(name, lat, lon, math.pi * EARTH_RADIUS_KM)[:k]]
+
+    def search(self, cls, query, limit=10):
+        """Returns the objects of cls best matching the words of query.
+
+        The search_fields() of each class are kept in an FTS5 table,
+        <class name>_search, whose rows share the rowid of the objects,
+        and ranked by its bm25() function, see FileStorage.search().
+
+        Raises:
+            ValueError: if cls has no search_fields()
+        """
+        self.__flush()
+        name = self.__class_name(cls)
+        if not search_fields(self.get_class(name)):
+            raise ValueError(f"{name} has no text fields")
+        self.__table(name)
+        words = tokenize(query)
+        if not words:
+            return []
+        rows = self.__execute(
+            f'SELECT t.* FROM "{name}_search" s JOIN "{name}" t '
+            f'ON t.rowid = s.rowid WHERE "{name}_search" MATCH ? '
+            f'ORDER BY s.rank LIMIT ?',
+            (" OR ".join(f'"{w}"' for w in words), limit)).fetchall()
+        return [self.__object(name, row) for row in rows]
+
+    def stats(self, cls, field, by=None, percentiles=(50, 90, 99)):
+        """Returns statistics of a numeric field of the objects of cls.
+
+        The values are read from the rows without building the objects,
+        see FileStorage.stats().
+
+        Raises:
+            ValueError: if a percentile is not between 0 and 100
+        """
+        self.__flush()
+        name = self.__class_name(cls)
+        column = numbers(self.__values(name, field))
+        if by is None:
+            return stats(column, percentiles)
+        groups, codes = group_codes(self.__values(name, by))
+        return grouped_stats(column, groups, codes, percentiles)
+
+    def new(self, obj):
+        """Adds obj to the objects written by the next save()"""
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        self.__objects[key] = obj
+        self.__pending[key] = obj
+        self.__unsaved.add(key)
+
+    @property
+    def dirty(self):
+        """Keys of the objects added, changed or deleted since last save"""
+        return set(self.__unsaved)
+
+    def mark_dirty(self, obj):
+        """Flag obj as changed if it is one of the stored objects"""
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.__objects.get(key) is obj:
+            self.__pending[key] = obj
+            self.__unsaved.add(key)
+
+    def is_dirty(self, obj):
+        """Returns whether obj has to be saved: new, changed or unknown"""
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        return self.__objects.get(key) is not obj or key in self.__unsaved
+
+    def delete(self, obj=None):
+        """Deletes obj from the database on the next save()"""
+        if obj is None:
+            return
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        self.__objects.pop(key, None)
+        self.__pending[key] = None
+        self.__unsaved.add(key)
+
+    @contextmanager
+    def batch(self):
+        """Defers every save() of the block to a single commit at its end.
+
+        If the block raises, the transaction is rolled back to the state
+        of the last save(). Nested batches are part of the outermost one.
+        """
+        self.__batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__batch_depth -= 1
+            if not self.__batch_depth:
+                self.__deferred_save = False
+                self.__pending.clear()
+                self.__unsaved.clear()
+                self.__objects.clear()
+                self.__connection.rollback()
+            raise
+        self.__batch_depth -= 1
+        if not self.__batch_depth and self.__deferred_save:
+            self.__deferred_save = False
+            self.save()
+
+    def import_objects(self, records, cls=None, chunk_size=10000):
+        """Adds the objects of records and commits them once.
+
+        Every object is built before the first one is added, see
+        FileStorage.import_objects(), and the rows of each chunk of
+        chunk_size objects are then written to the transaction.
+
+        Returns:
+            int: the number of objects imported
+        """
+        objects = list(build_objects(records, cls))
+        with self.batch():
+            for start in range(0, len(objects), chunk_size):
+                for obj in objects[start:start + chunk_size]:
+                    self.new(obj)
+                self.__flush()
+            self.save()
+        return len(objects)
+
+    def export_objects(self, cls=None):
+        """Yields the to_dict() records of the objects, optionally of cls"""
+        return (to_record(obj) for obj in self.all(cls).values())
+
+    def save(self):
+        """Upserts and deletes the changed rows and commits them"""
+        if self.__batch_depth:
+            self.__deferred_save = True
+            return
+        self.__flush()
+        self.__connection.commit()
+        self.__unsaved.clear()
+
+    def reload(self):
+        """Opens the database and creates the table of every model class.
+
+        The connection may be used from another thread than the one
+        opening it, such as the executor of AsyncStorage, as long as a
+        single thread uses it at a time.
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+        self.__connection = sqlite3.connect(self.__db_path,
+                                            check_same_thread=False)
+        self.__connection.row_factory = sqlite3.Row
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        self.__objects.clear()
+        self.__pending.clear()
+        self.__unsaved.clear()
+        self.__columns.clear()
+        for name in classes:
+            self.__table(name)
+        self.__connection.commit()
+
+    def get_class(self, name):
+        """ returns a registered model class using its name"""
+        return classes[name]
+
+    @staticmethod
+    def __class_name(cls):
+        """Returns the class name used as table name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __execute(self, sql, params=()):
+        """Executes a statement on the connection opened by reload()"""
+        return self.__connection.execute(sql, params)
+
+    def __table(self, name):
+        """Returns the declared columns of a table, creating it if needed.
+
+        Every public class attribute of the model is a column, named after
+        it, without type affinity so values are stored as they are; lists
+        and dicts are JSON encoded. Attributes the class does not declare
+        are kept in the JSON encoded _extra column. The columns of
+        indexed_fields() are indexed, and the search_fields() are copied
+        into the <class name>_search FTS5 table, filled from the rows
+        already in the table when it is created.
+        """
+        if name in self.__columns:
+            return self.__columns[name]
+        cls = self.get_class(name)
+        columns = {k: isinstance(v, (list, dict)) for k, v in
+                   declared_fields(cls).items()}
+        indexes = indexed_fields(cls)
+        self.__execute(f'CREATE TABLE IF NOT EXISTS "{name}" ('
+                       'id TEXT PRIMARY KEY, created_at TEXT, '
+                       'updated_at TEXT, _extra TEXT)')
+        existing = {row["name"] for row in
+                    self.__execute(f'PRAGMA table_info("{name}")')}
+        for column in columns:
+            if column not in existing:
+                self.__execute(f'ALTER TABLE "{name}" ADD COLUMN "{column}"')
+            if column in indexes:
+                self.__execute(f'CREATE INDEX IF NOT EXISTS '
+                               f'"{name}_{column}" ON "{name}"("{column}")')
+        texts = search_fields(cls)
+        if texts and not self.__execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?",
+                (f"{name}_search",)).fetchone():
+            self.__execute(f'CREATE VIRTUAL TABLE "{name}_search" '
+                           'USING fts5(body)')
+            body = " || ' ' || ".join(f'IFNULL("{f}", \'\')' for f in texts
+                                      if f in columns)
+            if body:
+                self.__execute(f'INSERT INTO "{name}_search"(rowid, body) '
+                               f'SELECT rowid, {body} FROM "{name}"')
+        self.__columns[name] = columns
+        return columns
+
+    def __select(self, name, where="", params=()):
+        """Returns the rows of a table matching an optional where clause"""
+        self.__table(name)
+        return self.__execute(f'SELECT * FROM "{name}" {where}', params)
+
+    def __object(self, name, row):
+        """Returns the object of a row, from __objects if already loaded"""
+        key = f"{name}.{row['id']}"
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return obj
+        kwargs = {"id": row["id"], "created_at": row["created_at"],
+                  "updated_at": row["updated_at"]}
+        for column, encoded in self.__columns[name].items():
+            value = row[column]
+            if value is not None:
+                kwargs[column] = json.loads(value) if encoded else value
+        if row["_extra"]:
+            kwargs.update(json.loads(row["_extra"]))
+        obj = self.get_class(name).from_dict(kwargs)
+        self.__objects[key] = obj
+        return obj
+
+    @staticmethod
+    def __in_clause(attr, values, default):
+        """Returns the SQL condition of a column holding one of values.
+
+        The condition matches NULL, the column of an attribute left at
+        its class default, when default is one of the values, and keeps
+        the index of the column usable.
+
+        Returns:
+            tuple: the condition and its parameters
+        """
+        null = any(v == default for v in values)
+        values = [v for v in values if v is not None]
+        terms = []
+        if len(values) == 1:
+            terms.append(f'"{attr}" = ?')
+        elif values:
+            terms.append(f'"{attr}" IN ({", ".join("?" * len(values))})')
+        if null:
+            terms.append(f'"{attr}" IS NULL')
+        if not terms:
+            return "0", []
+        return f"({' OR '.join(terms)})", values
+
+    def __near(self, name, lat, lon, radius_km):
+        """Returns the objects of a table within radius_km of a point.
+
+        Coordinates are compared as numbers, so strings holding numbers
+        are found too, and unset ones are read as their class default.
+
+        Returns:
+            list: a (distance in km, object) tuple per object, sorted
+
+        Raises:
+            ValueError: if the class has no geo_fields()
+        """
+        cls = self.get_class(name)
+        fields = geo_fields(cls)
+        if fields is None:
+            raise ValueError(f"{name} has no coordinates")
+        defaults = declared_fields(cls)
+        lat_sql, lon_sql = (f'CAST(IFNULL("{f}", ?) AS REAL)' for f in fields)
+        (min_lat, max_lat), lon_ranges = bounding_box(lat, lon, radius_km)
+        clauses = " OR ".join([f"{lon_sql} BETWEEN ? AND ?"] * len(lon_ranges))
+        params = [defaults.get(fields[0]), min_lat, max_lat]
+        for lon_range in lon_ranges:
+            params.append(defaults.get(fields[1]))
+            params.extend(lon_range)
+        rows = self.__select(name, f"WHERE {lat_sql} BETWEEN ? AND ? "
+                                   f"AND ({clauses})", params).fetchall()
+        found = []
+        for row in rows:
+            obj = self.__object(name, row)
+            point = coordinates(*(getattr(obj, f, None) for f in fields))
+            if point is not None:
+                distance = haversine(lat, lon, *point)
+                if distance <= radius_km:
+                    found.append((distance, obj))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def __values(self, name, field):
+        """Yields the value of a field for each row of a table, in order.
+
+        Unset values are the class default of the field.
+        """
+        columns = self.__table(name)
+        default = declared_fields(self.get_class(name)).get(field)
+        if field in columns or field in ("id", "created_at", "updated_at"):
+            encoded = columns.get(field, False)
+            for (value,) in self.__execute(
+                    f'SELECT "{field}" FROM "{name}" ORDER BY rowid'):
+                if value is None:
+                    yield default
+                else:
+                    yield json.loads(value) if encoded else value
+            return
+        for (extra,) in self.__execute(
+                f'SELECT _extra FROM "{name}" ORDER BY rowid'):
+            yield json.loads(extra).get(field, default) if extra else default
+
+    def __flush(self):
+        """Writes the pending changes into the current transaction."""
+        for key, obj in self.__pending.items():
+            name, id = key.split(".", 1)
+            columns = self.__table(name)
+            texts = search_fields(self.get_class(name))
+            if texts:
+                row = self.__execute(f'SELECT rowid FROM "{name}" '
+                                     'WHERE id = ?', (id,)).fetchone()
+                if row is not None:
+                    self.__execute(f'DELETE FROM "{name}_search" '
+                                   'WHERE rowid = ?', (row[0],))
+            if obj is None:
+                self.__execute(f'DELETE FROM "{name}" WHERE id = ?', (id,))
+                continue
+            record = to_record(obj)
+            del record["__class__"]
+            values = [record.pop("id"), record.pop("created_at"),
+                      record.pop("updated_at")]
+            for column, encoded in columns.items():
+                value = record.pop(column, None)
+                values.append(json.dumps(value)
+                              if encoded and value is not None else value)
+            values.append(json.dumps(record) if record else None)
+            names = ", ".join(["id", "created_at", "updated_at"]
+                              + [f'"{c}"' for c in columns] + ["_extra"])
+            marks = ", ".join("?" * len(values))
+            rowid = self.__execute(f'INSERT OR REPLACE INTO "{name}" '
+                                   f'({names}) VALUES ({marks})',
+                                   values).lastrowid
+            if texts:
+                body = " ".join(str(v) for v in (getattr(obj, f, None)
+                                                 for f in texts)
+                                if v is not None)
+                self.__execute(f'INSERT INTO "{name}_search"(rowid, body) '
+                               'VALUES (?, ?)', (rowid, body))
+        self.__pending.clear()
@@ -5,10 +5,32 @@ This Module contains a definition for FileStorage Class
 """
 
 
-import importlib
+import atexit
+import itertools
 import json
+import marshal
 import os
-import re
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from models.base_model import (BaseModel, classes, declared_fields,
+                               geo_fields, indexed_fields, search_fields,
+                               to_record)
+from models.engine.aggregate import (group_codes, grouped_stats, numbers,
+                                     stats)
+from models.engine.bulk import build_objects
+from models.engine.geo import GridIndex, coordinates
+from models.engine.locks import FileLock, RWLock
+from models.engine.query import (matches, parse_filters, project,
+                                 with_number_strings)
+from models.engine.search import TextIndex
+from models.engine.serializers import get_codec
+
+_SEARCH_HEADER = 128
+"""int: size of the header of the search index file holding its version"""
 
 
 class FileStorage:
@@ -17,34 +39,1377 @@ class FileStorage:
     Attributes:
         __file_path (str): string - path to the JSON file
         __objects (dict): A dictionary of instantiated objects.
+        __classes (dict): index of __objects by class name, mapping each
+            class name to the dictionary of its own objects
+        __raw (dict): records loaded from the file but not instantiated
+            yet, by class name then key
+        __lazy (bool): whether reload() defers instantiating the objects
+            until they are first accessed
+        __journal (bool): whether saves are appended to a journal file
+        __pending (dict): keys changed since the last save, mapped to the
+            object to upsert or None for a deletion
+        __indexes (dict): secondary indexes of the indexed_fields() of
+            each class, mapping (class name, field) to a dictionary of
+            each value to the keys of the objects holding it
+        __indexed (dict): values of the indexed fields of each key, as
+            they are in __indexes
+        __geo (dict): grid index of the coordinates of the objects of
+            each class having geo_fields()
+        __columns (dict): columns of the fields of each class built by
+            stats(), dropped when an object of the class changes
+        __search (dict): inverted index of the search_fields() of the
+            objects of each class
+        __search_changed (bool): whether __search changed since it was
+            last written to search_path
+        __search_loaded (bool): whether __search was read from
+            search_path by the last reload(), rather than rebuilt
+        __durability (str): when writes are forced to disk, one of
+            DURABILITY_MODES
+        __codec: codec of the file, see models.engine.serializers
+        __lock (RWLock): lock of the thread-safe mode, None otherwise
+        __writes (list): writes queued for the writer thread, as (kind,
+            data) tuples, see __perform()
+        __shared (FileLock): lock of the shared mode, None otherwise
+        __version: identity of the file and the journal as last read or
+            written in shared mode, see __file_version()
+        __buckets (int): number of shard files per class in the sharded
+            layout, 0 if the objects are kept in a single file
+        __unloaded (dict): shard files of each class not read yet
+        __shard_paths (dict): shard files of each class on disk
+        compact_threshold (int): minimum number of journal records before
+            save() folds the journal back into the snapshot
+        parallel_reload_bytes (int): minimum size of the file for
+            reload() to parse it with worker processes
 
     """
+    DURABILITY_MODES = ("none", "fsync", "group")
     __file_path = "file.json"
-    __objects = {}
+    __shards_path = "file.d"
+    compact_threshold = 1000
+    parallel_reload_bytes = 64 * 1024 * 1024
+
+    def __init__(self, file_path=None, journal=False, lazy=False,
+                 durability="none", group_commit_ms=10, codec=None,
+                 threadsafe=False, shared=False, reload_workers=0,
+                 buckets=0):
+        """Initialize the storage engine.
+
+        Args:
+            file_path (str): path to the JSON file, defaults to file.json,
+                or to the directory of the shards, defaults to file.d
+            journal (bool): append per-object records to <file_path>.log
+                on save() instead of rewriting the whole file
+            lazy (bool): only instantiate the reloaded objects when they
+                are first accessed through all() or get()
+            durability (str): "none" leaves flushing to the OS, "fsync"
+                forces every save() to disk before returning and "group"
+                forces the saves of each group_commit_ms window to disk
+                with a single fsync from a background timer
+            group_commit_ms (int): length of a group commit window
+            codec (str): name of the codec of the file, picked from the
+                extension of file_path by default
+            threadsafe (bool): guard the objects with a reader-writer lock
+                so they can be shared by threads, and hand the writes of
+                save() to a background writer thread, see flush()
+            shared (bool): let several processes use the file, each save()
+                taking <file_path>.lock exclusively and merging the
+                changes saved by the other processes first, see refresh()
+            reload_workers (int): number of processes parsing a file of
+                parallel_reload_bytes or more in reload(), each one a
+                range of its records; 0 or 1 parses it in this process.
+                Only files written one record per line by the json codec
+                can be split
+            buckets (int): with 0, every object is kept in file_path;
+                otherwise file_path is a directory holding the objects of
+                each class in this number of shard files, picked by a
+                hash of their id. save() then only rewrites the shards
+                holding changes, and each class is read the first time
+                it is accessed. Cannot be combined with journal or shared
+
+        Raises:
+            ValueError: if durability is not one of DURABILITY_MODES,
+                codec is not a registered codec or buckets is combined
+                with journal or shared
+        """
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"unknown durability mode: {durability}")
+        if buckets and (journal or shared):
+            raise ValueError("sharded files cannot be journaled or shared")
+        if file_path is not None:
+            self.__file_path = file_path
+        elif buckets:
+            self.__file_path = self.__shards_path
+        self.__codec = get_codec(codec, self.__file_path)
+        self.__durability = durability
+        self.__group_commit_ms = group_commit_ms
+        self.__group_timer = None
+        self.__group_lock = threading.Lock()
+        self.__journal = journal
+        self.__journal_records = 0
+        self.__lazy = lazy
+        self.__objects = {}
+        self.__classes = {}
+        self.__raw = {}
+        self.__pending = {}
+        self.__indexes = {}
+        self.__indexed = {}
+        self.__index_defaults = {}
+        self.__geo = {}
+        self.__geo_defaults = {}
+        self.__columns = {}
+        self.__search = {}
+        self.__search_defaults = {}
+        self.__search_changed = False
+        self.__search_loaded = False
+        self.__batch_depth = 0
+        self.__deferred_save = False
+        self.__lock = None
+        if threadsafe:
+            self.__lock = RWLock()
+            atexit.register(self.flush)
+        self.__shared = None
+        if shared:
+            self.__shared = FileLock(f"{self.__file_path}.lock")
+        self.__version = None
+        self.__reload_workers = reload_workers
+        self.__buckets = buckets
+        self.__unloaded = {}
+        self.__shard_paths = {}
+        self.__writes = []
+        self.__writes_cond = threading.Condition()
+        self.__writer = None
+        self.__writer_busy = False
+        self.__writer_error = None
+
+    @property
+    def journal_path(self):
+        """Path of the append-only journal next to the snapshot file"""
+        return f"{self.__file_path}.log"
+
+    @property
+    def search_path(self):
+        """Path of the search index file next to the snapshot file"""
+        return f"{self.__file_path}.search"
+
+    def all(self, cls=None):
+        """returns the dictionary __objects
+
+        Args:
+            cls (type or str): when given, only the objects of this class
+                are returned, looked up in the class index
+
+        The dictionary returned without cls is __objects itself, or a
+        copy of it in thread-safe mode; objects must be added and removed
+        through new() and delete().
+        """
+        with self.__reading():
+            if cls is None:
+                self.__load_shards()
+                self.__materialize()
+                if self.__lock is not None:
+                    return dict(self.__objects)
+                return self.__objects
+            name = self.__class_name(cls)
+            self.__load_shards(name)
+            self.__materialize(name)
+            return dict(self.__classes.get(name, {}))
+
+    def count(self, cls=None):
+        """Returns the number of objects, optionally of a single class"""
+        with self.__reading():
+            if cls is None:
+                self.__load_shards()
+                return (len(self.__objects)
+                        + sum(map(len, self.__raw.values())))
+            name = self.__class_name(cls)
+            self.__load_shards(name)
+            return (len(self.__classes.get(name, {}))
+                    + len(self.__raw.get(name, {})))
+
+    def get(self, cls, id):
+        """Returns the object of class cls with the given id, or None"""
+        with self.__reading():
+            name = self.__class_name(cls)
+            self.__load_shards(name)
+            key = f"{name}.{id}"
+            obj = self.__objects.get(key)
+            if obj is None and key in self.__raw.get(name, {}):
+                obj = self.__instantiate(name, key,
+                                         self.__raw[name].pop(key))
+            return obj
+
+    def where(self, cls, *fields, **filters):
+        """Returns an iterator over the objects of cls matching filters.
+
+        The first equality filter on an indexed field is looked up in its
+        index, so only the objects holding the value, or the string of a
+        number, are scanned.
+
+        Args:
+            cls (type or str): class of the objects
+            fields (str): when given, each object is replaced by the
+                dictionary of its id and of these attributes
+            filters: conditions on the attributes, such as city_id="..."
+                or price_by_night__lt=100, see models.engine.query
+
+        Raises:
+            ValueError: if a filter uses an unknown operator
+        """
+        conditions = parse_filters(filters)
+        objects = None
+        name = self.__class_name(cls)
+        with self.__reading():
+            self.__load_shards(name)
+            for attr, op, value in conditions:
+                if op == "eq" and (name, attr) in self.__indexes:
+                    objects = {}
+                    for v in with_number_strings([value]):
+                        objects.update(self.lookup(name, attr, v))
+                    objects = objects.values()
+                    break
+            if objects is None:
+                objects = self.all(name).values()
+        found = (obj for obj in objects if matches(obj, conditions))
+        if fields:
+            return (project(obj, fields) for obj in found)
+        return found
+
+    def lookup(self, cls, field, value):
+        """Returns a dictionary of the objects of cls whose field is value.
+
+        The objects are found in the index of the field, in time
+        proportional to their number, e.g. every review of a place with
+        lookup(Review, "place_id", place.id).
+
+        Raises:
+            ValueError: if field is not one of the indexed_fields() of cls
+        """
+        with self.__reading():
+            name = self.__class_name(cls)
+            self.__load_shards(name)
+            index = self.__indexes.get((name, field))
+            if index is None:
+                if field not in self.__index_fields(name):
+                    raise ValueError(f"{name}.{field} is not indexed")
+                return {}
+            try:
+                keys = index.get(value, ())
+            except TypeError:
+                return {}
+            return {k: self.get(name, k.split(".", 1)[1])
+                    for k in list(keys)}
+
+    def near(self, cls, lat, lon, radius_km):
+        """Returns the objects of cls within radius_km of a point.
+
+        The objects are found in the grid index of the geo_fields() of
+        cls, e.g. Place latitude and longitude, so only the objects of the
+        cells around the point are compared. Objects whose coordinates are
+        not numbers are never found.
+
+        Args:
+            cls (type or str): class of the objects
+            lat (float): latitude of the point in degrees
+            lon (float): longitude of the point in degrees
+            radius_km (float): distance to the point in km
+
+        Returns:
+            list: the objects, nearest first
+
+        Raises:
+            ValueError: if cls has no geo_fields()
+        """
+        with self.__reading():
+            name = self.__class_name(cls)
+            self.__load_shards(name)
+            return self.__geo_objects(
+                name, lambda index: index.within(lat, lon, radius_km))
+
+    def nearest(self, cls, lat, lon, k=1):
+        """Returns the k objects of cls nearest to a point, nearest first.
+
+        See near() for the index used.
+
+        Raises:
+            ValueError: if cls has no geo_fields()
+        """
+        with self.__reading():
+            name = self.__class_name(cls)
+            self.__load_shards(name)
+            return self.__geo_objects(
+                name, lambda index: index.nearest(lat, lon, k))
+
+    def search(self, cls, query, limit=10):
+        """Returns the objects of cls best matching the words of query.
+
+        The words of the search_fields() of the objects, e.g. Review.text,
+        are kept in an inverted index updated with every change and
+        written next to the file by save(), so reload() does not tokenize
+        every object again. The objects holding any of the words are
+        ranked with BM25, see models.engine.search.
+
+        Args:
+            cls (type or str): class of the objects
+            query (str): the words to look for
+            limit (int): maximum number of objects to return
+
+        Returns:
+            list: the objects, best match first
+
+        Raises:
+            ValueError: if cls has no search_fields()
+        """
+        with self.__reading():
+            name = self.__class_name(cls)
+            if not search_fields(self.get_class(name)):
+                raise ValueError(f"{name} has no text fields")
+            if not self.__search_loaded:
+                self.__load_shards(name)
+            index = self.__search.get(name)
+            if index is None:
+                return []
+            return [self.get(name, key.split(".", 1)[1])
+                    for _, key in index.search(query, limit)]
+
+    def stats(self, cls, field, by=None, percentiles=(50, 90, 99)):
+        """Returns statistics of a numeric field of the objects of cls.
+
+        The values of the field are gathered once into a column, see
+        models.engine.aggregate, which is kept until an object of cls
+        changes, so repeated reports only run the computations. Records
+        not accessed yet in lazy mode are read without instantiating
+        them. Values that are not numbers are left out, and unset ones
+        count as their class default.
+
+        Example:
+            storage.stats(Place, "price_by_night", by="city_id")
+
+        Args:
+            cls (type or str): class of the objects
+            field (str): the numeric field
+            by (str): field grouping the objects, if given
+            percentiles (iterable): percentiles to compute
 
-    def all(self):
-        """returns the dictionary __objects"""
-        return self.__objects
+        Returns:
+            dict: the count, sum, min, max, avg and p<percentile> of the
+                numbers, or such a dictionary for each value of by
+
+        Raises:
+            ValueError: if a percentile is not between 0 and 100
+        """
+        with self.__reading():
+            name = self.__class_name(cls)
+            self.__load_shards(name)
+            column = self.__column(name, field, numbers)
+            if by is None:
+                return stats(column, percentiles)
+            groups, codes = self.__column(name, by, group_codes)
+            return grouped_stats(column, groups, codes, percentiles)
 
     def new(self, obj):
         """Set in __objects obj with key <obj_class_name>.id"""
-        self.__objects[f"{obj.__class__.__name__}.{obj.id}"] = obj
+        with self.__writing():
+            name = obj.__class__.__name__
+            key = f"{name}.{obj.id}"
+            self.__raw.get(name, {}).pop(key, None)
+            self.__objects[key] = obj
+            self.__classes.setdefault(name, {})[key] = obj
+            self.__pending[key] = obj
+            self.__index(name, key, obj.__dict__)
+
+    @property
+    def dirty(self):
+        """Keys of the objects added, changed or deleted since last save"""
+        with self.__reading():
+            return set(self.__pending)
+
+    def mark_dirty(self, obj):
+        """Flag obj as changed if it is one of the stored objects"""
+        with self.__writing():
+            key = f"{obj.__class__.__name__}.{obj.id}"
+            if self.__objects.get(key) is obj:
+                self.__pending[key] = obj
+                self.__index(obj.__class__.__name__, key, obj.__dict__)
+
+    def is_dirty(self, obj):
+        """Returns whether obj has to be saved: new, changed or unknown"""
+        with self.__reading():
+            key = f"{obj.__class__.__name__}.{obj.id}"
+            return (self.__objects.get(key) is not obj
+                    or key in self.__pending)
+
+    def delete(self, obj=None):
+        """Remove obj from __objects if it is inside"""
+        if obj is None:
+            return
+        with self.__writing():
+            name = obj.__class__.__name__
+            key = f"{name}.{obj.id}"
+            self.__load_shards(name)
+            if self.__discard(name, key):
+                self.__pending[key] = None
+
+    @contextmanager
+    def batch(self):
+        """Defers every save() of the block to a single write at its end.
+
+        If the block raises, nothing is written and the objects are
+        reloaded from the file, rolling back to the state of the last
+        save(); objects held by the caller should then be fetched again.
+        Nested batches are part of the outermost one. In thread-safe mode
+        the thread running the batch holds the write lock until its end.
+
+        Example:
+            with storage.batch():
+                for _ in range(1000):
+                    User().save()
+        """
+        with self.__writing():
+            self.__batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.__batch_depth -= 1
+                if not self.__batch_depth:
+                    self.__deferred_save = False
+                    self.__rollback()
+                raise
+            self.__batch_depth -= 1
+            if not self.__batch_depth and self.__deferred_save:
+                self.__deferred_save = False
+                self.save()
+
+    def import_objects(self, records, cls=None):
+        """Adds the objects of records and saves them with a single save().
+
+        Every object is built before the first one is added, so an
+        invalid record leaves the objects unchanged, even inside a batch()
+        of the caller. Objects with the id of a stored object replace it.
+
+        Args:
+            records (iterable): records as returned by to_dict(), see
+                models.engine.bulk.read_records()
+            cls (type): class of the records without __class__; when
+                given, the records of other classes are skipped
+
+        Returns:
+            int: the number of objects imported
+
+        Raises:
+            ValueError: if the class of a record is missing or unknown
+        """
+        objects = list(build_objects(records, cls))
+        with self.batch():
+            for obj in objects:
+                self.new(obj)
+            self.save()
+        return len(objects)
+
+    def export_objects(self, cls=None):
+        """Yields the to_dict() records of the objects, optionally of cls.
+
+        See models.engine.bulk.write_records() to write them to a stream.
+        """
+        return (to_record(obj) for obj in self.all(cls).values())
 
     def save(self):
-        """Serialize __objects to the JSON file __file_path."""
-        with open(self.__file_path, 'w') as f:
-            json.dump({k: v.to_dict() for k, v in self.__objects.items()}, f)
+        """Serialize __objects to the JSON file __file_path.
+
+        In journal mode only the objects added, saved or deleted since the
+        last call are appended to the journal, and the snapshot is only
+        rewritten once the journal outgrows the number of live objects.
+        Inside batch() the write is deferred to the end of the batch.
+        In thread-safe mode the records are taken under the lock and
+        written by the writer thread; save() only waits for the write in
+        fsync durability mode. In shared mode the changes saved by other
+        processes are merged first, see refresh(), and the write is done
+        before returning, under the exclusive file lock. In the sharded
+        layout only the shards holding changes are rewritten. The search
+        index is written after the objects, except in journal mode where
+        it is only written by compact().
+        """
+        with self.__writing(), self.__file_lock(exclusive=True):
+            if self.__batch_depth:
+                self.__deferred_save = True
+                return
+            if self.__shared is not None:
+                self.refresh()
+            if self.__buckets:
+                if self.__pending:
+                    changed = {}
+                    for key in self.__pending:
+                        name, id = key.split(".", 1)
+                        changed.setdefault(name, set()).add(self.__bucket(id))
+                    self.__write("shards", self.__shard_records(changed))
+                    self.__save_search()
+            elif not self.__journal:
+                self.__write("snapshot", self.__snapshot_records())
+                self.__save_search()
+            elif self.__pending:
+                self.__write("journal", self.__journal_lines())
+                self.__save_search()
+                self.__journal_records += len(self.__pending)
+                live = len(self.__objects) + sum(map(len,
+                                                     self.__raw.values()))
+                if self.__journal_records > max(self.compact_threshold,
+                                                live):
+                    self.compact()
+            self.__pending.clear()
+            self.__version = self.__file_version()
+
+    def compact(self):
+        """Fold the journal into the JSON file and truncate the journal.
+
+        In the sharded layout every shard is rewritten instead.
+        """
+        with self.__writing(), self.__file_lock(exclusive=True):
+            if self.__shared is not None:
+                self.refresh()
+            if self.__buckets:
+                self.__load_shards()
+                names = set(self.__classes) | set(self.__raw)
+                self.__write("shards", self.__shard_records(
+                    dict.fromkeys(names | set(self.__shard_paths))))
+                self.__save_search()
+                return
+            self.__write("compact", self.__snapshot_records())
+            self.__save_search(compacting=True)
+            self.__journal_records = 0
+            self.__version = self.__file_version()
 
-    def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
+    def refresh(self):
+        """Merge the changes saved to the file by other processes.
+
+        Only the objects whose updated_at differs from the file are
+        replaced, so objects held by the caller may be stale afterwards.
+        Changes not saved yet are kept, unless the object was saved by
+        another process with a later updated_at. In shared mode nothing is
+        read if the file and the journal did not change since they were
+        last read or written, and only the new records are read if the
+        journal just grew; otherwise the whole file is read.
+        """
+        self.flush()
+        with self.__writing(), self.__file_lock():
+            version = self.__file_version()
+            if version is not None and version == self.__version:
+                return
+            old = self.__version
+            if (old is not None and self.__journal and old[0] == version[0]
+                    and old[1] is not None and version[1] is not None
+                    and old[1][0] == version[1][0]
+                    and old[1][2] <= version[1][2]):
+                entries = self.__read_journal(old[1][2])
+                self.__journal_records += len(entries)
+                self.__merge(dict(entries), full=False)
+            else:
+                self.__merge(self.__read_records() or {}, full=True)
+            self.__version = version
+
+    def flush(self):
+        """Wait until the writer thread has written every queued save.
+
+        This is a no-op outside thread-safe mode, where save() writes
+        before returning.
+
+        Raises:
+            OSError: the first error a queued write failed with, if any
+        """
+        with self.__writes_cond:
+            while self.__writes or self.__writer_busy:
+                self.__writes_cond.wait()
+            error, self.__writer_error = self.__writer_error, None
+        if error is not None:
+            raise error
+
+    def sync(self):
+        """Force the JSON file and the journal to disk.
+
+        This is what each group commit runs; it can also be called before
+        exiting so the last window is not left to the OS.
+        """
+        with self.__group_lock:
+            if self.__group_timer is not None:
+                self.__group_timer.cancel()
+                self.__group_timer = None
+        paths = [self.__file_path, self.journal_path]
+        for shards in self.__shard_paths.values():
+            paths.extend(shards)
+        for path in paths:
+            if os.path.isdir(path):
+                continue
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.__fsync_dir()
+
+    def reload(self, parallel=True):
+        """Deserialize the JSON file __file_path to __objects, if it exists.
+
+        In journal mode the records of the journal are replayed on top of
+        the snapshot, so the result matches the state of the last save().
+        In lazy mode the records are only grouped by class here, and each
+        object is instantiated the first time it is accessed. The indexes
+        are rebuilt from the records in both modes. Queued saves are
+        written first. In the sharded layout, the shards of each class are
+        only read when the class is first accessed. The search index is
+        read from search_path if it was written with the current file,
+        and rebuilt from the records otherwise.
+
+        Args:
+            parallel (bool): let reload_workers processes parse the file;
+                models passes False while it is being imported
+        """
+        self.flush()
+        with self.__writing(), self.__file_lock():
+            if self.__buckets:
+                shards = self.__find_shards()
+                records = None if shards is None else {}
+            else:
+                records = self.__read_records(parallel)
+            self.__version = self.__file_version()
+            if records is None:
+                return
+
+            self.__objects = {}
+            self.__classes = {}
+            self.__raw = {}
+            self.__pending.clear()
+            self.__indexes = {}
+            self.__indexed = {}
+            self.__geo = {}
+            self.__columns = {}
+            self.__search = {}
+            self.__search_loaded = self.__load_search()
+            self.__search_changed = not self.__search_loaded
+            if self.__buckets:
+                self.__unloaded = shards
+                self.__shard_paths = {k: set(v) for k, v in shards.items()}
+            for k, v in records.items():
+                name = k.split(".")[0]
+                self.__raw.setdefault(name, {})[k] = v
+                self.__index(name, k, v, text=not self.__search_loaded)
+            if not self.__lazy:
+                self.__materialize()
+
+    def get_class(self, name):
+        """ returns a registered model class using its name"""
+        return classes[name]
+
+    def __rollback(self):
+        """Drop the unsaved changes and reload the objects from the file."""
+        self.__objects = {}
+        self.__classes = {}
+        self.__raw = {}
+        self.__pending.clear()
+        self.__indexes = {}
+        self.__indexed = {}
+        self.__geo = {}
+        self.__columns = {}
+        self.__search = {}
+        self.__unloaded = {}
+        self.reload()
+
+    def __read_records(self, parallel=True):
+        """Returns the records of the file, with the journal replayed.
+
+        The file is parsed by worker processes if parallel allows it, see
+        __load_parallel().
+
+        Returns:
+            dict: the records by key, or None if neither the file nor the
+                journal exist
+        """
+        if self.__buckets:
+            shards = self.__find_shards()
+            if shards is None:
+                return None
+            self.__unloaded = {}
+            self.__shard_paths = {k: set(v) for k, v in shards.items()}
+            records = {}
+            for paths in shards.values():
+                for path in paths:
+                    records.update(self.__read_file(path))
+            return records
+        records = None
         if (os.path.isfile(self.__file_path)
                 and os.path.getsize(self.__file_path) > 0):
-            with open(self.__file_path, 'r') as f:
-                self.__objects = {k: self.get_class(k.split(".")[0])(**v)
-                                  for k, v in json.load(f).items()}
+            records = self.__load_parallel(parallel)
+            if records is None:
+                with open(self.__file_path,
+                          'rb' if self.__codec.binary else 'r') as f:
+                    records = self.__codec.load(f)
+        if self.__journal and os.path.isfile(self.journal_path):
+            if records is None:
+                records = {}
+            entries = self.__read_journal(truncate=True)
+            for k, v in entries:
+                if v is None:
+                    records.pop(k, None)
+                else:
+                    records[k] = v
+            self.__journal_records = len(entries)
+        return records
 
-    def get_class(self, name):
-        """ returns a class from models module using its name"""
-        sub_module = re.sub('(?!^)([A-Z]+)', r'_\1', name).lower()
-        module = importlib.import_module(f"models.{sub_module}")
-        return getattr(module, name)
+    def __find_shards(self):
+        """Returns the shard files of each class in the sharded layout.
+
+        A shard is named <class name>.<bucket><extension of the codec>.
+
+        Returns:
+            dict: paths of the shards by class name, or None if the
+                directory does not exist
+        """
+        if not os.path.isdir(self.__file_path):
+            return None
+        shards = {}
+        for entry in sorted(os.listdir(self.__file_path)):
+            base, ext = os.path.splitext(entry)
+            if ext == self.__shard_extension() and "." in base:
+                shards.setdefault(base.split(".")[0], []).append(
+                    os.path.join(self.__file_path, entry))
+        return shards
+
+    def __shard_extension(self):
+        """Returns the file extension of the shards"""
+        return (self.__codec.extensions or (".json",))[0]
+
+    def __shard_path(self, name, bucket):
+        """Returns the path of a shard of a class"""
+        return os.path.join(self.__file_path,
+                            f"{name}.{bucket}{self.__shard_extension()}")
+
+    def __bucket(self, id):
+        """Returns the shard bucket of an object id.
+
+        crc32 is used rather than hash(), which changes between runs.
+        """
+        return zlib.crc32(id.encode()) % self.__buckets
+
+    def __read_file(self, path):
+        """Returns the records of a file written with the codec"""
+        with open(path, 'rb' if self.__codec.binary else 'r') as f:
+            return self.__codec.load(f)
+
+    def __load_shards(self, name=None):
+        """Reads the shards of a class, or of every class, not read yet.
+
+        The records of objects added, changed or deleted since are
+        skipped, as the objects are newer.
+        """
+        if not self.__unloaded:
+            return
+        names = list(self.__unloaded) if name is None else [name]
+        for name in names:
+            for path in self.__unloaded.pop(name, ()):
+                for key, record in self.__read_file(path).items():
+                    if key not in self.__pending:
+                        self.__put(name, key, record,
+                                   text=not self.__search_loaded)
+
+    def __shard_records(self, changed):
+        """Returns the records of the shards to write in the sharded layout.
+
+        Shards of a class written with another number of buckets are
+        removed and all the buckets of the class are written instead.
+
+        Args:
+            changed (dict): buckets to write by class name, None for all
+
+        Returns:
+            dict: records of each shard by path, None for a shard file to
+                remove
+        """
+        shards = {}
+        encode = self.__codec.encode
+        for name, buckets in changed.items():
+            self.__load_shards(name)
+            paths = [self.__shard_path(name, b) for b in range(self.__buckets)]
+            stale = self.__shard_paths.get(name, set()) - set(paths)
+            if buckets is None or stale:
+                buckets = set(range(self.__buckets))
+            for b in buckets:
+                shards[paths[b]] = {}
+            for key, obj in self.__classes.get(name, {}).items():
+                path = paths[self.__bucket(key.split(".", 1)[1])]
+                if path in shards:
+                    shards[path][key] = encode(obj)
+            for key, record in self.__raw.get(name, {}).items():
+                path = paths[self.__bucket(key.split(".", 1)[1])]
+                if path in shards:
+                    shards[path][key] = record
+            for path in stale:
+                shards[path] = None
+            self.__shard_paths[name] = (self.__shard_paths.get(name, set())
+                                        - stale) | set(shards) - stale
+        return shards
+
+    def __load_parallel(self, parallel=True):
+        """Returns the records of the file, parsed by worker processes.
+
+        The workers run a function of record_chunks, which they import
+        without importing the models package.
+
+        Returns:
+            dict: the records by key, or None if the file has to be read
+                in this process: parallel reload is off or not allowed
+                by parallel, the file is
+                smaller than parallel_reload_bytes or its codec cannot
+                split it, e.g. an indented JSON file
+        """
+        chunks = getattr(self.__codec, "chunks", None)
+        if (not parallel or self.__reload_workers < 2 or chunks is None
+                or os.path.getsize(self.__file_path)
+                < self.parallel_reload_bytes):
+            return None
+        ranges = chunks(self.__file_path, self.__reload_workers)
+        if not ranges:
+            return None
+        starts, ends = zip(*ranges)
+        count = len(ranges)
+        with ProcessPoolExecutor(count) as executor:
+            parts = executor.map(self.__codec.load_chunk_marshal,
+                                 [self.__file_path] * count, starts, ends)
+            try:
+                records = marshal.loads(next(parts))
+                for part in parts:
+                    records.update(marshal.loads(part))
+            except ValueError:
+                return None
+        return records
+
+    def __merge(self, records, full):
+        """Apply records read from the file to the objects, see refresh().
+
+        Args:
+            records (dict): records by key, None marking a deletion
+            full (bool): whether records holds every object, the objects
+                missing from it being dropped
+        """
+        for key, record in records.items():
+            name = key.split(".")[0]
+            stamp = None if record is None else _stamp(record["updated_at"])
+            if key in self.__pending:
+                obj = self.__pending[key]
+                if (obj is None or stamp is None
+                        or stamp <= _stamp(obj.updated_at)):
+                    continue
+                del self.__pending[key]
+            elif stamp is not None and stamp == self.__stamp(name, key):
+                continue
+            self.__discard(name, key)
+            if record is not None:
+                self.__put(name, key, record)
+        if full:
+            stale = [k for k in self.__objects
+                     if k not in records and k not in self.__pending]
+            for raw in self.__raw.values():
+                stale.extend(k for k in raw if k not in records)
+            for k in stale:
+                self.__discard(k.split(".")[0], k)
+
+    def __stamp(self, name, key):
+        """Returns the updated_at of a stored object or record, or None"""
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return _stamp(obj.updated_at)
+        record = self.__raw.get(name, {}).get(key)
+        return None if record is None else _stamp(record["updated_at"])
+
+    def __put(self, name, key, record, text=True):
+        """Adds the object of a record read from the file.
+
+        The record is left out of the search index if text is False, when
+        it is already in the index read from search_path.
+        """
+        self.__raw.setdefault(name, {})[key] = record
+        self.__index(name, key, record, text)
+        if not self.__lazy:
+            self.__instantiate(name, key, self.__raw[name].pop(key))
+
+    def __discard(self, name, key):
+        """Removes an object from the objects, returns whether it was in"""
+        found = (self.__objects.pop(key, None) is not None
+                 or self.__raw.get(name, {}).pop(key, None) is not None)
+        if found:
+            self.__classes.get(name, {}).pop(key, None)
+            self.__unindex(name, key)
+        return found
+
+    def __file_lock(self, exclusive=False):
+        """Returns the context holding the file lock of the shared mode"""
+        if self.__shared is None:
+            return nullcontext()
+        if exclusive:
+            return self.__shared.exclusive()
+        return self.__shared.shared()
+
+    def __file_version(self):
+        """Returns the identity of the file and the journal in shared mode.
+
+        The identity of a file is its inode, modification time and size,
+        or None if it does not exist. Saves replace the file, so its inode
+        changes, while the journal only grows until it is compacted.
+        """
+        if self.__shared is None:
+            return None
+        return (self.__stat(self.__file_path),
+                self.__stat(self.journal_path) if self.__journal else None)
+
+    @staticmethod
+    def __stat(path):
+        """Returns the inode, modification time and size of path or None"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def __reading(self):
+        """Returns the context guarding a read of the objects.
+
+        Reads take the write lock in lazy mode and in the sharded layout,
+        as they can instantiate objects or read shards.
+        """
+        if self.__lock is None:
+            return nullcontext()
+        if self.__lazy or self.__buckets:
+            return self.__lock.write()
+        return self.__lock.read()
+
+    def __writing(self):
+        """Returns the context guarding a change of the objects"""
+        return nullcontext() if self.__lock is None else self.__lock.write()
+
+    @staticmethod
+    def __class_name(cls):
+        """Returns the class name used in the keys of __objects"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    @staticmethod
+    def __model(name):
+        """Returns the class of the objects indexed under a class name.
+
+        Objects of a class missing from the registry, such as a subclass
+        defined on the fly, are kept but not indexed, as BaseModel
+        objects are not.
+        """
+        return classes.get(name, BaseModel)
+
+    def __index_fields(self, name):
+        """Returns the indexed fields of a class with their defaults"""
+        fields = self.__index_defaults.get(name)
+        if fields is None:
+            cls = self.__model(name)
+            defaults = declared_fields(cls)
+            fields = {k: defaults.get(k) for k in indexed_fields(cls)}
+            self.__index_defaults[name] = fields
+        return fields
+
+    def __geo_fields(self, name):
+        """Returns the geo_fields() of a class with their defaults, or None"""
+        if name not in self.__geo_defaults:
+            cls = self.__model(name)
+            fields = geo_fields(cls)
+            if fields is not None:
+                defaults = declared_fields(cls)
+                fields = tuple((f, defaults.get(f)) for f in fields)
+            self.__geo_defaults[name] = fields
+        return self.__geo_defaults[name]
+
+    def __geo_objects(self, name, query):
+        """Returns the objects of the keys a query of a grid index finds.
+
+        Args:
+            name (str): class name of the objects
+            query (callable): returns the (distance, key) tuples of the
+                points of the grid index it is passed
+
+        Raises:
+            ValueError: if the class has no geo_fields()
+        """
+        if self.__geo_fields(name) is None:
+            raise ValueError(f"{name} has no coordinates")
+        index = self.__geo.get(name)
+        if index is None:
+            return []
+        return [self.get(name, key.split(".", 1)[1])
+                for _, key in query(index)]
+
+    def __column(self, name, field, build):
+        """Returns a column of the values of a field, building it once.
+
+        Args:
+            name (str): class name of the objects
+            field (str): the field
+            build (callable): builds the column from the values, in the
+                order of the objects, e.g. numbers()
+        """
+        columns = self.__columns.setdefault(name, {})
+        if (field, build) not in columns:
+            default = declared_fields(self.__model(name)).get(field)
+            values = itertools.chain(
+                (getattr(obj, field, default)
+                 for obj in self.__classes.get(name, {}).values()),
+                (record.get(field, default)
+                 for record in self.__raw.get(name, {}).values()))
+            columns[(field, build)] = build(values)
+        return columns[(field, build)]
+
+    def __index_text(self, name, key, attrs):
+        """Indexes the words of the search_fields() of an object."""
+        fields = self.__search_defaults.get(name)
+        if fields is None:
+            cls = self.__model(name)
+            defaults = declared_fields(cls)
+            fields = tuple((f, defaults.get(f)) for f in search_fields(cls))
+            self.__search_defaults[name] = fields
+        if not fields:
+            return
+        values = (attrs.get(field, default) for field, default in fields)
+        self.__search.setdefault(name, TextIndex()).add(
+            key, " ".join(str(v) for v in values if v is not None))
+        self.__search_changed = True
+
+    def __save_search(self, compacting=False):
+        """Queues the write of the search index after a write of the file.
+
+        The index file starts with the identity of the file it indexes,
+        see __search_version(), so reload() only reads it back if it was
+        written with the current file. When the index did not change,
+        only that header is rewritten. A changed index is not written in
+        journal mode until the journal is compacted, nor in the sharded
+        layout while it lacks shards not read yet.
+        """
+        if not self.__search and not os.path.isfile(self.search_path):
+            self.__search_changed = False
+        elif not self.__search_changed:
+            self.__write("search", None)
+        elif (compacting or not self.__journal) and (
+                self.__search_loaded or not self.__unloaded):
+            self.__write("search", marshal.dumps(
+                {k: v.dumps() for k, v in self.__search.items()}))
+            self.__search_changed = False
+
+    def __search_version(self):
+        """Returns the identity of the file and the journal"""
+        return (self.__stat(self.__file_path),
+                self.__stat(self.journal_path) if self.__journal else None)
+
+    def __load_search(self):
+        """Reads the search index, returns whether it matches the file"""
+        try:
+            with open(self.search_path, 'rb') as f:
+                data = f.read()
+            if marshal.loads(data[:_SEARCH_HEADER]) != self.__search_version():
+                return False
+            self.__search = {k: TextIndex.loads(v) for k, v in
+                             marshal.loads(data[_SEARCH_HEADER:]).items()}
+        except (OSError, EOFError, ValueError, TypeError):
+            self.__search = {}
+            return False
+        return True
+
+    def __write_search(self, data):
+        """Writes the search index, or only its header if data is None."""
+        header = marshal.dumps(self.__search_version()).ljust(_SEARCH_HEADER,
+                                                              b"\0")
+        if data is None:
+            if os.path.isfile(self.search_path):
+                with open(self.search_path, 'r+b') as f:
+                    f.write(header)
+                    self.__sync_file(f)
+            return
+        tmp_path = f"{self.search_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            f.write(data)
+            self.__sync_file(f)
+        os.replace(tmp_path, self.search_path)
+        self.__sync_dir()
+
+    def __index(self, name, key, attrs, text=True):
+        """Moves key to the index entries of its current attribute values.
+
+        Args:
+            name (str): class name of the object
+            key (str): key of the object
+            attrs (dict): attributes of the object or its loaded record,
+                an unset field being indexed under its class default
+            text (bool): whether to update the search index too
+        """
+        self.__columns.pop(name, None)
+        if text:
+            self.__index_text(name, key, attrs)
+        geo = self.__geo_fields(name)
+        if geo is not None:
+            (lat, lat_default), (lon, lon_default) = geo
+            point = coordinates(attrs.get(lat, lat_default),
+                                attrs.get(lon, lon_default))
+            index = self.__geo.setdefault(name, GridIndex())
+            if point is None:
+                index.remove(key)
+            else:
+                index.add(key, *point)
+        fields = self.__index_fields(name)
+        if not fields:
+            return
+        old = self.__indexed.get(key, {})
+        values = {}
+        for field, default in fields.items():
+            value = attrs.get(field, default)
+            try:
+                hash(value)
+            except TypeError:
+                continue
+            values[field] = value
+            if field in old and old[field] == value:
+                continue
+            index = self.__indexes.setdefault((name, field), {})
+            if field in old:
+                self.__drop_key(index, old[field], key)
+            index.setdefault(value, {})[key] = None
+        for field in old.keys() - values.keys():
+            self.__drop_key(self.__indexes[(name, field)], old[field], key)
+        self.__indexed[key] = values
+
+    def __unindex(self, name, key):
+        """Removes key from the indexes of its class."""
+        self.__columns.pop(name, None)
+        if name in self.__search:
+            self.__search[name].remove(key)
+            self.__search_changed = True
+        if name in self.__geo:
+            self.__geo[name].remove(key)
+        for field, value in self.__indexed.pop(key, {}).items():
+            self.__drop_key(self.__indexes[(name, field)], value, key)
+
+    @staticmethod
+    def __drop_key(index, value, key):
+        """Removes key from the entry of value in index"""
+        keys = index.get(value)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del index[value]
+
+    def __instantiate(self, name, key, record):
+        """Builds the object of a record and adds it to __objects"""
+        self.__columns.pop(name, None)
+        obj = self.get_class(name).from_dict(record)
+        self.__objects[key] = obj
+        self.__classes.setdefault(name, {})[key] = obj
+        return obj
+
+    def __materialize(self, name=None):
+        """Instantiate the records not accessed yet, of one or all classes"""
+        names = list(self.__raw) if name is None else [name]
+        for name in names:
+            for k, v in self.__raw.pop(name, {}).items():
+                self.__instantiate(name, k, v)
+
+    def __snapshot_records(self):
+        """Returns the records of every object, encoded by the codec.
+
+        Records that were never accessed are written back as they were
+        read, without instantiating them.
+        """
+        encode = self.__codec.encode
+        records = {k: encode(v) for k, v in self.__objects.items()}
+        for raw in self.__raw.values():
+            records.update(raw)
+        return records
+
+    def __journal_lines(self):
+        """Returns the journal lines of the pending changes"""
+        return [json.dumps({"key": k, "value": to_record(obj)
+                            if obj is not None else None}) + "\n"
+                for k, obj in self.__pending.items()]
+
+    def __write(self, kind, data):
+        """Performs a write, or queues it for the writer thread.
+
+        Writes are never queued in shared mode, where they have to be done
+        under the file lock. A queued snapshot or compaction holds every
+        object, so the writes queued before it are dropped instead of
+        being written, but for the last write of the whole search index,
+        and consecutive shard writes are merged.
+        """
+        if self.__lock is None or self.__shared is not None:
+            self.__perform(kind, data)
+            return
+        with self.__writes_cond:
+            if kind == "shards" and self.__writes:
+                last_kind, last_data = self.__writes[-1]
+                if last_kind == "shards":
+                    last_data.update(data)
+                    kind = None
+            elif kind not in ("journal", "search"):
+                if any(k == "compact" for k, _ in self.__writes):
+                    kind = "compact"
+                self.__writes[:] = [w for w in self.__writes
+                                    if w[0] == "search"
+                                    and w[1] is not None][-1:]
+            if kind is not None:
+                self.__writes.append((kind, data))
+            if self.__writer is None:
+                self.__writer = threading.Thread(
+                    target=self.__write_loop, name="FileStorage writer",
+                    daemon=True)
+                self.__writer.start()
+            self.__writes_cond.notify_all()
+        if self.__durability == "fsync":
+            self.flush()
+
+    def __write_loop(self):
+        """Writes the queued writes in order, run by the writer thread."""
+        while True:
+            with self.__writes_cond:
+                while not self.__writes:
+                    self.__writes_cond.wait()
+                writes, self.__writes = self.__writes, []
+                self.__writer_busy = True
+            try:
+                for kind, data in writes:
+                    self.__perform(kind, data)
+            except Exception as e:
+                self.__writer_error = e
+            finally:
+                with self.__writes_cond:
+                    self.__writer_busy = False
+                    self.__writes_cond.notify_all()
+
+    def __perform(self, kind, data):
+        """Writes data to the files.
+
+        Args:
+            kind (str): "snapshot" writes the records of data to the file,
+                "compact" does it and removes the journal, "journal"
+                appends the lines of data to the journal, "shards"
+                writes the records of data to each shard, see
+                __shard_records(), and "search" writes the search index,
+                see __save_search()
+            data: records, lines, shards or index to write
+        """
+        if kind == "journal":
+            self.__append_journal(data)
+            return
+        if kind == "search":
+            self.__write_search(data)
+            return
+        if kind == "shards":
+            os.makedirs(self.__file_path, exist_ok=True)
+            for path, records in data.items():
+                if records is not None:
+                    self.__write_snapshot(records, path)
+                elif os.path.isfile(path):
+                    os.remove(path)
+                    self.__sync_dir()
+            return
+        self.__write_snapshot(data)
+        if kind == "compact" and os.path.isfile(self.journal_path):
+            os.remove(self.journal_path)
+            self.__sync_dir()
+
+    def __write_snapshot(self, records, path=None):
+        """Write the records to the file, or to a shard, with its codec.
+
+        The file is written next to its path and renamed over it, so an
+        interrupted save leaves the previous content intact.
+        """
+        path = path or self.__file_path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb' if self.__codec.binary else 'w') as f:
+            self.__codec.dump(records, f)
+            self.__sync_file(f)
+        os.replace(tmp_path, path)
+        self.__sync_dir()
+
+    def __append_journal(self, lines):
+        """Append the lines of the pending changes to the journal.
+
+        The lines start on a new line even if the journal ends with the
+        partial line of an interrupted write, which is then skipped by
+        __read_journal() instead of being glued to the first record.
+        """
+        with open(self.journal_path, 'a+b') as f:
+            data = "".join(lines).encode()
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    data = b"\n" + data
+            f.write(data)
+            self.__sync_file(f)
+
+    def __sync_file(self, f):
+        """Apply the durability mode to the file object just written."""
+        if self.__durability == "fsync":
+            f.flush()
+            os.fsync(f.fileno())
+        elif self.__durability == "group":
+            self.__schedule_sync()
+
+    def __sync_dir(self):
+        """Force a rename or removal to disk in fsync durability mode."""
+        if self.__durability == "fsync":
+            self.__fsync_dir()
+
+    def __fsync_dir(self):
+        """fsync the directory holding __file_path, or the shards."""
+        path = self.__file_path
+        if not self.__buckets:
+            path = os.path.dirname(path) or "."
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __schedule_sync(self):
+        """Start the timer of the current group commit window, if needed."""
+        with self.__group_lock:
+            if self.__group_timer is None:
+                self.__group_timer = threading.Timer(
+                    self.__group_commit_ms / 1000, self.sync)
+                self.__group_timer.daemon = True
+                self.__group_timer.start()
+
+    def __read_journal(self, offset=0, truncate=False):
+        """Returns the (key, record) entries of the journal after offset.
+
+        A None record is a deletion. A line that cannot be decoded can
+        only come from a write that was interrupted, so it is skipped;
+        the records appended after it start on a new line.
+
+        Args:
+            offset (int): position of the first line to read
+            truncate (bool): cut the journal after its last complete
+                record, dropping the partial line an interrupted write
+                left at its end
+        """
+        entries = []
+        end = offset
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = None
+                if line.endswith(b"\n") or record is not None:
+                    end = f.tell()
+                if record is not None:
+                    entries.append((record["key"], record["value"]))
+            size = f.tell()
+        if truncate and size > end:
+            os.truncate(self.journal_path, end)
+        return entries
+
+
+def _stamp(value):
+    """Returns an updated_at value as a comparable ISO format string"""
+    return value.isoformat() if isinstance(value, datetime) else value
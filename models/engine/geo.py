@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+"""Module geo
+
+This module contains the grid index FileStorage keeps over the
+coordinates of the models, such as Place latitude and longitude, to find
+the objects near a point without scanning every object.
+"""
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+"""float: mean radius of the Earth, used for the great-circle distances"""
+
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+"""float: length of a degree of latitude"""
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Returns the great-circle distance in km between two points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2)
+         * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def coordinates(lat, lon):
+    """Returns a point as a pair of floats, or None if it is not valid.
+
+    Coordinates may be strings, as set by the update command.
+    """
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def bounding_box(lat, lon, radius_km):
+    """Returns the ranges of coordinates holding a circle.
+
+    Returns:
+        tuple: the (min, max) range of latitudes and a list of (min, max)
+            ranges of longitudes, two when the circle crosses the
+            antimeridian and the whole (-180, 180) range when it holds a
+            pole
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    lat_range = (max(lat - dlat, -90.0), min(lat + dlat, 90.0))
+    angle = radius_km / EARTH_RADIUS_KM
+    if (abs(lat) + dlat >= 90 or angle >= math.pi / 2
+            or math.sin(angle) >= math.cos(math.radians(lat))):
+        return lat_range, [(-180.0, 180.0)]
+    dlon = math.degrees(math.asin(math.sin(angle)
+                                  / math.cos(math.radians(lat))))
+    if lon - dlon < -180:
+        return lat_range, [(lon - dlon + 360, 180.0), (-180.0, lon + dlon)]
+    if lon + dlon > 180:
+        return lat_range, [(lon - dlon, 180.0), (-180.0, lon + dlon - 360)]
+    return lat_range, [(lon - dlon, lon + dlon)]
+
+
+class GridIndex:
+    """Grid index of points on the sphere
+
+    The points are kept in cells of cell_deg degrees of latitude and
+    longitude, so a query only computes the distance to the points of the
+    cells overlapping the bounding box of its circle.
+
+    Attributes:
+        cell_deg (float): size of the cells in degrees
+        __columns (int): number of cells around a parallel
+        __cells (dict): points of each non-empty cell, by cell coordinates
+        __points (dict): cell and point of each key
+    """
+    cell_deg = 0.5
+
+    def __init__(self, cell_deg=None):
+        """Initialize an empty index.
+
+        Args:
+            cell_deg (float): size of the cells, GridIndex.cell_deg by
+                default
+        """
+        if cell_deg is not None:
+            self.cell_deg = cell_deg
+        self.__columns = math.ceil(360 / self.cell_deg)
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """Returns the number of points"""
+        return len(self.__points)
+
+    def add(self, key, lat, lon):
+        """Adds the point of key, moving it if key is already indexed."""
+        cell = self.__cell(lat, lon)
+        old = self.__points.get(key)
+        if old is not None and old[0] != cell:
+            self.remove(key)
+        self.__cells.setdefault(cell, {})[key] = (lat, lon)
+        self.__points[key] = (cell, (lat, lon))
+
+    def remove(self, key):
+        """Removes the point of key if it is indexed."""
+        old = self.__points.pop(key, None)
+        if old is not None:
+            points = self.__cells[old[0]]
+            del points[key]
+            if not points:
+                del self.__cells[old[0]]
+
+    def within(self, lat, lon, radius_km):
+        """Returns the points within radius_km of a point, nearest first.
+
+        Returns:
+            list: a (distance in km, key) tuple per point
+        """
+        found = []
+        for points in self.__scan(lat, lon, radius_km):
+            for key, (plat, plon) in points.items():
+                distance = haversine(lat, lon, plat, plon)
+                if distance <= radius_km:
+                    found.append((distance, key))
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k=1):
+        """Returns the k points nearest to a point, nearest first.
+
+        The search radius starts at the size of a cell and doubles until
+        it holds k points, so only the cells around the point are read.
+
+        Returns:
+            list: a (distance in km, key) tuple per point
+        """
+        radius = self.cell_deg * KM_PER_DEGREE
+        while k < len(self.__points) and radius < math.pi * EARTH_RADIUS_KM:
+            found = self.within(lat, lon, radius)
+            if len(found) >= k:
+                return found[:k]
+            radius *= 2
+        return self.within(lat, lon, math.pi * EARTH_RADIUS_KM)[:k]
+
+    def __cell(self, lat, lon):
+        """Returns the coordinates of the cell of a point"""
+        return (math.floor(lat / self.cell_deg),
+                math.floor((lon + 180) / self.cell_deg) % self.__columns)
+
+    def __scan(self, lat, lon, radius_km):
+        """Yields the points of the cells a circle can overlap.
+
+        Reads the non-empty cells directly when they are fewer than the
+        cells of the bounding box.
+        """
+        (min_lat, max_lat), lon_ranges = bounding_box(lat, lon, radius_km)
+        rows = range(math.floor(min_lat / self.cell_deg),
+                     math.floor(max_lat / self.cell_deg) + 1)
+        columns = set()
+        for min_lon, max_lon in lon_ranges:
+            columns.update(range(
+                math.floor((min_lon + 180) / self.cell_deg),
+                min(math.floor((max_lon + 180) / self.cell_deg),
+                    self.__columns - 1) + 1))
+        if len(rows) * len(columns) > len(self.__cells):
+            for (i, j), points in self.__cells.items():
+                if i in rows and j in columns:
+                    yield points
+            return
+        for i in rows:
+            for j in columns:
+                points = self.__cells.get((i, j))
+                if points is not None:
+                    yield points
@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""Module locks
+
+This module contains the reader-writer lock of the thread-safe mode of
+FileStorage, and the file lock of its shared mode.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class RWLock:
+    """Reader-writer lock
+
+    Any number of threads can hold the lock for reading at the same time,
+    while a writer holds it alone. Waiting writers go before new readers
+    so a steady flow of reads cannot starve them. Both holds are
+    reentrant, and the writer can also take the lock for reading, but a
+    reader cannot take it for writing.
+    """
+
+    def __init__(self):
+        """Initialize an unlocked lock."""
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = 0
+        self.__writer = None
+        self.__write_depth = 0
+        self.__waiting_writers = 0
+        self.__local = threading.local()
+
+    @contextmanager
+    def read(self):
+        """Holds the lock for reading during the block."""
+        me = threading.get_ident()
+        depth = getattr(self.__local, "depth", 0)
+        counted = False
+        if not depth and self.__writer != me:
+            with self.__cond:
+                while self.__writer is not None or self.__waiting_writers:
+                    self.__cond.wait()
+                self.__readers += 1
+            counted = True
+        self.__local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.__local.depth = depth
+            if counted:
+                with self.__cond:
+                    self.__readers -= 1
+                    if not self.__readers:
+                        self.__cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Holds the lock for writing during the block.
+
+        Raises:
+            RuntimeError: if the thread holds the lock for reading
+        """
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer != me:
+                if getattr(self.__local, "depth", 0):
+                    raise RuntimeError("cannot write under a read lock")
+                self.__waiting_writers += 1
+                try:
+                    while self.__writer is not None or self.__readers:
+                        self.__cond.wait()
+                finally:
+                    self.__waiting_writers -= 1
+                self.__writer = me
+            self.__write_depth += 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__write_depth -= 1
+                if not self.__write_depth:
+                    self.__writer = None
+                    self.__cond.notify_all()
+
+
+class FileLock:
+    """Advisory lock shared by the processes opening the same file
+
+    The lock is taken with flock() on a lock file created next to the
+    data, so processes reading the data take it shared and a process
+    writing it takes it exclusive. Holds are reentrant within the
+    instance, but a shared hold cannot be turned exclusive. On platforms
+    without fcntl the lock does nothing.
+
+    Attributes:
+        path (str): path of the lock file
+    """
+
+    def __init__(self, path):
+        """Initialize the lock of the lock file path."""
+        self.path = path
+        self.__exclusive = False
+        self.__depth = 0
+
+    def shared(self):
+        """Holds the lock shared with other readers during the block."""
+        return self.__hold(False)
+
+    def exclusive(self):
+        """Holds the lock alone during the block.
+
+        Raises:
+            RuntimeError: if the lock is held shared by this instance
+        """
+        return self.__hold(True)
+
+    @contextmanager
+    def __hold(self, exclusive):
+        """Takes the lock file with flock(), unless it is already held."""
+        if self.__depth:
+            if exclusive and not self.__exclusive:
+                raise RuntimeError("cannot write under a shared lock")
+            self.__depth += 1
+            try:
+                yield
+            finally:
+                self.__depth -= 1
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self.__exclusive, self.__depth = exclusive, 1
+            try:
+                yield
+            finally:
+                self.__depth = 0
+        finally:
+            os.close(fd)
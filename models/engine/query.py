@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+"""Module query
+
+This module contains the filters of the where() queries of the storage
+engines. A filter is a keyword argument such as city_id="..." for an
+equality or price_by_night__lt=100 for another operator of OPERATORS.
+"""
+
+import operator
+
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "in": lambda value, values: value in values,
+    "contains": lambda value, part: part in value,
+}
+"""dict: functions of the operators, by the suffix selecting them"""
+
+ORDERING = ("lt", "lte", "gt", "gte")
+
+EQUALITY = ("eq", "ne", "in")
+
+_MISSING = object()
+
+
+def parse_filters(filters):
+    """Returns the conditions of keyword filters.
+
+    Args:
+        filters (dict): the filters, such as {"price_by_night__lt": 100}
+
+    Returns:
+        list: a (attribute, operator, value) tuple per filter
+
+    Raises:
+        ValueError: if an operator is unknown
+    """
+    conditions = []
+    for k, v in filters.items():
+        attr, _, op = k.partition("__")
+        op = op or "eq"
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator: {op}")
+        conditions.append((attr, op, v))
+    return conditions
+
+
+def with_number_strings(values):
+    """Returns values followed by the str() of the numbers among them.
+
+    The update command stores the strings it is given, so an equality
+    filter on a number also matches the string of that number.
+    """
+    values = list(values)
+    return values + [str(v) for v in values if _is_number(v)]
+
+
+def matches(obj, conditions):
+    """Returns whether obj satisfies every condition.
+
+    An attribute the object does not have matches nothing. Ordering
+    operators compare numbers with strings holding numbers, as set by the
+    update command, and the numbers of eq, ne and in filters are equal to
+    their str(), see with_number_strings(). Values that cannot be
+    compared do not match.
+    """
+    for attr, op, value in conditions:
+        actual = getattr(obj, attr, _MISSING)
+        if actual is _MISSING:
+            return False
+        if op in EQUALITY and isinstance(actual, str):
+            if op != "in" and _is_number(value):
+                value = str(value)
+            elif op == "in" and isinstance(value, (list, tuple, set)):
+                value = with_number_strings(value)
+        elif (op in ORDERING and isinstance(actual, str)
+                and isinstance(value, (int, float))):
+            try:
+                actual = float(actual)
+            except ValueError:
+                return False
+        try:
+            if not OPERATORS[op](actual, value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def _is_number(value):
+    """Returns whether value is an int or a float, not a bool"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def project(obj, fields):
+    """Returns the id and the given attributes of obj as a dictionary"""
+    projection = {"id": obj.id}
+    for field in fields:
+        projection[field] = getattr(obj, field, None)
+    return projection
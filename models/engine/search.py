@@ -0,0 +1,120 @@
+#!/usr/bin/python3
+"""Module search
+
+This module contains the inverted index FileStorage keeps over the text
+fields of the models, such as Review.text, to find the objects holding
+words without scanning every object.
+"""
+
+import heapq
+import marshal
+import math
+import re
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Returns the lowercase words of a text, in order"""
+    return _WORD.findall(text.casefold())
+
+
+class TextIndex:
+    """Inverted index of the words of documents
+
+    Each document is the text of the search fields of an object, indexed
+    under its key. Queries rank the documents holding any of their words
+    with BM25, so documents holding more of the words, or rarer ones,
+    come first, and a word counts less in a long document.
+
+    Attributes:
+        k1 (float): BM25 saturation of the frequency of a word
+        b (float): BM25 weight of the length of the documents
+        __postings (dict): keys of the documents holding each word, with
+            the number of times it is in each
+        __lengths (dict): number of words of each document
+        __words (dict): distinct words of each document
+        __total (int): number of words of every document
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.__postings = {}
+        self.__lengths = {}
+        self.__words = {}
+        self.__total = 0
+
+    def __len__(self):
+        """Returns the number of documents"""
+        return len(self.__lengths)
+
+    def add(self, key, text):
+        """Indexes the words of text under key, replacing its document."""
+        self.remove(key)
+        words = tokenize(text)
+        if not words:
+            return
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        for word, count in counts.items():
+            self.__postings.setdefault(word, {})[key] = count
+        self.__lengths[key] = len(words)
+        self.__words[key] = tuple(counts)
+        self.__total += len(words)
+
+    def remove(self, key):
+        """Removes the document of key if it is indexed."""
+        for word in self.__words.pop(key, ()):
+            keys = self.__postings[word]
+            del keys[key]
+            if not keys:
+                del self.__postings[word]
+        self.__total -= self.__lengths.pop(key, 0)
+
+    def search(self, query, limit=10):
+        """Returns the documents best matching the words of query.
+
+        Args:
+            query (str): the words to look for
+            limit (int): maximum number of documents to return
+
+        Returns:
+            list: a (score, key) tuple per document, best first
+        """
+        if not self.__lengths:
+            return []
+        n = len(self.__lengths)
+        average = self.__total / n
+        scores = {}
+        for word in set(tokenize(query)):
+            keys = self.__postings.get(word)
+            if not keys:
+                continue
+            idf = math.log(1 + (n - len(keys) + 0.5) / (len(keys) + 0.5))
+            for key, count in keys.items():
+                norm = self.k1 * (1 - self.b + self.b * self.__lengths[key]
+                                  / average)
+                scores[key] = (scores.get(key, 0.0)
+                               + idf * count * (self.k1 + 1) / (count + norm))
+        return heapq.nlargest(limit, ((score, key)
+                                      for key, score in scores.items()))
+
+    def dumps(self):
+        """Returns the index as bytes, see loads()"""
+        return marshal.dumps((self.__postings, self.__lengths))
+
+    @classmethod
+    def loads(cls, data):
+        """Returns the index of bytes returned by dumps()"""
+        index = cls()
+        index.__postings, index.__lengths = marshal.loads(data)
+        words = {}
+        for word, keys in index.__postings.items():
+            for key in keys:
+                words.setdefault(key, []).append(word)
+        index.__words = {k: tuple(v) for k, v in words.items()}
+        index.__total = sum(index.__lengths.values())
+        return index
@@ -0,0 +1,240 @@
+#!/usr/bin/python3
+"""Module serializers
+
+This module contains the codecs FileStorage can write its file with, and a
+converter between them.
+
+Usage:
+    python3 -m models.engine.serializers <src_file> <dst_file>
+"""
+
+import json
+import marshal
+import os
+import sys
+from datetime import datetime, timedelta
+
+import record_chunks
+from models.base_model import to_record
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+DATE_KEYS = ("created_at", "updated_at")
+
+codecs = {}
+"""dict: registry of the codec classes by name, see register_codec"""
+
+
+def register_codec(cls):
+    """Registers a codec class so it can be selected by name or extension"""
+    codecs[cls.name] = cls
+    return cls
+
+
+def get_codec(name=None, path=None):
+    """Returns a codec by name, or picked from the extension of path.
+
+    Args:
+        name (str): name of a registered codec
+        path (str): file whose extension selects the codec when no name
+            is given, defaults to json for unknown extensions
+
+    Raises:
+        ValueError: if name is not a registered codec
+    """
+    if name is None:
+        ext = os.path.splitext(path or "")[1]
+        name = next((c.name for c in codecs.values()
+                     if ext in c.extensions), "json")
+    if name not in codecs:
+        raise ValueError(f"unknown codec: {name}")
+    return codecs[name]()
+
+
+def convert(src_path, dst_path, src_codec=None, dst_codec=None):
+    """Rewrites the objects of src_path into dst_path with another codec.
+
+    Only the file itself is converted, a journal should be folded into
+    it with FileStorage.compact() first.
+    """
+    src = get_codec(src_codec, src_path)
+    dst = get_codec(dst_codec, dst_path)
+    with open(src_path, 'rb' if src.binary else 'r') as f:
+        records = src.load(f)
+    with open(dst_path, 'wb' if dst.binary else 'w') as f:
+        dst.dump(records, f)
+
+
+def _isoformat(value):
+    """Serializes the datetime values the encoders do not support"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not serializable")
+
+
+@register_codec
+class JSONCodec:
+    """Codec of the JSON file written by the stdlib json module
+
+    The object is written with one record per line, between a first line
+    holding "{" and a last one holding "}". JSON strings cannot hold a
+    raw newline, so the file can be split into ranges of records at line
+    boundaries and parsed in parallel, see the record_chunks module.
+
+    Attributes:
+        name (str): name the codec is registered under
+        extensions (tuple): file extensions selecting the codec
+        binary (bool): whether the file is opened in binary mode
+    """
+
+    name = "json"
+    extensions = (".json",)
+    binary = False
+
+    def encode(self, obj):
+        """Returns the record of obj passed to dump()"""
+        return to_record(obj)
+
+    def dump(self, records, f):
+        """Writes the records, a dictionary of key to record, to f"""
+        encode = json.JSONEncoder(default=_isoformat).encode
+        f.write("{\n")
+        f.write(",\n".join(f"{encode(k)}: {encode(v)}"
+                           for k, v in records.items()))
+        f.write("\n}")
+
+    def load(self, f):
+        """Returns the records read from f"""
+        return json.load(f)
+
+    chunks = staticmethod(record_chunks.chunks)
+    load_chunk = staticmethod(record_chunks.load_chunk)
+    load_chunk_marshal = staticmethod(record_chunks.load_chunk_marshal)
+
+
+@register_codec
+class OrjsonCodec(JSONCodec):
+    """Codec of the same JSON file written by the orjson package
+
+    orjson serializes datetime values natively, so the records are taken
+    from the objects without going through to_dict().
+    """
+
+    name = "orjson"
+    extensions = ()
+    binary = True
+
+    def __init__(self):
+        """Checks that the orjson package is installed"""
+        if orjson is None:
+            raise ImportError("the orjson codec requires orjson")
+
+    def encode(self, obj):
+        """Returns the record of obj passed to dump()"""
+        return {**obj.__dict__, "__class__": obj.__class__.__name__}
+
+    def dump(self, records, f):
+        """Writes the records, a dictionary of key to record, to f"""
+        f.write(orjson.dumps(records, default=_isoformat))
+
+    def load(self, f):
+        """Returns the records read from f"""
+        return orjson.loads(f.read())
+
+
+@register_codec
+class BinaryCodec:
+    """Codec of a compact binary file written with the marshal module
+
+    The file is MAGIC followed by the marshalled records, in which
+    created_at and updated_at are integers counting microseconds since
+    the epoch. marshal executes no code but is not meant for untrusted
+    input, like the rest of the store.
+    """
+
+    name = "binary"
+    extensions = (".hbnb",)
+    binary = True
+    MAGIC = b"HBNB\x01"
+
+    def encode(self, obj):
+        """Returns the record of obj passed to dump()"""
+        record = {**obj.__dict__, "__class__": obj.__class__.__name__}
+        for k in DATE_KEYS:
+            record[k] = (record[k] - EPOCH) // MICROSECOND
+        return record
+
+    def dump(self, records, f):
+        """Writes the records, a dictionary of key to record, to f"""
+        f.write(self.MAGIC)
+        marshal.dump({k: self.pack(v) for k, v in records.items()}, f, 4)
+
+    def load(self, f):
+        """Returns the records read from f"""
+        if f.read(len(self.MAGIC)) != self.MAGIC:
+            raise ValueError(f"{f.name} is not a {self.name} file")
+        return self.unpack(marshal.load(f))
+
+    @staticmethod
+    def pack(record):
+        """Returns record, copied if its dates still have to be packed"""
+        packed = None
+        for k in DATE_KEYS:
+            v = record.get(k)
+            if isinstance(v, (str, datetime)):
+                if packed is None:
+                    packed = dict(record)
+                if isinstance(v, str):
+                    v = datetime.fromisoformat(v)
+                packed[k] = (v - EPOCH) // MICROSECOND
+        return record if packed is None else packed
+
+    @staticmethod
+    def unpack(records):
+        """Turns the packed dates of the loaded records back to datetime"""
+        for record in records.values():
+            for k in DATE_KEYS:
+                if k in record:
+                    record[k] = EPOCH + record[k] * MICROSECOND
+        return records
+
+
+@register_codec
+class MsgpackCodec(BinaryCodec):
+    """Codec of a MessagePack file written by the msgpack package
+
+    Dates are packed into integers the same way as the binary codec.
+    """
+
+    name = "msgpack"
+    extensions = (".msgpack",)
+
+    def __init__(self):
+        """Checks that the msgpack package is installed"""
+        if msgpack is None:
+            raise ImportError("the msgpack codec requires msgpack")
+
+    def dump(self, records, f):
+        """Writes the records, a dictionary of key to record, to f"""
+        f.write(msgpack.packb({k: self.pack(v) for k, v in records.items()},
+                              default=_isoformat))
+
+    def load(self, f):
+        """Returns the records read from f"""
+        return self.unpack(msgpack.unpackb(f.read()))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(f"Usage: {sys.argv[0]} <src_file> <dst_file>")
+    convert(sys.argv[1], sys.argv[2])
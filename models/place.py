@@ -4,9 +4,10 @@
 This module contains the definition for Place Class
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, register_model
 
 
+@register_model
 class Place(BaseModel):
     """A class that represents a place
 
@@ -34,4 +35,5 @@ class Place(BaseModel):
     price_by_night = 0
     latitude = 0.0
     longitude = 0.0
-    amenity_ids = []
\ No newline at end of file
+    amenity_ids = []
+    _search_fields = ("name", "description")
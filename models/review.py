@@ -4,9 +4,10 @@
 This module contains the definition for Amenity Class
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, register_model
 
 
+@register_model
 class Review(BaseModel):
     """A class that represents a review
 
@@ -19,3 +20,4 @@ class Review(BaseModel):
     place_id = ""
     user_id = ""
     text = ""
+    _search_fields = ("text",)
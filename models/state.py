@@ -4,9 +4,10 @@
 This module contains the definition for State Class
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, register_model
 
 
+@register_model
 class State(BaseModel):
     """A class that represents a state
 
@@ -4,9 +4,10 @@
 This module contains the definition for User Class
 """
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, register_model
 
 
+@register_model
 class User(BaseModel):
     """A class that represents a user.
 
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""Module record_chunks
+
+This module contains the splitting and parsing of the JSON files written
+one record per line, run by the worker processes of a parallel reload of
+FileStorage, see JSONCodec.chunks().
+
+It is kept out of the models package on purpose: the workers import it
+to run load_chunk_marshal(), and importing anything from models would
+import the package first, which may still be importing in the parent
+process (a forked worker then waits forever for its import lock) or
+reload the whole file again (a spawned worker).
+"""
+
+import json
+import marshal
+import os
+
+
+def chunks(path, n):
+    """Returns n ranges of whole record lines covering a JSON file.
+
+    Only the first line of each range is checked to start a record, so
+    an indented file is told apart here; load_chunk() raises ValueError
+    on the ranges of other layouts.
+
+    Returns:
+        list: (start, end) byte offsets of each non-empty range, or None
+            if the file is not written one record per line
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 4 or f.read(2) != b"{\n":
+            return None
+        f.seek(size - 2)
+        if f.read(2) != b"\n}":
+            return None
+        end = size - 1
+        bounds = [2]
+        for i in range(n):
+            if i:
+                f.seek(max(end * i // n, bounds[-1]))
+                f.readline()
+                bounds.append(min(f.tell(), end))
+            else:
+                f.seek(2)
+            if bounds[-1] < end and f.read(1) != b'"':
+                return None
+    bounds.append(end)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if a < b]
+
+
+def load_chunk(path, start, end):
+    """Returns the records of a range returned by chunks().
+
+    Raises:
+        ValueError: if the range does not hold whole records, as in a
+            file not written one record per line
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start).rstrip().rstrip(b",")
+    records = json.loads(b"{" + data + b"}")
+    if not all(type(v) is dict for v in records.values()):
+        raise ValueError("the file is not written one record per line")
+    return records
+
+
+def load_chunk_marshal(path, start, end):
+    """Returns the records of a range marshalled, run by a worker.
+
+    The parent process loads marshalled records about twice as fast as
+    it would parse the range itself.
+    """
+    return marshal.dumps(load_chunk(path, start, end))
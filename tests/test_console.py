@@ -4,11 +4,17 @@
 This Module contains tests for Amenity Class
 """
 
+import json
 import os
+import subprocess
+import sys
+import tempfile
 import unittest
 from io import StringIO
 from unittest.mock import patch
 from console import HBNBCommand
+from models import storage
+from models.engine.serializers import JSONCodec
 
 class TestConsole(unittest.TestCase):
     """Tests the console app"""
@@ -263,4 +269,243 @@ class TestConsole(unittest.TestCase):
             self.assertIn('rev_k', output.getvalue())
             self.assertIn('rev_v', output.getvalue())
 
+    def test_run_batch_saves_once(self):
+        """Tests whether a batch of commands writes the file once"""
+        with patch('sys.stdout', new=StringIO()) as output, \
+                patch.object(JSONCodec, 'dump', autospec=True,
+                             side_effect=JSONCodec.dump) as mock_dump:
+            self.cmd.run_batch(['create Place', 'create User', 'all User'])
+            mock_dump.assert_called_once()
+            lines = output.getvalue().splitlines()
+            self.assertEqual(len(lines), 3)
+            self.assertIn(lines[1], lines[2])
+
+    def test_run_batch_flushes_every_n_commands(self):
+        """Tests whether flush_every saves after every N commands"""
+        with patch('sys.stdout', new=StringIO()), \
+                patch.object(JSONCodec, 'dump', autospec=True,
+                             side_effect=JSONCodec.dump) as mock_dump:
+            self.cmd.run_batch(['create Place'] * 5, flush_every=2)
+            self.assertEqual(mock_dump.call_count, 3)
+
+    def test_run_batch_reports_errors(self):
+        """Tests whether the batch report flags failing commands"""
+        report = StringIO()
+        with patch('sys.stdout', new=StringIO()):
+            failed = self.cmd.run_batch(
+                ['create Place', 'show Place missing', 'quit', 'create User'],
+                report=report)
+        self.assertEqual(failed, 1)
+        lines = report.getvalue().splitlines()
+        self.assertEqual([line.split("\t")[2] for line in lines[:3]],
+                         ["ok", "error", "ok"])
+        self.assertTrue(lines[3].startswith("3 commands, 1 failed"))
+
+    def test_run_batch_streams_output(self):
+        """Tests whether a batch command prints while it runs"""
+        def show(line):
+            print("** first **")
+            self.assertEqual(output.getvalue(), "** first **\n")
+            print("second")
+
+        with patch('sys.stdout', new=StringIO()) as output, \
+                patch.object(self.cmd, 'do_show', side_effect=show):
+            failed = self.cmd.run_batch(['show Place'])
+        self.assertEqual(failed, 1)
+        self.assertEqual(output.getvalue(), "** first **\nsecond\n")
+
+    def test_run_batch_counts_create_errors(self):
+        """Tests whether a create that fails to save is a failure"""
+        with patch('sys.stdout', new=StringIO()) as output, \
+                patch.object(storage, 'save', side_effect=OSError("full")):
+            failed = self.cmd.run_batch(['create Place'])
+        self.assertEqual(failed, 1)
+        self.assertIn("Error creating object: full", output.getvalue())
+
+    def test_batch_exit_status(self):
+        """Tests whether the console exits with 1 when a command failed"""
+        console = os.path.abspath("console.py")
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(console))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for commands, status in (("create Place\n", 0),
+                                     ("show Place missing\n", 1)):
+                done = subprocess.run([sys.executable, console],
+                                      input=commands, text=True,
+                                      capture_output=True, cwd=tmp_dir,
+                                      env=env)
+                self.assertEqual(done.returncode, status)
+
+    def test_all_output_matches_list_format(self):
+        """Tests whether the streamed 'all' output is a printed list"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('create City')
+            self.cmd.onecmd('create City')
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('all City')
+            expected = [str(obj) for obj in storage.all("City").values()]
+            self.assertEqual(output.getvalue(), f"{expected}\n")
+
+    def test_all_limit_and_offset(self):
+        """Tests the pagination options of the 'all' command"""
+        with patch('sys.stdout', new=StringIO()):
+            for _ in range(5):
+                self.cmd.onecmd('create Amenity')
+        objs = [str(obj) for obj in storage.all("Amenity").values()]
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('all Amenity --limit 2 --offset 1')
+            self.assertEqual(output.getvalue(), f"{objs[1:3]}\n")
+
+    def test_all_ndjson(self):
+        """Tests the NDJSON output of the 'all' command"""
+        with patch('sys.stdout', new=StringIO()):
+            self.cmd.onecmd('create State')
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('all State --ndjson')
+            lines = output.getvalue().splitlines()
+        self.assertEqual([json.loads(line) for line in lines],
+                         [obj.to_dict()
+                          for obj in storage.all("State").values()])
+
+    def test_all_invalid_option(self):
+        """Tests whether the 'all' command rejects unknown options"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('all Place --limit x')
+            self.assertEqual(output.getvalue(),
+                             "** --limit needs a number **\n")
+
+    def test_where_filters_objects(self):
+        """Tests the <class>.where() command"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('create Review')
+            review_id = output.getvalue().strip()
+        review = storage.get("Review", review_id)
+        with patch('sys.stdout', new=StringIO()):
+            self.cmd.onecmd(f'Review.update("{review_id}", '
+                            '{"place_id": "p-where", "rating": 4})')
+        self.assertEqual(review.place_id, "p-where")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('Review.where(place_id="p-where")')
+            self.assertEqual(output.getvalue(), f"{[str(review)]}\n")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('Review.where("rating", place_id="p-where", '
+                            'rating__gt=3)')
+            self.assertEqual(output.getvalue(),
+                             f"{[{'id': review_id, 'rating': '4'}]}\n")
 
+    def test_export_import_round_trip(self):
+        """Tests the 'export' and 'import' commands in both formats"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('create Amenity')
+            amenity_id = output.getvalue().strip()
+        amenity = storage.get("Amenity", amenity_id)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("amenities.ndjson", "amenities.csv"):
+                path = os.path.join(tmp_dir, name)
+                with patch('sys.stdout', new=StringIO()) as output:
+                    self.cmd.onecmd(f'export {path} Amenity')
+                    self.assertEqual(output.getvalue(), "")
+                storage.delete(amenity)
+                with patch('sys.stdout', new=StringIO()) as output:
+                    self.cmd.onecmd(f'import {path} Amenity')
+                    self.assertEqual(output.getvalue(),
+                                     f"{storage.count('Amenity')}\n")
+                imported = storage.get("Amenity", amenity_id)
+                self.assertEqual(imported.to_dict(), amenity.to_dict())
+                amenity = imported
+
+    def test_export_import_errors(self):
+        """Tests the errors of the 'export' and 'import' commands"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('import')
+            self.assertEqual(output.getvalue(), "** file name missing **\n")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('export - --format csv')
+            self.assertEqual(output.getvalue(), "** class name missing **\n")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('export - Place --format xml')
+            self.assertEqual(output.getvalue(),
+                             "** --format needs one of ndjson, csv **\n")
+        with patch('sys.stdin', new=StringIO('{"__class__": "Nope"}\n')), \
+                patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('import -')
+            self.assertEqual(output.getvalue(), "** unknown class: Nope **\n")
+
+    def test_near_and_nearest(self):
+        """Tests the <class>.near() and <class>.nearest() commands"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('create Place')
+            place_id = output.getvalue().strip()
+        place = storage.get("Place", place_id)
+        with patch('sys.stdout', new=StringIO()):
+            self.cmd.onecmd(f'Place.update("{place_id}", '
+                            '{"latitude": -89.99, "longitude": 12.5})')
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('Place.near(-90, 0, 5)')
+            self.assertEqual(output.getvalue(), f"{[str(place)]}\n")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('Place.nearest(-90, 0)')
+            self.assertEqual(output.getvalue(), f"{[str(place)]}\n")
+        for line in ('Place.near(0, 0)', 'Place.nearest(0, 0, 1.5)',
+                     'Place.near("0", 0, 1)'):
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cmd.onecmd(line)
+                self.assertEqual(output.getvalue(),
+                                 "** invalid arguments **\n")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('User.near(0, 0, 1)')
+            self.assertEqual(output.getvalue(),
+                             "** User has no coordinates **\n")
+
+    def test_stats(self):
+        """Tests the <class>.stats() command"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('create Place')
+            place_id = output.getvalue().strip()
+        with patch('sys.stdout', new=StringIO()):
+            self.cmd.onecmd(f'Place.update("{place_id}", '
+                            '{"city_id": "c-stats", "max_guest": 4})')
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('Place.stats(max_guest, by=city_id, '
+                            'percentiles=[])')
+            self.assertIn("c-stats: {'count': 1, 'sum': 4.0, 'min': 4.0, "
+                          "'max': 4.0, 'avg': 4.0}\n", output.getvalue())
+        for line in ('Place.stats()', 'Place.stats(max_guest, sort=1)',
+                     'Place.stats(max_guest, percentiles=50)'):
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cmd.onecmd(line)
+                self.assertEqual(output.getvalue(),
+                                 "** invalid arguments **\n")
+
+    def test_search(self):
+        """Tests the search and <class>.search() commands"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('create Review')
+            review_id = output.getvalue().strip()
+        review = storage.get("Review", review_id)
+        with patch('sys.stdout', new=StringIO()):
+            self.cmd.onecmd(f'Review.update("{review_id}", '
+                            '{"text": "zebra-striped console test"})')
+        for line in ('Review.search("Zebra", limit=1)',
+                     'search Review striped zebra'):
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cmd.onecmd(line)
+                self.assertEqual(output.getvalue(), f"{[str(review)]}\n")
+        for line in ('Review.search()', 'Review.search("a", limit=0)'):
+            with patch('sys.stdout', new=StringIO()) as output:
+                self.cmd.onecmd(line)
+                self.assertEqual(output.getvalue(),
+                                 "** invalid arguments **\n")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('search User bob')
+            self.assertEqual(output.getvalue(),
+                             "** User has no text fields **\n")
+
+    def test_where_invalid_arguments(self):
+        """Tests the errors of the <class>.where() command"""
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('Review.where(rating__like=3)')
+            self.assertEqual(output.getvalue(),
+                             "** unknown operator: like **\n")
+        with patch('sys.stdout', new=StringIO()) as output:
+            self.cmd.onecmd('Review.where(rating=)')
+            self.assertEqual(output.getvalue(), "** invalid arguments **\n")
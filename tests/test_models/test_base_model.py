@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""Module test_base_model
+
+This Module contains tests for the BaseModel Class
+"""
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+from datetime import datetime
+
+from models.base_model import to_record
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class TestBaseModel(unittest.TestCase):
+    """Test cases for the construction and records of BaseModel"""
+
+    def setUp(self):
+        """Makes a temporary storage the storage of the models"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.storage = FileStorage(
+            os.path.join(self.tmp_dir.name, "file.json"))
+        patcher = unittest.mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_from_dict_matches_keyword_arguments(self):
+        """Tests whether from_dict() builds the object of cls(**record)"""
+        place = Place()
+        place.name = "loft"
+        record = place.to_dict()
+        for obj in (Place.from_dict(record), Place(**record)):
+            self.assertEqual(obj.to_dict(), record)
+            self.assertEqual(str(obj), str(place))
+            self.assertIsInstance(obj.updated_at, datetime)
+        self.assertEqual(record["__class__"], "Place")
+        self.assertEqual(len(self.storage.all()), 1)
+
+    def test_from_dict_fills_missing_fields(self):
+        """Tests whether a partial record gets an id and dates"""
+        obj = Place.from_dict({"name": "loft"})
+        self.assertEqual(list(obj.__dict__)[:3],
+                         ["id", "created_at", "updated_at"])
+        self.assertIsInstance(obj.created_at, datetime)
+        self.assertNotEqual(obj.id, Place.from_dict({}).id)
+        self.assertEqual(self.storage.all(), {})
+
+    def test_to_dict_is_cached_until_a_change(self):
+        """Tests whether to_dict() reuses its record until a change"""
+        place = Place()
+        with unittest.mock.patch("models.base_model.to_record",
+                                 wraps=to_record) as m:
+            first = place.to_dict()
+            first["name"] = "changed"
+            self.assertNotIn("name", place.to_dict())
+            self.assertEqual(m.call_count, 1)
+            place.name = "loft"
+            self.assertEqual(place.to_dict()["name"], "loft")
+            del place.name
+            self.assertNotIn("name", place.to_dict())
+            self.assertEqual(m.call_count, 3)
+
+    def test_save_does_not_cache_records(self):
+        """Tests whether the storage encodes objects without to_dict()"""
+        place = Place()
+        self.storage.save()
+        with unittest.mock.patch("models.base_model.to_record",
+                                 wraps=to_record) as m:
+            place.to_dict()
+            self.assertEqual(m.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+"""Module test_compact
+
+This Module contains tests for the compact models
+"""
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from models.base_model import classes
+from models.compact import CompactModel, compact_model, use_compact_models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class TestCompactModel(unittest.TestCase):
+    """Test cases for the compact variant of the models"""
+
+    def setUp(self):
+        """Makes a temporary storage the storage of the models"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.storage = FileStorage(
+            os.path.join(self.tmp_dir.name, "file.json"))
+        patcher = unittest.mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.CompactPlace = compact_model(Place)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_instances_have_no_instance_dict(self):
+        """Tests whether the attributes are kept in slots"""
+        place = self.CompactPlace()
+        self.assertIn("city_id", self.CompactPlace.__slots__)
+        with self.assertRaises(AttributeError):
+            object.__setattr__(place, "undeclared", 1)
+
+    def test_to_dict_and_str_match_regular_model(self):
+        """Tests whether a compact object serializes like a regular one"""
+        place = Place()
+        place.name = "home"
+        place.number_rooms = 3
+        place.custom = "value"
+        compact = self.CompactPlace(**place.to_dict())
+
+        self.assertEqual(compact.to_dict(), place.to_dict())
+        self.assertEqual(str(compact), str(place))
+        self.assertEqual(compact.__class__.__name__, "Place")
+
+    def test_unset_fields_read_class_defaults(self):
+        """Tests whether unset fields fall back to the class defaults"""
+        place = self.CompactPlace()
+        self.assertEqual(place.number_rooms, 0)
+        self.assertEqual(place.name, "")
+        with self.assertRaises(AttributeError):
+            place.missing
+
+    def test_mutable_defaults_are_not_shared(self):
+        """Tests whether amenity_ids is a list per instance"""
+        first, second = self.CompactPlace(), self.CompactPlace()
+        first.amenity_ids.append("a")
+        self.assertEqual(second.amenity_ids, [])
+
+    def test_reading_mutable_defaults_changes_nothing(self):
+        """Tests whether a copied default is left out of the record"""
+        place = self.CompactPlace()
+        place.save()
+        record = place.to_dict()
+        self.assertEqual(place.amenity_ids, [])
+        self.assertEqual(place.to_dict(), record)
+        self.assertFalse(self.storage.is_dirty(place))
+        place.amenity_ids = ["a"]
+        self.assertEqual(place.to_dict()["amenity_ids"], ["a"])
+
+    def test_attributes_keep_the_order_they_were_set_in(self):
+        """Tests whether __dict__ follows the order of assignment"""
+        place, compact = Place(), self.CompactPlace()
+        for obj in (place, compact):
+            obj.custom = "value"
+            obj.amenity_ids
+            obj.name = "home"
+            obj.city_id = "c"
+            obj.amenity_ids = ["a"]
+        compact.id, compact.created_at = place.id, place.created_at
+        compact.updated_at = place.updated_at
+        self.assertEqual(list(compact.to_dict()), list(place.to_dict()))
+        self.assertEqual(str(compact), str(place))
+        loaded = self.CompactPlace(**place.to_dict())
+        self.assertEqual(str(loaded), str(place))
+
+    def test_setting_attributes_marks_dirty(self):
+        """Tests whether compact objects take part in dirty tracking"""
+        place = self.CompactPlace()
+        place.save()
+        self.assertFalse(self.storage.is_dirty(place))
+        place.name = "home"
+        self.assertTrue(self.storage.is_dirty(place))
+
+    def test_from_dict_matches_keyword_arguments(self):
+        """Tests whether from_dict() builds the object of cls(**record)"""
+        record = Place(name="loft", city_id="c").to_dict()
+        record["updated_at"] = record["created_at"]
+        obj = self.CompactPlace.from_dict(record)
+        self.assertEqual(obj.to_dict(), self.CompactPlace(**record).to_dict())
+        self.assertIs(obj.created_at, obj.updated_at)
+        self.assertNotIn(f"Place.{obj.id}", self.storage.all())
+
+    def test_use_compact_models_replaces_registry(self):
+        """Tests whether the registry resolves to compact classes"""
+        saved = dict(classes)
+        self.addCleanup(classes.update, saved)
+        use_compact_models()
+        self.assertTrue(issubclass(classes["Place"], CompactModel))
+        self.assertIs(classes["Place"], self.CompactPlace)
+
+        place = Place()
+        place.name = "home"
+        self.storage.new(place)
+        self.storage.save()
+        self.storage.reload()
+        reloaded = self.storage.get(Place, place.id)
+        self.assertIsInstance(reloaded, self.CompactPlace)
+        self.assertEqual(reloaded.to_dict(), place.to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
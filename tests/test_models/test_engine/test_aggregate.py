@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""Module test_aggregate
+
+This Module contains tests for the aggregate module
+"""
+
+import math
+import unittest
+
+from models.engine import aggregate
+from models.engine.aggregate import (group_codes, grouped_stats, numbers,
+                                     stats)
+
+
+class TestAggregate(unittest.TestCase):
+    """Test cases for the columns and statistics of stats() queries"""
+
+    def test_numbers(self):
+        """Tests whether values that are not numbers become NaN"""
+        column = numbers([1, "2.5", None, "x", [3]])
+        self.assertEqual(list(column)[:2], [1.0, 2.5])
+        self.assertTrue(all(math.isnan(v) for v in list(column)[2:]))
+
+    def test_stats(self):
+        """Tests the statistics and the interpolated percentiles"""
+        result = stats(numbers([40, 10, "x", 30, 20]), (0, 50, 90))
+        self.assertEqual(result, {"count": 4, "sum": 100.0, "min": 10.0,
+                                  "max": 40.0, "avg": 25.0, "p0": 10.0,
+                                  "p50": 25.0, "p90": 37.0})
+        self.assertEqual(stats(numbers([]), (50,)),
+                         {"count": 0, "sum": None, "min": None,
+                          "max": None, "avg": None, "p50": None})
+        with self.assertRaises(ValueError):
+            stats(numbers([1]), (101,))
+
+    def test_grouped_stats(self):
+        """Tests whether the numbers are aggregated by group"""
+        groups, codes = group_codes(["a", "b", "a", ["c"]])
+        self.assertEqual(groups, ["a", "b", "['c']"])
+        result = grouped_stats(numbers([1, 2, 3, "x"]), groups, codes)
+        self.assertEqual({k: v["sum"] for k, v in result.items()},
+                         {"a": 4.0, "b": 2.0, "['c']": None})
+
+    @unittest.skipIf(aggregate.numpy is None, "numpy is not installed")
+    def test_numpy_columns(self):
+        """Tests whether the columns are numpy arrays with numpy"""
+        self.assertIsInstance(numbers([1]), aggregate.numpy.ndarray)
+
+
+if __name__ == '__main__':
+    unittest.main()
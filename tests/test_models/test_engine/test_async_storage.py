@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Module test_async_storage
+
+This Module contains tests for the AsyncStorage Class
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from models.base_model import BaseModel
+from models.engine.async_storage import AsyncStorage
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+class TestAsyncStorage(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the AsyncStorage Class"""
+
+    def setUp(self):
+        """Wraps a storage of a temporary file"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.engine = FileStorage(self.file_path, threadsafe=True)
+        self.storage = AsyncStorage(self.engine, chunk_size=2)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    async def test_asave_and_areload(self):
+        """Tests whether the objects saved are reloaded"""
+        place = Place()
+        self.storage.new(place)
+        await self.storage.asave()
+
+        storage = AsyncStorage(FileStorage(self.file_path))
+        await storage.areload()
+        self.assertEqual(storage.get(Place, place.id).to_dict(),
+                         place.to_dict())
+
+    async def test_db_storage(self):
+        """Tests whether a DBStorage is saved, reloaded and iterated"""
+        db_path = os.path.join(self.tmp_dir.name, "hbnb.db")
+        engine = DBStorage(db_path)
+        engine.reload()
+        storage = AsyncStorage(engine)
+        place = Place(name="loft")
+        storage.new(place)
+        await storage.asave()
+
+        storage = AsyncStorage(DBStorage(db_path))
+        await storage.areload()
+        self.assertEqual([p.name async for p in storage.aall(Place)],
+                         ["loft"])
+        self.assertEqual(storage.get(Place, place.id).name, "loft")
+
+    async def test_concurrent_asave_calls_are_coalesced(self):
+        """Tests whether a burst of asave calls runs at most two saves"""
+        self.storage.new(BaseModel())
+        with unittest.mock.patch.object(self.engine, "save",
+                                        wraps=self.engine.save) as mock_save:
+            await asyncio.gather(*(self.storage.asave() for _ in range(10)))
+        self.assertLessEqual(mock_save.call_count, 2)
+        self.assertTrue(os.path.isfile(self.file_path))
+
+    async def test_asave_raises_save_errors(self):
+        """Tests whether the error of a save reaches every caller"""
+        with unittest.mock.patch.object(self.engine, "save",
+                                        side_effect=OSError("full")):
+            results = await asyncio.gather(
+                self.storage.asave(), self.storage.asave(),
+                return_exceptions=True)
+        self.assertTrue(all(isinstance(r, OSError) for r in results))
+
+    async def test_async_iteration(self):
+        """Tests whether async for yields every object"""
+        objs = [Place(), Place(), BaseModel()]
+        for obj in objs:
+            self.storage.new(obj)
+        self.assertEqual([obj async for obj in self.storage.aall(Place)],
+                         objs[:2])
+        self.assertEqual({obj.id async for obj in self.storage},
+                         {obj.id for obj in objs})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,273 @@
+#!/usr/bin/python3
+"""Module test_db_storage
+
+This Module contains tests for the DBStorage Class
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+import unittest.mock
+
+from models.base_model import BaseModel
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+
+class TestDBStorageDocsAndStyle(unittest.TestCase):
+    """Tests DBStorage class for documentation and style conformance"""
+
+    def test_class_docstring(self):
+        """Tests whether the class is documented"""
+        self.assertTrue(len(DBStorage.__doc__) >= 1)
+
+
+class TestDBStorage(unittest.TestCase):
+    """Test cases for DBStorage Class"""
+
+    def setUp(self):
+        """Opens a storage on a temporary database"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "hbnb.db")
+        self.storage = DBStorage(self.db_path)
+        self.storage.reload()
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def reopen(self):
+        """Returns a new storage on the same database"""
+        storage = DBStorage(self.db_path)
+        storage.reload()
+        return storage
+
+    def test_reload_creates_one_table_per_class(self):
+        """Tests whether every model class has its table"""
+        with sqlite3.connect(self.db_path) as connection:
+            tables = {row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertTrue({"BaseModel", "User", "Place", "City", "State",
+                         "Amenity", "Review"} <= tables)
+
+    def test_save_persists_objects(self):
+        """Tests whether saved objects are found by another storage"""
+        place = Place()
+        place.name = "home"
+        place.amenity_ids = ["a", "b"]
+        place.custom = "value"
+        user = User()
+        for obj in (place, user, BaseModel()):
+            self.storage.new(obj)
+        self.storage.save()
+
+        storage = self.reopen()
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count(Place), 1)
+        self.assertEqual(storage.get(Place, place.id).to_dict(),
+                         place.to_dict())
+        self.assertEqual(list(storage.all(User)), [f"User.{user.id}"])
+
+    def test_save_persists_lists_changed_in_place(self):
+        """Tests whether save writes a list changed in place"""
+        with unittest.mock.patch("models.storage", self.storage):
+            place = Place()
+            place.amenity_ids = []
+            place.save()
+            place.amenity_ids.append("a1")
+            place.save()
+        self.assertEqual(
+            self.reopen().get(Place, place.id).amenity_ids, ["a1"])
+
+    def test_get_returns_the_same_instance(self):
+        """Tests whether a key is always resolved to one object"""
+        place = Place()
+        self.storage.new(place)
+        self.storage.save()
+
+        storage = self.reopen()
+        obj = storage.get("Place", place.id)
+        self.assertIs(storage.get(Place, place.id), obj)
+        self.assertIs(storage.all(Place)[f"Place.{place.id}"], obj)
+        self.assertIsNone(storage.get(Place, "missing"))
+
+    def test_unsaved_changes_are_not_committed(self):
+        """Tests whether only save commits the changes"""
+        place = Place()
+        self.storage.new(place)
+        self.assertEqual(self.storage.count(Place), 1)
+        self.assertEqual(self.reopen().count(Place), 0)
+
+    def test_delete_removes_the_row(self):
+        """Tests whether a deleted object is gone after save"""
+        place = Place()
+        self.storage.new(place)
+        self.storage.save()
+        self.storage.delete(place)
+        self.storage.save()
+
+        self.assertIsNone(self.reopen().get(Place, place.id))
+
+    def test_batch_rolls_back_on_exception(self):
+        """Tests whether a failing batch commits nothing"""
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                self.storage.new(Place())
+                self.storage.save()
+                raise ValueError()
+
+        self.assertEqual(self.storage.count(Place), 0)
+        self.assertEqual(self.reopen().count(Place), 0)
+
+    def test_where_runs_filters(self):
+        """Tests whether 'where' combines SQL and attribute filters"""
+        places = [Place() for _ in range(3)]
+        for price, obj in zip([50, 120, 200], places):
+            obj.city_id = "c1"
+            obj.price_by_night = price
+            self.storage.new(obj)
+        places[2].city_id = "c2"
+        self.storage.save()
+
+        storage = self.reopen()
+        found = storage.where(Place, city_id__in=["c1", "c2"],
+                              price_by_night__gt=100)
+        self.assertEqual([obj.id for obj in found],
+                         [places[1].id, places[2].id])
+        found = storage.where("Place", "city_id", id=places[2].id)
+        self.assertEqual(list(found), [{"id": places[2].id,
+                                        "city_id": "c2"}])
+
+    def test_where_matches_numbers_set_as_strings(self):
+        """Tests whether equality filters on numbers match their strings"""
+        places = [Place(), Place(), Place()]
+        for rooms, place in zip(["3", 3, "4"], places):
+            place.number_rooms = rooms
+            self.storage.new(place)
+        self.storage.save()
+        storage = self.reopen()
+        for filters, found in (({"number_rooms": 3}, places[:2]),
+                               ({"number_rooms__ne": 3}, places[2:]),
+                               ({"number_rooms__in": [4, 5]}, places[2:])):
+            self.assertEqual(
+                sorted(obj.id for obj in storage.where(Place, **filters)),
+                sorted(place.id for place in found))
+
+    def test_lookup_and_indexes(self):
+        """Tests whether the indexed fields are indexed and looked up"""
+        review = Review()
+        review.place_id = "p1"
+        self.storage.new(review)
+        self.storage.save()
+
+        with sqlite3.connect(self.db_path) as connection:
+            indexes = {row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({"Review_place_id", "Review_user_id"} <= indexes)
+        self.assertEqual(list(self.reopen().lookup(Review, "place_id", "p1")),
+                         [f"Review.{review.id}"])
+
+    def test_near_and_nearest(self):
+        """Tests whether the places near a point are found nearest first"""
+        paris = Place(name="paris", latitude=48.8566, longitude=2.3522)
+        london = Place(name="london", latitude="51.5074", longitude=-0.1278)
+        fiji = Place(name="fiji", latitude=-17.7, longitude=179.9)
+        for obj in (paris, london, fiji, Place(name="unknown")):
+            self.storage.new(obj)
+        self.storage.save()
+        self.assertEqual([p.name for p in self.storage.near(Place, 50, 1,
+                                                            400)],
+                         ["paris", "london"])
+        self.assertEqual([p.name for p in self.storage.nearest(
+            Place, -17.7, -179.9, 1)], ["fiji"])
+        with self.assertRaises(ValueError):
+            self.storage.nearest(User, 0, 0)
+
+    def test_stats(self):
+        """Tests the statistics of a declared and an undeclared field"""
+        for city, price in (("a", 10), ("a", "30"), ("b", 50)):
+            self.storage.new(Place(city_id=city, price_by_night=price,
+                                   rating=price))
+        self.storage.new(Place(city_id="b"))
+        result = self.storage.stats(Place, "price_by_night", by="city_id",
+                                    percentiles=())
+        self.assertEqual({k: (v["count"], v["sum"])
+                          for k, v in result.items()},
+                         {"a": (2, 40.0), "b": (2, 50.0)})
+        self.assertEqual(self.storage.stats(Place, "rating")["count"], 3)
+
+    def test_where_matches_file_storage(self):
+        """Tests whether filters on defaults match as in FileStorage"""
+        file_storage = FileStorage(os.path.join(self.tmp_dir.name,
+                                                "file.json"))
+        places = [Place(), Place(price_by_night=0, city_id="c1"),
+                  Place(price_by_night=50, city_id="c2")]
+        for storage in (self.storage, file_storage):
+            for obj in places:
+                storage.new(obj)
+            storage.save()
+        queries = [{"price_by_night": 0}, {"city_id": ""},
+                   {"city_id__in": ["", "c2"]}, {"price_by_night__in": []},
+                   {"city_id": None}, {"price_by_night": 50}]
+        for filters in queries:
+            with self.subTest(**filters):
+                self.assertEqual(
+                    sorted(o.id for o in self.storage.where(Place, **filters)),
+                    sorted(o.id for o in file_storage.where(Place, **filters)))
+        self.assertEqual(set(self.storage.lookup(Place, "city_id", "")),
+                         set(file_storage.lookup(Place, "city_id", "")))
+
+    def test_search(self):
+        """Tests the ranking of the reviews found and their updates"""
+        reviews = [Review(text=text) for text in (
+            "great stay, very clean", "dirty room, not great", "quiet")]
+        for obj in reviews:
+            self.storage.new(obj)
+        self.storage.save()
+        self.assertEqual([r.text for r in self.storage.search(
+            Review, "Clean great")], [reviews[0].text, reviews[1].text])
+        reviews[0].text = "awful"
+        self.storage.new(reviews[0])
+        self.storage.delete(reviews[1])
+        self.assertEqual([r.text for r in self.storage.search(
+            Review, "great awful")], ["awful"])
+        self.storage.save()
+        with sqlite3.connect(self.db_path) as connection:
+            connection.execute('DROP TABLE "Review_search"')
+        storage = self.reopen()
+        self.assertEqual([r.id for r in storage.search(Review, "quiet")],
+                         [reviews[2].id])
+        self.assertEqual(storage.search(Review, "..."), [])
+        with self.assertRaises(ValueError):
+            storage.search(User, "bob")
+
+    def test_import_export(self):
+        """Tests whether imported objects are committed and exported"""
+        records = [Place(name=f"p{i}").to_dict() for i in range(3)]
+        self.assertEqual(self.storage.import_objects(records, chunk_size=2),
+                         3)
+        storage = self.reopen()
+        self.assertEqual(sorted(r["name"]
+                                for r in storage.export_objects(Place)),
+                         ["p0", "p1", "p2"])
+
+    def test_import_rolls_back_inside_a_batch(self):
+        """Tests whether an invalid record is never committed"""
+        records = [Place().to_dict(), Place().to_dict(),
+                   {"__class__": "Nope", "id": "x"}]
+        with self.storage.batch():
+            with self.assertRaises(ValueError):
+                self.storage.import_objects(records, chunk_size=1)
+            self.assertEqual(self.storage.count(), 0)
+            self.storage.new(User())
+            self.storage.save()
+        self.assertEqual(self.reopen().count(Place), 0)
+        self.assertEqual(self.reopen().count(User), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,10 +6,26 @@ This Module contains tests for the FileStorage Class
 
 import json
 import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import unittest.mock
+from datetime import datetime
+from io import StringIO
 
+import models
+from models.engine.aggregate import to_number
+from models.engine.bulk import read_records, write_records
 from models.engine.file_storage import FileStorage
+from models.engine.search import TextIndex
+from models.engine.serializers import JSONCodec
 from models.base_model import BaseModel
+from models.city import City
+from models.place import Place
+from models.review import Review
 
 class TestFileStorageDocsAndStyle(unittest.TestCase):
     """Tests FileStorage class for documentation and style conformance"""
@@ -53,6 +69,70 @@ class TestFileStorage(unittest.TestCase):
         key = f"{temp_obj.__class__.__name__}.{temp_obj.id}"
         self.assertIn(key, self.storage.all().keys())
 
+    def test_all_with_class_returns_only_its_objects(self):
+        """Tests whether 'all' with a class only returns that class"""
+        places = [Place() for _ in range(3)]
+        for obj in places + [BaseModel()]:
+            self.storage.new(obj)
+
+        expected = {f"Place.{obj.id}": obj for obj in places}
+        self.assertEqual(self.storage.all(Place), expected)
+        self.assertEqual(self.storage.all("Place"), expected)
+
+    def test_count_uses_class_index(self):
+        """Tests whether 'count' follows new, delete and reload"""
+        places = [Place() for _ in range(3)]
+        for obj in places:
+            self.storage.new(obj)
+        self.storage.new(BaseModel())
+        self.storage.delete(places[0])
+
+        self.assertEqual(self.storage.count(Place), 2)
+        self.assertEqual(self.storage.count(), 3)
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.count("Place"), 2)
+        self.assertEqual(self.storage.count("User"), 0)
+
+    def test_where_filters_and_projects(self):
+        """Tests whether 'where' applies its filters and projection"""
+        places = [Place(), Place(), Place()]
+        for price, obj in zip([50, "120", 200], places):
+            obj.city_id = "c1"
+            obj.price_by_night = price
+            self.storage.new(obj)
+        places[2].city_id = "c2"
+
+        found = self.storage.where(Place, city_id="c1",
+                                   price_by_night__gte=100)
+        self.assertEqual(list(found), [places[1]])
+        found = self.storage.where("Place", "price_by_night",
+                                   city_id__in=["c2"])
+        self.assertEqual(list(found), [{"id": places[2].id,
+                                        "price_by_night": 200}])
+        self.assertEqual(list(self.storage.where(Place, nothing=1)), [])
+        with self.assertRaises(ValueError):
+            self.storage.where(Place, city_id__like="c")
+
+    def test_where_matches_numbers_set_as_strings(self):
+        """Tests whether equality filters on numbers match their strings"""
+        places = [Place(), Place(), Place()]
+        for rooms, obj in zip(["3", 3, "4"], places):
+            obj.number_rooms = rooms
+            self.storage.new(obj)
+        found = self.storage.where(Place, number_rooms=3)
+        self.assertEqual(list(found), places[:2])
+        found = self.storage.where(Place, number_rooms__ne=3)
+        self.assertEqual(list(found), places[2:])
+        found = self.storage.where(Place, number_rooms__in=[4, 5])
+        self.assertEqual(list(found), places[2:])
+
+    def test_get_class_uses_model_registry(self):
+        """Tests whether get_class resolves registered classes only"""
+        self.assertIs(self.storage.get_class("Place"), Place)
+        with self.assertRaises(KeyError):
+            self.storage.get_class("BModel")
+
     def test_save_method_saves_objects_to_file(self):
         """Tests whether the save method saves objects to file"""
         expected_objects = {}
@@ -87,6 +167,64 @@ class TestFileStorage(unittest.TestCase):
         saved_objects_dict = {k: v.to_dict() for k, v in saved_objects.items()}
         self.assertEqual(expected_objects, saved_objects_dict)
 
+    def test_parallel_reload_matches_reload(self):
+        """Tests whether worker processes reload the same objects"""
+        objs = [BaseModel(), Place(), Place()]
+        for obj in objs:
+            self.storage.new(obj)
+        self.storage.save()
+
+        storage = FileStorage(reload_workers=2)
+        with unittest.mock.patch.object(FileStorage, "parallel_reload_bytes",
+                                        0):
+            storage.reload()
+        self.assertEqual({k: v.to_dict() for k, v in storage.all().items()},
+                         {f"{obj.__class__.__name__}.{obj.id}": obj.to_dict()
+                          for obj in objs})
+
+    def test_import_with_reload_workers(self):
+        """Tests whether importing models loads a large file by itself"""
+        pad = "x" * 200
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "file.json")
+            with open(path, "w") as f:
+                f.write("{\n")
+                count = 0
+                while f.tell() <= FileStorage.parallel_reload_bytes:
+                    f.write(f'"BaseModel.{count}": {{"id": "{count}", '
+                            '"created_at": "2024-01-01T00:00:00", '
+                            '"updated_at": "2024-01-01T00:00:00", '
+                            f'"__class__": "BaseModel", "pad": "{pad}"}},\n')
+                    count += 1
+                f.write(f'"BaseModel.{count}": {{"id": "{count}"}}\n}}')
+            env = dict(os.environ, HBNB_FILE_RELOAD_WORKERS="2",
+                       HBNB_FILE_PATH=path,
+                       PYTHONPATH=os.path.dirname(os.path.dirname(
+                           os.path.abspath(models.__file__))))
+            done = subprocess.run(
+                [sys.executable, "-c",
+                 "from models import storage; print(storage.count())"],
+                capture_output=True, text=True, env=env, timeout=120)
+        self.assertEqual(done.returncode, 0, done.stderr)
+        self.assertEqual(done.stdout.strip(), str(count + 1))
+
+    def test_parallel_reload_of_indented_file(self):
+        """Tests whether indented files are reloaded by this process"""
+        records = {f"Place.{i}": Place(id=str(i), name=f"p{i}").to_dict()
+                   for i in range(20)}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "file.json")
+            for indent in (4, 0):
+                with open(path, "w") as f:
+                    json.dump(records, f, indent=indent)
+                storage = FileStorage(path, reload_workers=2)
+                with unittest.mock.patch.object(
+                        FileStorage, "parallel_reload_bytes", 0):
+                    storage.reload()
+                self.assertEqual({k: v.to_dict()
+                                  for k, v in storage.all().items()},
+                                 records)
+
     def test_reload_method_does_not_do_anything_for_non_existent_file(self):
         """Reload does not do anything if the file does not exist"""
         if os.path.exists(self.file_path):
@@ -105,5 +243,986 @@ class TestFileStorage(unittest.TestCase):
         existing_objects_dict = {k: v.to_dict() for k, v in existing_objects.items()}
         self.assertEqual(expected_objects, existing_objects_dict)
 
+
+class TestFileStorageBatch(unittest.TestCase):
+    """Test cases for the batch method of FileStorage"""
+
+    def setUp(self):
+        """Creates a storage inside a temporary directory"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_batch_writes_once_on_exit(self):
+        """Tests whether saves inside a batch are coalesced into one"""
+        with unittest.mock.patch("builtins.open",
+                                 wraps=open) as mock_open:
+            with self.storage.batch():
+                for _ in range(5):
+                    self.storage.new(BaseModel())
+                    self.storage.save()
+                mock_open.assert_not_called()
+            mock_open.assert_called_once()
+
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(storage.count(), 5)
+
+    def test_batch_rolls_back_on_exception(self):
+        """Tests whether a failing batch writes nothing and reloads"""
+        kept = BaseModel()
+        self.storage.new(kept)
+        self.storage.save()
+
+        with self.assertRaises(ValueError):
+            with self.storage.batch():
+                self.storage.new(BaseModel())
+                self.storage.save()
+                raise ValueError()
+
+        self.assertEqual(list(self.storage.all()), [f"BaseModel.{kept.id}"])
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(storage.count(), 1)
+
+
+class TestFileStorageDurability(unittest.TestCase):
+    """Test cases for the atomic writes and durability modes"""
+
+    def setUp(self):
+        """Creates a temporary directory"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_unknown_durability_mode_raises(self):
+        """Tests whether an unknown durability mode is rejected"""
+        with self.assertRaises(ValueError):
+            FileStorage(self.file_path, durability="sometimes")
+
+    def test_interrupted_save_keeps_previous_file(self):
+        """Tests whether a failing save leaves the file untouched"""
+        storage = FileStorage(self.file_path)
+        storage.new(BaseModel())
+        storage.save()
+        with open(self.file_path, 'r') as f:
+            content = f.read()
+
+        storage.new(BaseModel())
+        with unittest.mock.patch(
+                "models.engine.serializers.JSONCodec.dump",
+                side_effect=OSError):
+            with self.assertRaises(OSError):
+                storage.save()
+        with open(self.file_path, 'r') as f:
+            self.assertEqual(f.read(), content)
+
+    def test_fsync_mode_syncs_every_save(self):
+        """Tests whether the fsync mode forces each save to disk"""
+        storage = FileStorage(self.file_path, durability="fsync")
+        storage.new(BaseModel())
+        with unittest.mock.patch("os.fsync") as mock_fsync:
+            storage.save()
+            self.assertEqual(mock_fsync.call_count, 2)
+
+    def test_group_mode_syncs_once_per_window(self):
+        """Tests whether the group mode shares one sync between saves"""
+        storage = FileStorage(self.file_path, journal=True,
+                              durability="group", group_commit_ms=50)
+        with unittest.mock.patch.object(FileStorage, "sync") as mock_sync:
+            for _ in range(5):
+                storage.new(BaseModel())
+                storage.save()
+            mock_sync.assert_not_called()
+            time.sleep(0.2)
+            mock_sync.assert_called_once()
+
+
+class TestFileStorageDirtyTracking(unittest.TestCase):
+    """Test cases for the dirty tracking of FileStorage"""
+
+    def setUp(self):
+        """Makes a temporary storage the storage of the models"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.storage = FileStorage(
+            os.path.join(self.tmp_dir.name, "file.json"), journal=True)
+        patcher = unittest.mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_new_and_changed_objects_are_dirty(self):
+        """Tests whether new and modified objects are in the dirty set"""
+        bs_mdl = BaseModel()
+        key = f"BaseModel.{bs_mdl.id}"
+        self.assertEqual(self.storage.dirty, {key})
+        bs_mdl.save()
+        self.assertEqual(self.storage.dirty, set())
+        self.assertFalse(self.storage.is_dirty(bs_mdl))
+
+        bs_mdl.name = "changed"
+        self.assertEqual(self.storage.dirty, {key})
+        self.assertTrue(self.storage.is_dirty(bs_mdl))
+
+    def test_deleted_objects_are_dirty(self):
+        """Tests whether deleted objects are in the dirty set"""
+        bs_mdl = BaseModel()
+        bs_mdl.save()
+        self.storage.delete(bs_mdl)
+        self.assertEqual(self.storage.dirty, {f"BaseModel.{bs_mdl.id}"})
+
+    def test_saving_unchanged_object_keeps_updated_at(self):
+        """Tests whether save keeps updated_at of an unchanged object"""
+        bs_mdl = BaseModel()
+        bs_mdl.save()
+        updated_at = bs_mdl.updated_at
+        bs_mdl.save()
+        self.assertEqual(bs_mdl.updated_at, updated_at)
+        self.assertEqual(self.storage.dirty, set())
+
+    def test_saving_object_changed_in_place(self):
+        """Tests whether save writes a list changed in place"""
+        place = Place()
+        place.amenity_ids = []
+        place.save()
+        place.amenity_ids.append("a1")
+        place.save()
+        storage = FileStorage(
+            os.path.join(self.tmp_dir.name, "file.json"), journal=True)
+        storage.reload()
+        self.assertEqual(
+            storage.get(Place, place.id).amenity_ids, ["a1"])
+
+    def test_objects_not_stored_are_dirty(self):
+        """Tests whether an object built from a dict is saved"""
+        bs_mdl = BaseModel(id="1234", created_at="2024-03-10T20:19:26",
+                           updated_at="2024-03-10T20:19:26")
+        self.assertTrue(self.storage.is_dirty(bs_mdl))
+        bs_mdl.save()
+        self.assertIs(self.storage.get(BaseModel, "1234"), bs_mdl)
+
+    def test_journal_only_writes_dirty_objects(self):
+        """Tests whether a journal save appends only the changed objects"""
+        objs = [BaseModel() for _ in range(3)]
+        self.storage.save()
+        objs[1].name = "changed"
+        self.storage.save()
+
+        with open(self.storage.journal_path, 'r') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[-1]["value"]["name"], "changed")
+
+
+class TestFileStorageIndexes(unittest.TestCase):
+    """Test cases for the secondary indexes of FileStorage"""
+
+    def setUp(self):
+        """Makes a temporary storage the storage of the models"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path)
+        patcher = unittest.mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_lookup_follows_new_update_and_delete(self):
+        """Tests whether the index follows the changes of the objects"""
+        reviews = [Review() for _ in range(3)]
+        for review in reviews:
+            review.place_id = "p1"
+        reviews[2].place_id = "p2"
+
+        self.assertEqual(self.storage.lookup(Review, "place_id", "p1"),
+                         {f"Review.{r.id}": r for r in reviews[:2]})
+        self.storage.delete(reviews[0])
+        self.assertEqual(list(self.storage.lookup("Review", "place_id",
+                                                  "p1").values()),
+                         [reviews[1]])
+        self.assertEqual(self.storage.lookup(Review, "user_id", ""),
+                         {f"Review.{r.id}": r for r in reviews[1:]})
+        self.assertEqual(self.storage.lookup(Review, "place_id", "p3"), {})
+
+    def test_lookup_of_field_not_indexed(self):
+        """Tests whether only the indexed fields can be looked up"""
+        with self.assertRaises(ValueError):
+            self.storage.lookup(Review, "text", "")
+
+    def test_unregistered_subclass_is_stored(self):
+        """Tests whether objects of a class not registered are stored"""
+        class Draft(BaseModel):
+            """Model class missing from the registry"""
+            place_id = ""
+
+        draft = Draft()
+        draft.place_id = "p1"
+        self.assertIs(self.storage.get(Draft, draft.id), draft)
+        self.assertEqual(self.storage.count(Draft), 1)
+
+    def test_index_lookup_of_numbers_set_as_strings(self):
+        """Tests whether where finds the string of a number in an index"""
+        patcher = unittest.mock.patch.object(
+            Place, "_indexes", ("number_rooms",), create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        places = [Place(), Place()]
+        places[0].number_rooms = "3"
+        places[1].number_rooms = 3
+        with unittest.mock.patch.object(self.storage, "all") as mock_all:
+            found = list(self.storage.where(Place, number_rooms=3))
+            mock_all.assert_not_called()
+        self.assertCountEqual(found, places)
+        self.assertEqual(list(self.storage.where(Place, number_rooms="3")),
+                         places[:1])
+
+    def test_indexes_are_rebuilt_on_reload(self):
+        """Tests whether reload indexes the loaded objects, even lazily"""
+        city = City()
+        city.state_id = "s1"
+        city.save()
+        for lazy in (False, True):
+            storage = FileStorage(self.file_path, lazy=lazy)
+            storage.reload()
+            found = storage.lookup(City, "state_id", "s1")
+            self.assertEqual(list(found), [f"City.{city.id}"])
+            self.assertEqual(found[f"City.{city.id}"].id, city.id)
+
+    def test_where_uses_index(self):
+        """Tests whether where only scans the objects of an index entry"""
+        places = [Place() for _ in range(3)]
+        for price, place in zip([50, 150, 250], places):
+            place.city_id = "c1"
+            place.price_by_night = price
+        places[0].city_id = "c2"
+
+        with unittest.mock.patch.object(self.storage, "all") as mock_all:
+            found = list(self.storage.where(Place, city_id="c1",
+                                            price_by_night__lt=200))
+            mock_all.assert_not_called()
+        self.assertEqual(found, [places[1]])
+
+
+class TestFileStorageThreadSafe(unittest.TestCase):
+    """Test cases for the thread-safe mode of FileStorage"""
+
+    def setUp(self):
+        """Makes a temporary thread-safe storage the storage of the models"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path, threadsafe=True)
+        patcher = unittest.mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.storage.flush()
+        self.tmp_dir.cleanup()
+
+    def test_save_is_written_by_writer_thread(self):
+        """Tests whether flush waits for the queued saves"""
+        place = Place()
+        place.save()
+        self.storage.flush()
+        with open(self.file_path, 'r') as f:
+            self.assertIn(f"Place.{place.id}", json.load(f))
+
+    def test_all_returns_a_copy(self):
+        """Tests whether all() can be iterated while objects are added"""
+        BaseModel()
+        for _ in self.storage.all():
+            BaseModel()
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_concurrent_access(self):
+        """Hammers the storage from many threads at once"""
+        errors = []
+        created = {}
+
+        def work(n):
+            try:
+                mine = []
+                for i in range(50):
+                    review = Review()
+                    review.place_id = f"p{n}"
+                    review.save()
+                    mine.append(review)
+                    self.storage.get(Review, mine[i // 2].id)
+                    self.storage.all(Review)
+                    list(self.storage.where(Review, place_id=f"p{n}"))
+                    if i % 5 == 0:
+                        self.storage.delete(mine.pop(0))
+                        self.storage.save()
+                created[n] = mine
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(n,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.storage.flush()
+
+        self.assertEqual(errors, [])
+        for n, mine in created.items():
+            self.assertEqual(set(self.storage.lookup(Review, "place_id",
+                                                     f"p{n}")),
+                             {f"Review.{r.id}" for r in mine})
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(set(storage.all()), set(self.storage.all()))
+
+
+class TestFileStorageShared(unittest.TestCase):
+    """Test cases for the shared mode of FileStorage"""
+
+    def setUp(self):
+        """Creates a temporary directory"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def open_storage(self, journal=False):
+        """Returns a reloaded shared storage of the temporary file"""
+        storage = FileStorage(self.file_path, journal=journal, shared=True)
+        storage.reload()
+        return storage
+
+    def test_saves_merge_changes_of_other_storages(self):
+        """Tests whether a save keeps what another process saved"""
+        for journal in (False, True):
+            first = self.open_storage(journal)
+            kept, deleted = Place(), Place()
+            first.new(kept)
+            first.new(deleted)
+            first.save()
+            second = self.open_storage(journal)
+
+            kept.name = "first"
+            kept.updated_at = datetime.now()
+            first.new(kept)
+            first.delete(deleted)
+            first.save()
+            added = BaseModel()
+            second.new(added)
+            second.save()
+
+            self.assertEqual(second.get(Place, kept.id).name, "first")
+            self.assertIsNone(second.get(Place, deleted.id))
+            self.assertEqual(set(self.open_storage(journal).all()),
+                             {f"Place.{kept.id}", f"BaseModel.{added.id}"})
+            for path in (self.file_path, f"{self.file_path}.log"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_refresh_only_reads_journal_growth(self):
+        """Tests whether refresh reads only what changed"""
+        first = self.open_storage(journal=True)
+        first.new(BaseModel())
+        first.save()
+        second = self.open_storage(journal=True)
+        obj = BaseModel()
+        first.new(obj)
+        first.save()
+
+        with unittest.mock.patch("builtins.open", wraps=open) as mock_open:
+            second.refresh()
+            second.refresh()
+        self.assertEqual([c.args[0] for c in mock_open.call_args_list],
+                         [second.journal_path])
+        self.assertIs(second.get(BaseModel, obj.id).__class__, BaseModel)
+
+    def test_processes_do_not_lose_updates(self):
+        """Tests whether concurrent processes keep every object"""
+        script = (
+            "import sys\n"
+            "from models.base_model import BaseModel\n"
+            "from models.engine.file_storage import FileStorage\n"
+            "storage = FileStorage(sys.argv[1], shared=True)\n"
+            "storage.reload()\n"
+            "for i in range(20):\n"
+            "    storage.new(BaseModel(id=f'{sys.argv[2]}-{i}'))\n"
+            "    storage.save()\n")
+        workers = [subprocess.Popen([sys.executable, "-c", script,
+                                     self.file_path, str(n)])
+                   for n in range(4)]
+        for worker in workers:
+            self.assertEqual(worker.wait(timeout=60), 0)
+        self.assertEqual(self.open_storage().count(BaseModel), 80)
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    """Test cases for the journal mode of FileStorage"""
+
+    def setUp(self):
+        """Creates a journaled storage inside a temporary directory"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path, journal=True)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_save_appends_only_changed_objects(self):
+        """Tests whether save appends one record per changed object"""
+        for _ in range(3):
+            self.storage.new(BaseModel())
+        self.storage.save()
+        bs_mdl = BaseModel()
+        self.storage.new(bs_mdl)
+        self.storage.save()
+
+        with open(self.storage.journal_path, 'r') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[-1]["key"], f"BaseModel.{bs_mdl.id}")
+        self.assertFalse(os.path.exists(self.file_path))
+
+    def test_reload_replays_journal(self):
+        """Tests whether reload replays upserts and deletions"""
+        kept, deleted = BaseModel(), BaseModel()
+        self.storage.new(kept)
+        self.storage.new(deleted)
+        self.storage.save()
+        kept.name = "kept"
+        self.storage.new(kept)
+        self.storage.delete(deleted)
+        self.storage.save()
+
+        storage = FileStorage(self.file_path, journal=True)
+        storage.reload()
+        self.assertEqual(list(storage.all().keys()), [f"BaseModel.{kept.id}"])
+        self.assertEqual(storage.all()[f"BaseModel.{kept.id}"].name, "kept")
+
+    def test_compact_folds_journal_into_snapshot(self):
+        """Tests whether compact rewrites the snapshot and drops the log"""
+        bs_mdl = BaseModel()
+        self.storage.new(bs_mdl)
+        self.storage.save()
+        self.storage.compact()
+
+        self.assertFalse(os.path.exists(self.storage.journal_path))
+        with open(self.file_path, 'r') as f:
+            self.assertIn(f"BaseModel.{bs_mdl.id}", json.load(f))
+
+    def test_reload_ignores_torn_last_record(self):
+        """Tests whether an interrupted journal write is ignored"""
+        bs_mdl = BaseModel()
+        self.storage.new(bs_mdl)
+        self.storage.save()
+        with open(self.storage.journal_path, 'a') as f:
+            f.write('{"key": "BaseModel.x", "val')
+
+        storage = FileStorage(self.file_path, journal=True)
+        storage.reload()
+        self.assertEqual(list(storage.all().keys()),
+                         [f"BaseModel.{bs_mdl.id}"])
+
+    def test_lazy_records_count_towards_compaction(self):
+        """Tests whether records not instantiated delay the compaction"""
+        for _ in range(10):
+            self.storage.new(BaseModel())
+        self.storage.save()
+        self.storage.compact()
+        storage = FileStorage(self.file_path, journal=True, lazy=True)
+        storage.compact_threshold = 1
+        storage.reload()
+        obj = BaseModel()
+        with unittest.mock.patch.object(storage, "compact") as m:
+            for i in range(3):
+                obj.name = str(i)
+                storage.new(obj)
+                storage.save()
+            m.assert_not_called()
+
+    def test_saves_after_torn_record_are_kept(self):
+        """Tests whether records appended after a torn write are read"""
+        first = BaseModel()
+        self.storage.new(first)
+        self.storage.save()
+        with open(self.storage.journal_path, 'a') as f:
+            f.write('{"key": "BaseModel.x", "val')
+        objs = [BaseModel() for _ in range(3)]
+        for obj in objs:
+            self.storage.new(obj)
+            self.storage.save()
+        storage = FileStorage(self.file_path, journal=True)
+        storage.reload()
+        self.assertEqual(set(storage.all()),
+                         {f"BaseModel.{o.id}" for o in [first] + objs})
+
+    def test_reload_truncates_torn_record(self):
+        """Tests whether reload cuts the journal after its last record"""
+        first = BaseModel()
+        self.storage.new(first)
+        self.storage.save()
+        size = os.path.getsize(self.storage.journal_path)
+        with open(self.storage.journal_path, 'a') as f:
+            f.write('{"key": "BaseModel.x", "val')
+        storage = FileStorage(self.file_path, journal=True)
+        storage.reload()
+        self.assertEqual(os.path.getsize(storage.journal_path), size)
+        second = BaseModel()
+        storage.new(second)
+        storage.save()
+        storage = FileStorage(self.file_path, journal=True)
+        storage.reload()
+        self.assertEqual(set(storage.all()), {f"BaseModel.{first.id}",
+                                              f"BaseModel.{second.id}"})
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Test cases for the lazy reload mode of FileStorage"""
+
+    def setUp(self):
+        """Saves a few objects to a temporary file"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        storage = FileStorage(self.file_path)
+        self.places = [Place() for _ in range(3)]
+        for obj in self.places + [BaseModel()]:
+            storage.new(obj)
+        storage.save()
+        self.storage = FileStorage(self.file_path, lazy=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_reload_does_not_instantiate_objects(self):
+        """Tests whether count works before any object is instantiated"""
+        with unittest.mock.patch.object(FileStorage, "get_class") as m:
+            self.assertEqual(self.storage.count(), 4)
+            self.assertEqual(self.storage.count(Place), 3)
+            m.assert_not_called()
+
+    def test_get_instantiates_a_single_object(self):
+        """Tests whether get only instantiates the requested object"""
+        obj = self.storage.get(Place, self.places[0].id)
+        self.assertIsInstance(obj, Place)
+        self.assertEqual(obj.to_dict(), self.places[0].to_dict())
+        self.assertIs(self.storage.get("Place", self.places[0].id), obj)
+        self.assertIsNone(self.storage.get(Place, "missing"))
+
+    def test_all_instantiates_every_object(self):
+        """Tests whether all returns the same objects as an eager reload"""
+        expected = {f"Place.{obj.id}": obj.to_dict() for obj in self.places}
+        self.assertEqual({k: v.to_dict()
+                          for k, v in self.storage.all(Place).items()},
+                         expected)
+        self.assertEqual(len(self.storage.all()), 4)
+
+    def test_save_keeps_objects_never_accessed(self):
+        """Tests whether saving writes back records never instantiated"""
+        self.storage.delete(self.storage.get(Place, self.places[0].id))
+        self.storage.save()
+
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(storage.count(Place), 2)
+        self.assertEqual(storage.count(), 3)
+
+
+class TestFileStorageSharded(unittest.TestCase):
+    """Test cases for the sharded layout of FileStorage"""
+
+    def setUp(self):
+        """Saves a few objects to a temporary shards directory"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.d")
+        storage = FileStorage(self.file_path, buckets=4)
+        self.places = [Place() for _ in range(8)]
+        self.city = City()
+        for obj in self.places + [self.city]:
+            storage.new(obj)
+        storage.save()
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def shards(self):
+        """Returns the names of the shard files"""
+        return sorted(os.listdir(self.file_path))
+
+    def test_round_trip(self):
+        """Tests whether reload reads back every saved object"""
+        self.assertTrue(all(name.startswith(("City.", "Place."))
+                            for name in self.shards()))
+        storage = FileStorage(self.file_path, buckets=4)
+        storage.reload()
+        self.assertEqual(storage.count(), 9)
+        self.assertEqual({k: v.to_dict()
+                          for k, v in storage.all(Place).items()},
+                         {f"Place.{p.id}": p.to_dict() for p in self.places})
+
+    def test_reload_reads_classes_on_access(self):
+        """Tests whether only the shards of the accessed class are read"""
+        storage = FileStorage(self.file_path, buckets=4)
+        storage.reload()
+        with unittest.mock.patch("builtins.open",
+                                 side_effect=open) as m:
+            self.assertIsNotNone(storage.get(City, self.city.id))
+        self.assertEqual([os.path.basename(c.args[0])
+                          for c in m.call_args_list],
+                         [name for name in self.shards()
+                          if name.startswith("City.")])
+
+    def test_save_rewrites_changed_shards(self):
+        """Tests whether save only rewrites the shards of changed objects"""
+        storage = FileStorage(self.file_path, buckets=4)
+        storage.reload()
+        place = storage.get(Place, self.places[0].id)
+        place.name = "changed"
+        storage.new(place)
+        with unittest.mock.patch("builtins.open",
+                                 side_effect=open) as m:
+            storage.save()
+        written = [c.args[0] for c in m.call_args_list if "w" in c.args[1]
+                   and c.args[0].startswith(self.file_path + os.sep)]
+        self.assertEqual(len(written), 1)
+        self.assertTrue(os.path.basename(written[0]).startswith("Place."))
+
+        storage = FileStorage(self.file_path, buckets=4)
+        storage.reload()
+        self.assertEqual(storage.get(Place, place.id).name, "changed")
+        self.assertEqual(storage.count(Place), 8)
+
+    def test_delete_before_access(self):
+        """Tests whether objects of shards not read yet can be deleted"""
+        storage = FileStorage(self.file_path, buckets=4)
+        storage.reload()
+        storage.delete(self.city)
+        storage.save()
+        storage = FileStorage(self.file_path, buckets=4)
+        storage.reload()
+        self.assertEqual(storage.count(City), 0)
+        self.assertEqual(storage.count(), 8)
+
+    def test_bucket_count_change_removes_stale_shards(self):
+        """Tests whether saving with another bucket count moves objects"""
+        storage = FileStorage(self.file_path, buckets=1)
+        storage.reload()
+        place = storage.get(Place, self.places[0].id)
+        place.name = "moved"
+        storage.new(place)
+        storage.save()
+        self.assertIn("Place.0.json", self.shards())
+        self.assertFalse(any(name.startswith("Place.")
+                             and name != "Place.0.json"
+                             for name in self.shards()))
+        storage.compact()
+        self.assertEqual(self.shards(), ["City.0.json", "Place.0.json"])
+        storage = FileStorage(self.file_path, buckets=1)
+        storage.reload()
+        self.assertEqual(storage.count(), 9)
+
+    def test_rejects_journal_and_shared(self):
+        """Tests whether the sharded layout cannot be journaled or shared"""
+        with self.assertRaises(ValueError):
+            FileStorage(self.file_path, buckets=4, journal=True)
+        with self.assertRaises(ValueError):
+            FileStorage(self.file_path, buckets=4, shared=True)
+
+
+class TestFileStorageBulk(unittest.TestCase):
+    """Test cases for the bulk import and export of FileStorage"""
+
+    def setUp(self):
+        """Creates a storage inside a temporary directory"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_import_saves_once(self):
+        """Tests whether import_objects adds every record with one save"""
+        records = [Place(name=f"p{i}").to_dict() for i in range(5)]
+        records.append(City(name="c").to_dict())
+        with unittest.mock.patch(
+                "models.engine.serializers.JSONCodec.dump",
+                autospec=True, side_effect=JSONCodec.dump) as m:
+            self.assertEqual(self.storage.import_objects(records, Place), 5)
+            m.assert_called_once()
+
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(storage.count(), 5)
+        self.assertEqual(storage.get(Place, records[0]["id"]).name, "p0")
+
+    def test_import_rolls_back_invalid_records(self):
+        """Tests whether an unknown class leaves the objects unchanged"""
+        records = [Place().to_dict(), {"__class__": "Nope", "id": "x"}]
+        with self.assertRaises(ValueError):
+            self.storage.import_objects(records)
+        self.assertEqual(self.storage.count(), 0)
+
+    def test_import_rolls_back_inside_a_batch(self):
+        """Tests whether an invalid record is rolled back in a batch"""
+        records = [Place().to_dict(), Place().to_dict(),
+                   {"__class__": "Nope", "id": "x"}]
+        with self.storage.batch():
+            with self.assertRaises(ValueError):
+                self.storage.import_objects(records)
+            self.assertEqual(self.storage.count(), 0)
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(storage.count(), 0)
+
+    def test_csv_round_trip(self):
+        """Tests whether objects written as CSV are read back unchanged"""
+        place = Place(name="a, b", price_by_night=120, latitude=1.5,
+                      amenity_ids=["x", "y"], rating="extra")
+        self.storage.new(place)
+        stream = StringIO()
+        self.assertEqual(write_records(self.storage.export_objects(Place),
+                                       stream, "csv", Place), 1)
+        stream.seek(0)
+        records = list(read_records(stream, "csv", Place))
+        self.assertEqual(records, [place.to_dict()])
+        with self.assertRaises(ValueError):
+            read_records(stream, "csv")
+
+    def test_csv_round_trip_of_strings_in_numeric_fields(self):
+        """Tests whether strings set by the console in numbers are kept"""
+        places = [Place(number_rooms="two", price_by_night="49.5"),
+                  Place(number_rooms="3", latitude="north")]
+        for place in places:
+            self.storage.new(place)
+        stream = StringIO()
+        write_records(self.storage.export_objects(Place), stream, "csv",
+                      Place)
+        stream.seek(0)
+        storage = FileStorage(os.path.join(self.tmp_dir.name, "new.json"))
+        self.assertEqual(storage.import_objects(
+            read_records(stream, "csv", Place), Place), 2)
+        self.assertEqual(storage.get(Place, places[0].id).number_rooms,
+                         "two")
+        self.assertEqual(storage.get(Place, places[0].id).price_by_night,
+                         "49.5")
+        self.assertEqual(storage.get(Place, places[1].id).number_rooms, 3)
+        self.assertEqual(storage.get(Place, places[1].id).latitude, "north")
+
+
+class TestFileStorageGeo(unittest.TestCase):
+    """Test cases for the queries of the places near a point"""
+
+    def setUp(self):
+        """Saves places in Paris, London and one without coordinates"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path)
+        self.paris = Place(name="paris", latitude=48.8566, longitude=2.3522)
+        self.versailles = Place(name="versailles", latitude="48.8049",
+                                longitude="2.1204")
+        self.london = Place(name="london", latitude=51.5074,
+                            longitude=-0.1278)
+        self.unknown = Place(name="unknown", latitude="?")
+        for obj in (self.paris, self.versailles, self.london, self.unknown):
+            self.storage.new(obj)
+        self.storage.save()
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def names(self, objects):
+        """Returns the names of objects"""
+        return [obj.name for obj in objects]
+
+    def test_near_and_nearest(self):
+        """Tests whether the places are found nearest first"""
+        self.assertEqual(self.names(self.storage.near(Place, 48.85, 2.35,
+                                                      30)),
+                         ["paris", "versailles"])
+        self.assertEqual(self.names(self.storage.near(Place, 48.85, 2.35,
+                                                      400)),
+                         ["paris", "versailles", "london"])
+        self.assertEqual(self.names(self.storage.nearest(Place, 51, 0, 2)),
+                         ["london", "versailles"])
+        with self.assertRaises(ValueError):
+            self.storage.near(City, 0, 0, 10)
+
+    def test_index_follows_changes(self):
+        """Tests whether moved and deleted places are found where they are"""
+        self.london.latitude, self.london.longitude = 48.86, 2.36
+        self.storage.new(self.london)
+        self.storage.delete(self.versailles)
+        self.assertEqual(self.names(self.storage.near(Place, 48.85, 2.35,
+                                                      30)),
+                         ["paris", "london"])
+
+    def test_index_is_rebuilt_by_reload(self):
+        """Tests whether reload indexes the places in lazy mode"""
+        storage = FileStorage(self.file_path, lazy=True)
+        storage.reload()
+        self.assertEqual(self.names(storage.nearest(Place, 0, 0, 4)),
+                         ["versailles", "paris", "london"])
+
+
+class TestFileStorageStats(unittest.TestCase):
+    """Test cases for the aggregation of the fields of FileStorage"""
+
+    def setUp(self):
+        """Saves places of two cities"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path)
+        self.places = [Place(city_id=city, price_by_night=price)
+                       for city, price in (("a", 10), ("a", "30"),
+                                           ("b", 50), ("b", "?"))]
+        for obj in self.places:
+            self.storage.new(obj)
+        self.storage.save()
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def test_stats(self):
+        """Tests the statistics of a field, overall and by city"""
+        result = self.storage.stats(Place, "price_by_night", percentiles=())
+        self.assertEqual(result, {"count": 3, "sum": 90.0, "min": 10.0,
+                                  "max": 50.0, "avg": 30.0})
+        result = self.storage.stats("Place", "price_by_night", by="city_id",
+                                    percentiles=(50,))
+        self.assertEqual({k: (v["count"], v["p50"])
+                          for k, v in result.items()},
+                         {"a": (2, 20.0), "b": (1, 50.0)})
+
+    def test_columns_are_cached_until_a_change(self):
+        """Tests whether the columns are rebuilt after a change only"""
+        self.storage.stats(Place, "price_by_night", by="city_id")
+        with unittest.mock.patch("models.engine.aggregate.to_number",
+                                 side_effect=to_number) as m:
+            self.storage.stats(Place, "price_by_night", by="city_id")
+            m.assert_not_called()
+            self.places[0].price_by_night = 70
+            self.storage.new(self.places[0])
+            result = self.storage.stats(Place, "price_by_night")
+            self.assertEqual(m.call_count, len(self.places))
+        self.assertEqual(result["max"], 70.0)
+
+    def test_lazy_records_are_not_instantiated(self):
+        """Tests whether stats reads the records in lazy mode"""
+        storage = FileStorage(self.file_path, lazy=True)
+        storage.reload()
+        storage.get(Place, self.places[2].id)
+        with unittest.mock.patch.object(Place, "__init__",
+                                        side_effect=AssertionError):
+            result = storage.stats(Place, "price_by_night", by="city_id")
+        self.assertEqual(result["a"]["sum"], 40.0)
+        self.assertEqual(result["b"]["sum"], 50.0)
+
+
+class TestFileStorageSearch(unittest.TestCase):
+    """Test cases for the full-text search of FileStorage"""
+
+    def setUp(self):
+        """Saves reviews and a place"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "file.json")
+        self.storage = FileStorage(self.file_path)
+        self.reviews = [Review(text=text) for text in (
+            "great stay, very clean", "dirty room, not great", "quiet")]
+        self.place = Place(name="Clean loft", description="near the park")
+        for obj in self.reviews + [self.place]:
+            self.storage.new(obj)
+        self.storage.save()
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def texts(self, storage, query):
+        """Returns the text of the reviews found by storage"""
+        return [r.text for r in storage.search(Review, query)]
+
+    def test_search(self):
+        """Tests the ranking of the objects and the errors"""
+        self.assertEqual(self.texts(self.storage, "clean great"),
+                         ["great stay, very clean", "dirty room, not great"])
+        self.assertEqual(self.storage.search("Place", "CLEAN park"),
+                         [self.place])
+        self.assertEqual(self.storage.search(Review, "pool"), [])
+        with self.assertRaises(ValueError):
+            self.storage.search(City, "paris")
+
+    def test_changes_are_indexed(self):
+        """Tests whether updated and deleted objects are reindexed"""
+        self.reviews[0].text = "awful"
+        self.storage.new(self.reviews[0])
+        self.storage.delete(self.reviews[1])
+        self.assertEqual(self.texts(self.storage, "great"), [])
+        self.assertEqual(self.texts(self.storage, "awful"), ["awful"])
+        self.storage.save()
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(self.texts(storage, "awful great"), ["awful"])
+
+    def test_reload_reads_the_index(self):
+        """Tests whether reload() reads the saved index back"""
+        self.assertTrue(os.path.isfile(self.storage.search_path))
+        storage = FileStorage(self.file_path)
+        with unittest.mock.patch.object(TextIndex, "add") as m:
+            storage.reload()
+            m.assert_not_called()
+        self.assertEqual(self.texts(storage, "clean"),
+                         ["great stay, very clean"])
+
+    def test_stale_index_is_rebuilt(self):
+        """Tests whether the index is rebuilt when the file changed"""
+        with open(self.file_path, encoding="utf-8") as f:
+            records = json.load(f)
+        records[f"Review.{self.reviews[2].id}"]["text"] = "loud"
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        storage = FileStorage(self.file_path)
+        storage.reload()
+        self.assertEqual(self.texts(storage, "quiet loud"), ["loud"])
+
+    def test_journal(self):
+        """Tests the index of the journal mode, written by compact()"""
+        storage = FileStorage(self.file_path, journal=True)
+        storage.reload()
+        review = Review(text="quiet garden")
+        storage.new(review)
+        storage.save()
+        storage = FileStorage(self.file_path, journal=True)
+        storage.reload()
+        self.assertEqual(self.texts(storage, "garden"), ["quiet garden"])
+        storage.compact()
+        storage = FileStorage(self.file_path, journal=True)
+        with unittest.mock.patch.object(TextIndex, "add") as m:
+            storage.reload()
+            m.assert_not_called()
+        self.assertEqual(self.texts(storage, "quiet"),
+                         ["quiet", "quiet garden"])
+
+
 if __name__ == '__main__':
     unittest.main()
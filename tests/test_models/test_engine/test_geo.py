@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""Module test_geo
+
+This Module contains tests for the GridIndex Class
+"""
+
+import random
+import unittest
+
+from models.engine.geo import GridIndex, bounding_box, haversine
+
+
+class TestGridIndex(unittest.TestCase):
+    """Test cases for the GridIndex Class"""
+
+    def setUp(self):
+        """Indexes random points, with some around the antimeridian"""
+        rnd = random.Random(0)
+        self.points = {i: (rnd.uniform(-90, 90), rnd.uniform(-180, 180))
+                       for i in range(2000)}
+        self.points.update({f"edge{i}": (rnd.uniform(-10, 10),
+                                         rnd.choice((-179.99, 179.99)))
+                            for i in range(50)})
+        self.index = GridIndex()
+        for key, (lat, lon) in self.points.items():
+            self.index.add(key, lat, lon)
+
+    def scan(self, lat, lon):
+        """Returns every point sorted by its distance to a point"""
+        return sorted(((haversine(lat, lon, *point), str(key)), key)
+                      for key, point in self.points.items())
+
+    def test_haversine(self):
+        """Tests the distance between Paris and London"""
+        self.assertAlmostEqual(haversine(48.8566, 2.3522, 51.5074, -0.1278),
+                               343.5, delta=0.5)
+
+    def test_bounding_box_crossing_the_antimeridian(self):
+        """Tests whether the longitudes are split at the antimeridian"""
+        lats, lons = bounding_box(0, 179.9, 100)
+        self.assertEqual(len(lons), 2)
+        self.assertEqual(bounding_box(89.9, 0, 100)[1], [(-180.0, 180.0)])
+
+    def test_within_matches_a_scan(self):
+        """Tests whether within finds the points a scan finds"""
+        for lat, lon in ((0, 180), (0, -179.9), (89.5, 10), (45, 45)):
+            for radius in (50, 500, 5000):
+                expected = [(d, key) for (d, _), key in self.scan(lat, lon)
+                            if d <= radius]
+                self.assertEqual(
+                    [key for _, key in self.index.within(lat, lon, radius)],
+                    [key for _, key in expected])
+
+    def test_nearest_matches_a_scan(self):
+        """Tests whether nearest returns the k nearest points"""
+        for k in (1, 10, 3000):
+            expected = [key for _, key in self.scan(0, 179.995)][:k]
+            self.assertEqual(
+                [key for _, key in self.index.nearest(0, 179.995, k)],
+                expected)
+
+    def test_add_moves_and_remove_drops_points(self):
+        """Tests whether points can be moved and removed"""
+        self.index.add(0, 10.0, 10.0)
+        self.assertEqual(self.index.nearest(10.0, 10.0)[0], (0.0, 0))
+        self.index.remove(0)
+        self.index.remove(0)
+        self.assertNotEqual(self.index.nearest(10.0, 10.0)[0][1], 0)
+        self.assertEqual(len(self.index), len(self.points) - 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
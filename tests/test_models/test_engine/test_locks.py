@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""Module test_locks
+
+This Module contains tests for the RWLock Class
+"""
+
+import threading
+import unittest
+
+from models.engine.locks import RWLock
+
+
+class TestRWLock(unittest.TestCase):
+    """Test cases for the RWLock Class"""
+
+    def setUp(self):
+        """Creates the lock under test"""
+        self.lock = RWLock()
+
+    def test_readers_share_the_lock(self):
+        """Tests whether several threads can read at the same time"""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def read():
+            with self.lock.read():
+                barrier.wait()
+
+        threads = [threading.Thread(target=read) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(barrier.broken)
+
+    def test_writer_excludes_readers(self):
+        """Tests whether a reader waits for the writer"""
+        events = []
+
+        def read():
+            with self.lock.read():
+                events.append("read")
+
+        with self.lock.write():
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(0.05)
+            events.append("written")
+        reader.join()
+        self.assertEqual(events, ["written", "read"])
+
+    def test_reentrant_holds(self):
+        """Tests whether the holds can be nested, but not upgraded"""
+        with self.lock.write():
+            with self.lock.write():
+                with self.lock.read():
+                    pass
+        with self.lock.read():
+            with self.lock.read():
+                pass
+            with self.assertRaises(RuntimeError):
+                with self.lock.write():
+                    pass
+
+
+if __name__ == '__main__':
+    unittest.main()
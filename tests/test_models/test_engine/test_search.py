@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Module test_search
+
+This Module contains tests for the TextIndex Class
+"""
+
+import unittest
+
+from models.engine.search import TextIndex, tokenize
+
+
+class TestTextIndex(unittest.TestCase):
+    """Test cases for the TextIndex Class"""
+
+    def setUp(self):
+        """Indexes a few reviews"""
+        self.index = TextIndex()
+        self.index.add("a", "Great stay, very clean and quiet")
+        self.index.add("b", "Dirty room. Not great at all, not clean")
+        self.index.add("c", "Quiet street; quiet, quiet nights")
+
+    def test_tokenize(self):
+        """Tests whether text is split into lowercase words"""
+        self.assertEqual(tokenize("Très CLEAN, l'été!"),
+                         ["très", "clean", "l", "été"])
+
+    def test_search_ranks_documents(self):
+        """Tests the order and limit of the documents found"""
+        self.assertEqual([k for _, k in self.index.search("quiet")],
+                         ["c", "a"])
+        self.assertEqual([k for _, k in self.index.search("clean quiet")],
+                         ["a", "c", "b"])
+        self.assertEqual([k for _, k in self.index.search("QUIET", 1)],
+                         ["c"])
+        self.assertEqual(self.index.search("pool"), [])
+
+    def test_add_and_remove(self):
+        """Tests whether documents are replaced and removed"""
+        self.index.add("c", "a pool")
+        self.assertEqual([k for _, k in self.index.search("quiet")], ["a"])
+        self.assertEqual([k for _, k in self.index.search("pool")], ["c"])
+        self.index.remove("a")
+        self.index.remove("missing")
+        self.assertEqual(self.index.search("quiet"), [])
+        self.index.add("b", "")
+        self.assertEqual(len(self.index), 1)
+
+    def test_dumps_and_loads(self):
+        """Tests whether a loaded index ranks as the original"""
+        index = TextIndex.loads(self.index.dumps())
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.search("clean quiet"),
+                         self.index.search("clean quiet"))
+        index.remove("c")
+        self.assertEqual([k for _, k in index.search("quiet")], ["a"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""Module test_serializers
+
+This Module contains tests for the codecs of FileStorage
+"""
+
+import os
+import tempfile
+import unittest
+
+from models.base_model import BaseModel
+from models.engine import serializers
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import convert, get_codec
+from models.place import Place
+
+
+class TestGetCodec(unittest.TestCase):
+    """Test cases for the get_codec function"""
+
+    def test_codec_is_picked_from_extension(self):
+        """Tests whether the extension of the file selects the codec"""
+        self.assertEqual(get_codec(path="file.json").name, "json")
+        self.assertEqual(get_codec(path="file.hbnb").name, "binary")
+        self.assertEqual(get_codec(path="file").name, "json")
+
+    def test_name_takes_precedence_over_extension(self):
+        """Tests whether an explicit name overrides the extension"""
+        self.assertEqual(get_codec("binary", "file.json").name, "binary")
+
+    def test_unknown_codec_raises(self):
+        """Tests whether an unknown codec name is rejected"""
+        with self.assertRaises(ValueError):
+            get_codec("yaml")
+
+
+class TestCodecs(unittest.TestCase):
+    """Test cases for saving and reloading with every codec"""
+
+    def setUp(self):
+        """Creates a temporary directory and a few objects"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.objects = [BaseModel(), Place(), Place()]
+        self.objects[1].name = "home"
+        self.objects[1].amenity_ids = ["a", "b"]
+        self.objects[2].price_by_night = 120
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self.tmp_dir.cleanup()
+
+    def save_and_reload(self, codec, file_name="file.json"):
+        """Returns the objects saved and reloaded with codec"""
+        path = os.path.join(self.tmp_dir.name, file_name)
+        storage = FileStorage(path, codec=codec)
+        for obj in self.objects:
+            storage.new(obj)
+        storage.save()
+        storage = FileStorage(path, codec=codec)
+        storage.reload()
+        return storage.all()
+
+    def assertRoundTrip(self, codec):
+        """Asserts that the objects survive a save and a reload"""
+        expected = {f"{obj.__class__.__name__}.{obj.id}": obj.to_dict()
+                    for obj in self.objects}
+        reloaded = self.save_and_reload(codec)
+        self.assertEqual({k: v.to_dict() for k, v in reloaded.items()},
+                         expected)
+
+    def test_json_round_trip(self):
+        """Tests the json codec"""
+        self.assertRoundTrip("json")
+
+    def test_binary_round_trip(self):
+        """Tests the binary codec"""
+        self.assertRoundTrip("binary")
+
+    @unittest.skipIf(serializers.orjson is None, "orjson is not installed")
+    def test_orjson_round_trip(self):
+        """Tests the orjson codec"""
+        self.assertRoundTrip("orjson")
+
+    @unittest.skipIf(serializers.msgpack is None, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        """Tests the msgpack codec"""
+        self.assertRoundTrip("msgpack")
+
+    def test_binary_file_is_rejected_by_magic(self):
+        """Tests whether the binary codec refuses other files"""
+        self.save_and_reload("json", "file.hbnb")
+        storage = FileStorage(os.path.join(self.tmp_dir.name, "file.hbnb"))
+        with self.assertRaises(ValueError):
+            storage.reload()
+
+    def test_convert_between_codecs(self):
+        """Tests whether convert keeps every object"""
+        self.save_and_reload("json")
+        src = os.path.join(self.tmp_dir.name, "file.json")
+        dst = os.path.join(self.tmp_dir.name, "file.hbnb")
+        convert(src, dst)
+        convert(dst, src)
+
+        storage = FileStorage(src)
+        storage.reload()
+        self.assertEqual({k: v.to_dict() for k, v in storage.all().items()},
+                         {f"{obj.__class__.__name__}.{obj.id}": obj.to_dict()
+                          for obj in self.objects})
+
+    def test_json_chunks_cover_every_record(self):
+        """Tests whether the ranges of chunks hold every record once"""
+        self.objects[0].note = "a\n}, {"
+        self.save_and_reload("json")
+        path = os.path.join(self.tmp_dir.name, "file.json")
+        codec = get_codec("json")
+        with open(path, 'r') as f:
+            expected = codec.load(f)
+        for n in (1, 2, 3, 10):
+            ranges = codec.chunks(path, n)
+            records = {}
+            for start, end in ranges:
+                part = codec.load_chunk(path, start, end)
+                self.assertFalse(part.keys() & records.keys())
+                records.update(part)
+            self.assertEqual(records, expected)
+
+    def test_json_chunks_of_other_layouts(self):
+        """Tests whether chunks refuses files not written by lines"""
+        path = os.path.join(self.tmp_dir.name, "file.json")
+        with open(path, 'w') as f:
+            f.write('{"BaseModel.1": {"id": "1"}}')
+        self.assertIsNone(get_codec("json").chunks(path, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()